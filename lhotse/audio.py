@@ -1,12 +1,19 @@
+import fnmatch
+import hashlib
 import logging
+import os
 import random
 import re
+import struct
+import threading
+import time
 import warnings
-from concurrent.futures import ProcessPoolExecutor
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from contextlib import contextmanager
 from dataclasses import dataclass
 from decimal import ROUND_HALF_UP
-from functools import lru_cache, partial
+from functools import lru_cache
 from io import BytesIO
 from itertools import islice
 from math import ceil, sqrt
@@ -17,19 +24,338 @@ from typing import Any, Callable, Dict, Iterable, List, Mapping, NamedTuple, Opt
 import numpy as np
 from tqdm.auto import tqdm
 
-from lhotse.augmentation import AudioTransform, Resample, Speed
-from lhotse.serialization import Serializable
-from lhotse.utils import (Decibels, NonPositiveEnergyError, Pathlike, Seconds, SetContainingAnything, SmartOpen,
-                          asdict_nonull, compute_num_samples, exactly_one_not_null, fastcopy, ifnone,
-                          index_by_id_and_check, perturb_num_samples, split_sequence)
+from lhotse.augmentation import AudioTransform, Resample, Speed, fuse_resampling_transforms
+from lhotse.serialization import Serializable, drop_incomplete_last_line, extension_contains
+from lhotse.utils import (Decibels, HttpRangeReader, INT16MAX, NonPositiveEnergyError, Pathlike, Seconds,
+                          SetContainingAnything, SmartOpen, asdict_nonull, compute_num_samples, exactly_one_not_null,
+                          fastcopy, ifnone, index_by_id_and_check, perturb_num_samples, split_sequence)
 
 Channels = Union[int, List[int]]
 
+# The dtypes of audio samples supported by the loading functions: float32 in the range [-1.0, 1.0]
+# (the default, which is required by the transforms and mixing), and int16, which takes a half
+# of the memory (and of the inter-process communication when the audio is read in DataLoader workers).
+AudioDtype = Union[str, np.dtype, type]
+AUDIO_DTYPES = (np.dtype(np.float32), np.dtype(np.int16))
+
 
 # TODO: document the dataclasses like this:
 # https://stackoverflow.com/a/3051356/5285891
 
 
+class AudioCache:
+    """
+    A bounded cache for the raw (encoded) audio data of ``command`` and ``url`` audio sources.
+    Reading a chunk of such a source requires running the whole command or downloading the whole file;
+    with the cache, reading many chunks of the same recording (e.g. after ``CutSet.trim_to_supervisions``)
+    runs the command or downloads the file only once. Only the sources read for chunks are cached,
+    since reading the full recording doesn't become any cheaper with the cache.
+
+    The entries are kept in memory in a least-recently-used (LRU) order, up to ``max_bytes`` bytes.
+    When ``spill_dir`` is specified, the entries evicted from memory are written to that directory
+    (up to ``max_spill_bytes`` bytes, also evicted in LRU order) and read back from disk when needed again.
+
+    Each process has its own cache (e.g. each DataLoader worker); the spill directory may be shared.
+    The cache is disabled by default: use :func:`set_audio_cache` to enable and configure it
+    (in each DataLoader worker, e.g. in ``worker_init_fn``), and :func:`get_audio_cache` to inspect its statistics.
+    """
+
+    def __init__(
+            self,
+            max_bytes: int = 512 * 1024 ** 2,
+            spill_dir: Optional[Pathlike] = None,
+            max_spill_bytes: int = 10 * 1024 ** 3,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.spill_dir = Path(spill_dir) if spill_dir is not None else None
+        if self.spill_dir is not None:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+        self.max_spill_bytes = max_spill_bytes
+        self._memory: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._memory_bytes = 0
+        self._spilled: 'OrderedDict[str, int]' = OrderedDict()
+        self._spilled_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 or self.spill_dir is not None
+
+    def contains(self, key: str) -> bool:
+        """Check if ``key`` is cached (in memory or on disk), without affecting the statistics or the LRU order."""
+        with self._lock:
+            if key in self._memory:
+                return True
+            return self.spill_dir is not None and self._spill_path(key).is_file()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'memory_bytes': self._memory_bytes,
+            'spilled_bytes': self._spilled_bytes,
+        }
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached data for ``key``, or ``None`` if it is not cached."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+            data = self._read_spilled(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self.put(key, data)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store ``data`` under ``key``, evicting the least recently used entries if needed."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if key in self._memory:
+                self._memory_bytes -= len(self._memory.pop(key))
+            if len(data) > self.max_bytes:
+                # Too large to keep in memory -- store it on disk directly (if possible).
+                self._spill(key, data)
+                return
+            self._memory[key] = data
+            self._memory_bytes += len(data)
+            while self._memory_bytes > self.max_bytes:
+                old_key, old_data = self._memory.popitem(last=False)
+                self._memory_bytes -= len(old_data)
+                self.evictions += 1
+                self._spill(old_key, old_data)
+
+    def clear(self) -> None:
+        """Remove all the entries (including the files in the spill directory that were written by this cache)."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            for key in list(self._spilled):
+                self._remove_spilled(key)
+
+    def _spill_path(self, key: str) -> Path:
+        return self.spill_dir / hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def _spill(self, key: str, data: bytes) -> None:
+        if self.spill_dir is None or len(data) > self.max_spill_bytes:
+            return
+        if key not in self._spilled:
+            self._spill_path(key).write_bytes(data)
+            self._spilled[key] = len(data)
+            self._spilled_bytes += len(data)
+        self._spilled.move_to_end(key)
+        while self._spilled_bytes > self.max_spill_bytes:
+            self._remove_spilled(next(iter(self._spilled)))
+
+    def _read_spilled(self, key: str) -> Optional[bytes]:
+        if self.spill_dir is None:
+            return None
+        path = self._spill_path(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            # Not spilled, or already removed by another process sharing the spill directory.
+            return None
+        if key not in self._spilled:
+            self._spilled[key] = len(data)
+            self._spilled_bytes += len(data)
+        self._spilled.move_to_end(key)
+        return data
+
+    def _remove_spilled(self, key: str) -> None:
+        self._spilled_bytes -= self._spilled.pop(key)
+        try:
+            self._spill_path(key).unlink()
+        except OSError:
+            pass
+
+
+def set_audio_cache(
+        max_bytes: int = 512 * 1024 ** 2,
+        spill_dir: Optional[Pathlike] = None,
+        max_spill_bytes: int = 10 * 1024 ** 3,
+) -> AudioCache:
+    """
+    Enable and configure the cache used for ``command`` and ``url`` audio sources in this process
+    (see :class:`AudioCache`). Use ``max_bytes=0`` (and no ``spill_dir``) to disable caching again.
+    Returns the new cache object.
+    """
+    global _AUDIO_CACHE
+    _AUDIO_CACHE = AudioCache(max_bytes=max_bytes, spill_dir=spill_dir, max_spill_bytes=max_spill_bytes)
+    return _AUDIO_CACHE
+
+
+def get_audio_cache() -> AudioCache:
+    """Return the cache used for ``command`` and ``url`` audio sources in this process."""
+    return _AUDIO_CACHE
+
+
+_AUDIO_CACHE = AudioCache(max_bytes=0)
+
+
+class AudioMetadataCache:
+    """
+    A persistent cache of the audio file metadata (the number of channels and samples, the sampling rate
+    and the duration) read by :meth:`Recording.from_file` and :meth:`RecordingSet.from_dir`.
+    With the cache, re-creating the manifests of a corpus requires only a ``stat`` call per audio file,
+    rather than reading its header (or, for some formats, decoding the whole file).
+
+    The entries are stored in an SQLite database at ``path``, keyed by the absolute path of the audio file
+    (and ``force_opus_sampling_rate``); an entry is only used when the file's size and modification time
+    did not change since it was cached.
+    The database may be shared by many processes (e.g. the workers of ``RecordingSet.from_dir``).
+
+    Use :func:`set_audio_metadata_cache` to enable the cache (or set the ``LHOTSE_AUDIO_METADATA_CACHE``
+    environment variable to the database path).
+    """
+
+    def __init__(self, path: Pathlike) -> None:
+        self.path = Path(path)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = os.getpid()
+        # Guards the creation of the connection; there is one lock per process, so that a lock
+        # held by another thread during a fork is never used in the child process.
+        self._init_locks: Dict[int, threading.Lock] = {}
+
+    def _connection(self):
+        pid = os.getpid()
+        if self._conn is not None and self._pid == pid:
+            return self._conn
+        with self._init_locks.setdefault(pid, threading.Lock()):
+            if self._conn is not None and self._pid == pid:
+                # Another thread has created the connection in the meantime.
+                return self._conn
+            if self._pid != pid:
+                # We're in a forked process: SQLite connections must not be used across a fork,
+                # and the lock might have been held by another thread during the fork.
+                self._lock = threading.Lock()
+            import sqlite3
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=60.0, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS audio_info ('
+                'path TEXT NOT NULL, opus_sampling_rate INTEGER NOT NULL, size INTEGER NOT NULL, '
+                'mtime_ns INTEGER NOT NULL, channels INTEGER NOT NULL, frames INTEGER NOT NULL, '
+                'samplerate INTEGER NOT NULL, duration REAL NOT NULL, PRIMARY KEY (path, opus_sampling_rate))'
+            )
+            conn.commit()
+            # The connection is published before the PID, so that other threads never use a stale connection.
+            self._conn = conn
+            self._pid = pid
+        return self._conn
+
+    def get(
+            self,
+            path: Pathlike,
+            stat: Optional[os.stat_result] = None,
+            force_opus_sampling_rate: Optional[int] = None,
+    ) -> Optional['LibsndfileCompatibleAudioInfo']:
+        """
+        Return the cached metadata of the audio file at ``path``, or ``None`` if it's not cached
+        or the file changed since. ``stat`` is the result of ``os.stat(path)`` (if the caller has it already).
+        """
+        if stat is None:
+            stat = os.stat(path)
+        conn = self._connection()
+        with self._lock:
+            row = conn.execute(
+                'SELECT size, mtime_ns, channels, frames, samplerate, duration FROM audio_info '
+                'WHERE path = ? AND opus_sampling_rate = ?',
+                (os.path.abspath(path), force_opus_sampling_rate or 0)
+            ).fetchone()
+            if row is None or row[0] != stat.st_size or row[1] != stat.st_mtime_ns:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return LibsndfileCompatibleAudioInfo(channels=row[2], frames=row[3], samplerate=row[4], duration=row[5])
+
+    def put(
+            self,
+            path: Pathlike,
+            info: 'LibsndfileCompatibleAudioInfo',
+            stat: Optional[os.stat_result] = None,
+            force_opus_sampling_rate: Optional[int] = None,
+    ) -> None:
+        """Store the metadata of the audio file at ``path``."""
+        self.put_many([(path, info, stat)], force_opus_sampling_rate=force_opus_sampling_rate)
+
+    def put_many(
+            self,
+            items: Iterable[Tuple[Pathlike, 'LibsndfileCompatibleAudioInfo', Optional[os.stat_result]]],
+            force_opus_sampling_rate: Optional[int] = None,
+    ) -> None:
+        """Store the metadata of many audio files at once, given tuples of ``(path, info, stat)``."""
+        rows = []
+        for path, info, stat in items:
+            if stat is None:
+                stat = os.stat(path)
+            rows.append((
+                os.path.abspath(path), force_opus_sampling_rate or 0, stat.st_size, stat.st_mtime_ns,
+                info.channels, info.frames, info.samplerate, info.duration
+            ))
+        conn = self._connection()
+        with self._lock:
+            conn.executemany('INSERT OR REPLACE INTO audio_info VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            conn.commit()
+
+    def __len__(self) -> int:
+        conn = self._connection()
+        with self._lock:
+            return conn.execute('SELECT COUNT(*) FROM audio_info').fetchone()[0]
+
+    def clear(self) -> None:
+        """Remove all the entries from the cache."""
+        conn = self._connection()
+        with self._lock:
+            conn.execute('DELETE FROM audio_info')
+            conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def close(self) -> None:
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+
+
+def set_audio_metadata_cache(path: Optional[Pathlike]) -> Optional[AudioMetadataCache]:
+    """
+    Enable the persistent audio metadata cache (see :class:`AudioMetadataCache`) stored at ``path``
+    in this process, or disable it with ``path=None``. Returns the new cache object.
+    """
+    global _AUDIO_METADATA_CACHE
+    if _AUDIO_METADATA_CACHE is not None:
+        _AUDIO_METADATA_CACHE.close()
+    _AUDIO_METADATA_CACHE = AudioMetadataCache(path) if path is not None else None
+    return _AUDIO_METADATA_CACHE
+
+
+def get_audio_metadata_cache() -> Optional[AudioMetadataCache]:
+    """Return the audio metadata cache used in this process, or ``None`` when it's disabled."""
+    return _AUDIO_METADATA_CACHE
+
+
+_AUDIO_METADATA_CACHE = (
+    AudioMetadataCache(os.environ['LHOTSE_AUDIO_METADATA_CACHE'])
+    if os.environ.get('LHOTSE_AUDIO_METADATA_CACHE')
+    else None
+)
+
+
 @dataclass
 class AudioSource:
     """
@@ -48,6 +374,8 @@ class AudioSource:
             offset: Seconds = 0.0,
             duration: Optional[Seconds] = None,
             force_opus_sampling_rate: Optional[int] = None,
+            channels: Optional[List[int]] = None,
+            dtype: AudioDtype = 'float32',
     ) -> np.ndarray:
         """
         Load the AudioSource (from files, commands, or URLs) with soundfile,
@@ -55,11 +383,14 @@ class AudioSource:
         Returns numpy array with shapes: (n_samples,) for single-channel,
         (n_channels, n_samples) for multi-channel.
 
-        Note: The elements in the returned array are in the range [-1.0, 1.0]
-        and are of dtype `np.floatt32`.
+        Note: By default, the elements in the returned array are in the range [-1.0, 1.0]
+        and are of dtype `np.float32`.
 
         :param force_opus_sampling_rate: This parameter is only used when we detect an OPUS file.
             It will tell ffmpeg to resample OPUS to this sampling rate.
+        :param channels: optional indices (positions in ``self.channels``) of the channels to read.
+            When specified, the shape is always ``(len(channels), n_samples)``.
+        :param dtype: ``'float32'`` (default) or ``'int16'``, the dtype of the returned samples.
         """
         assert self.type in ('file', 'command', 'url')
 
@@ -67,27 +398,21 @@ class AudioSource:
         source = self.source
 
         if self.type == 'command':
-            if offset != 0.0 or duration is not None:
-                # TODO(pzelasko): How should we support chunking for commands?
-                #                 We risk being very inefficient when reading many chunks from the same file
-                #                 without some caching scheme, because we'll be re-running commands.
+            if (offset != 0.0 or duration is not None) and not get_audio_cache().enabled:
                 warnings.warn('You requested a subset of a recording that is read from disk via a bash command. '
                               'Expect large I/O overhead if you are going to read many chunks like these, '
-                              'since every time we will read the whole file rather than its subset.')
-            source = BytesIO(run(self.source, shell=True, stdout=PIPE).stdout)
-            samples, sampling_rate = read_audio(source, offset=offset, duration=duration)
+                              'since every time we will read the whole file rather than its subset '
+                              '(the audio cache is disabled, see lhotse.audio.set_audio_cache).')
+            source = BytesIO(self._read_bytes_cached(
+                lambda: run(self.source, shell=True, stdout=PIPE).stdout,
+                store=offset != 0.0 or duration is not None,
+            ))
+            samples, sampling_rate = read_audio(
+                source, offset=offset, duration=duration, channels=channels, dtype=dtype
+            )
 
         elif self.type == 'url':
-            if offset != 0.0 or duration is not None:
-                # TODO(pzelasko): How should we support chunking for URLs?
-                #                 We risk being very inefficient when reading many chunks from the same file
-                #                 without some caching scheme, because we'll be re-running commands.
-                warnings.warn('You requested a subset of a recording that is read from URL. '
-                              'Expect large I/O overhead if you are going to read many chunks like these, '
-                              'since every time we will download the whole file rather than its subset.')
-            with SmartOpen.open(self.source, 'rb') as f:
-                source = BytesIO(f.read())
-                samples, sampling_rate = read_audio(source, offset=offset, duration=duration)
+            samples, sampling_rate = self._load_url(offset=offset, duration=duration, channels=channels, dtype=dtype)
 
         else:  # self.type == 'file'
             samples, sampling_rate = read_audio(
@@ -95,6 +420,8 @@ class AudioSource:
                 offset=offset,
                 duration=duration,
                 force_opus_sampling_rate=force_opus_sampling_rate,
+                channels=channels,
+                dtype=dtype,
             )
 
         # explicit sanity check for duration as soundfile does not complain here
@@ -106,7 +433,61 @@ class AudioSource:
                     f'Requested more audio ({duration}s) than available ({available_duration}s)'
                 )
 
-        return samples.astype(np.float32)
+        return convert_audio_dtype(samples, dtype)
+
+    def _load_url(
+            self,
+            offset: Seconds,
+            duration: Optional[Seconds],
+            channels: Optional[List[int]] = None,
+            dtype: AudioDtype = 'float32',
+    ) -> Tuple[np.ndarray, int]:
+        is_chunk = offset != 0.0 or duration is not None
+        if (
+                is_chunk
+                and self.source.startswith(('http://', 'https://'))
+                and not get_audio_cache().contains(self._cache_key)
+        ):
+            # Download only the parts of the file needed to read the chunk, using HTTP range requests.
+            try:
+                with HttpRangeReader(self.source) as f:
+                    if _is_soundfile_readable(f):
+                        return read_audio(f, offset=offset, duration=duration, channels=channels, dtype=dtype)
+            except OSError:
+                # The server doesn't support range requests -- we'll download the whole file.
+                pass
+        if is_chunk and not get_audio_cache().enabled:
+            warnings.warn('You requested a subset of a recording that is read from URL. '
+                          'Expect large I/O overhead if you are going to read many chunks like these, '
+                          'since every time we will download the whole file rather than its subset '
+                          '(the audio cache is disabled, see lhotse.audio.set_audio_cache).')
+
+        def download() -> bytes:
+            with SmartOpen.open(self.source, 'rb') as f:
+                return f.read()
+
+        source = BytesIO(self._read_bytes_cached(download, store=is_chunk))
+        return read_audio(source, offset=offset, duration=duration, channels=channels, dtype=dtype)
+
+    @property
+    def _cache_key(self) -> str:
+        return f'{self.type}:{self.source}'
+
+    def _read_bytes_cached(self, read_fn: Callable[[], bytes], store: bool = True) -> bytes:
+        """
+        Return the raw bytes of this source from the audio cache, or read them with ``read_fn``
+        (and cache them, when ``store`` is set).
+        """
+        cache = get_audio_cache()
+        if not cache.enabled:
+            return read_fn()
+        key = self._cache_key
+        data = cache.get(key)
+        if data is None:
+            data = read_fn()
+            if store:
+                cache.put(key, data)
+        return data
 
     def with_path_prefix(self, path: Pathlike) -> 'AudioSource':
         if self.type != 'file':
@@ -214,6 +595,9 @@ class Recording:
             it is advisable to create the ``Recording`` object manually, with each
             file represented as a separate ``AudioSource`` object.
 
+        The metadata is looked up in the audio metadata cache first, when it is enabled
+        (see :func:`set_audio_metadata_cache`).
+
         :param path: Path to an audio file supported by libsoundfile (pysoundfile).
         :param recording_id: recording id, when not specified ream the filename's stem ("x.wav" -> "x").
         :param relative_path_depth: optional int specifying how many last parts of the file path
@@ -225,22 +609,18 @@ class Recording:
         :return: a new ``Recording`` instance pointing to the audio file.
         """
         path = Path(path)
-        if path.suffix.lower() == '.opus':
-            # We handle OPUS as a special case because we might need to force a certain sampling rate.
-            info = opus_info(path, force_opus_sampling_rate=force_opus_sampling_rate)
-        elif path.suffix.lower() == '.sph':
-            # We handle SPHERE as another special case because some old codecs (i.e. "shorten" codec)
-            # can't be handled by neither pysoundfile nor pyaudioread.
-            info = sph_info(path)
-        else:
-            try:
-                # Try to parse the file using pysoundfile first.
-                import soundfile as sf
-                info = sf.info(str(path))
-            except:
-                # Try to parse the file using audioread as a fallback.
-                info = audioread_info(str(path))
-                # If both fail, then Python 3 will display both exception messages.
+        info = read_audio_info(path, force_opus_sampling_rate=force_opus_sampling_rate)
+        return Recording._from_info(
+            path, info, recording_id=recording_id, relative_path_depth=relative_path_depth
+        )
+
+    @staticmethod
+    def _from_info(
+            path: Path,
+            info: 'LibsndfileCompatibleAudioInfo',
+            recording_id: Optional[str] = None,
+            relative_path_depth: Optional[int] = None,
+    ) -> 'Recording':
         return Recording(
             id=recording_id if recording_id is not None else path.stem,
             sampling_rate=info.samplerate,
@@ -275,6 +655,7 @@ class Recording:
             channels: Optional[Channels] = None,
             offset: Seconds = 0.0,
             duration: Optional[Seconds] = None,
+            dtype: AudioDtype = 'float32',
     ) -> np.ndarray:
         """
         Read the audio samples from the underlying audio source (path, URL, unix pipe/command).
@@ -284,6 +665,10 @@ class Recording:
             Note that it is only efficient for local filesystem files, i.e. URLs and commands will read
             all the samples first and discard the unneeded ones afterwards.
         :param duration: seconds, indicates the total audio time to read (starting from ``offset``).
+        :param dtype: ``'float32'`` (default, samples in the range [-1.0, 1.0]) or ``'int16'``.
+            The int16 samples are decoded directly from the file, without an intermediate float copy;
+            when the recording has transforms (e.g. speed perturbation), they are applied in float32
+            and the result is converted to int16 afterwards.
         :return: a numpy array of audio samples with shape ``(num_channels, num_samples)``.
         """
         if channels is None:
@@ -297,6 +682,8 @@ class Recording:
                                                           f"requested channels: {channels})"
 
         transforms = [AudioTransform.from_dict(params) for params in self.transforms or []]
+        # The transforms operate on float32 samples.
+        read_dtype = 'float32' if transforms else dtype
 
         # Do a "backward pass" over data augmentation transforms to get the
         # offset and duration for loading a piece of the original audio.
@@ -313,27 +700,28 @@ class Recording:
             # Case: source not requested
             if not channels.intersection(source.channels):
                 continue
+            # Case: multi-channel audio file but only some channels requested -
+            #       we'll only read those channels.
+            channels_to_read = [idx for idx, cid in enumerate(source.channels) if cid in channels]
             samples = source.load_audio(
                 offset=offset_aug,
                 duration=duration_aug,
                 force_opus_sampling_rate=self.sampling_rate,
+                channels=channels_to_read if len(channels_to_read) < len(source.channels) else None,
+                dtype=read_dtype,
             )
-
-            # Case: two-channel audio file but only one channel requested
-            #       it might not be optimal to load all channels, but IDK if there's anything we can do about it
-            channels_to_remove = [
-                idx for idx, cid in enumerate(source.channels)
-                if cid not in channels
-            ]
-            if channels_to_remove:
-                samples = np.delete(samples, channels_to_remove, axis=0)
             samples_per_source.append(samples)
 
         # shape: (n_channels, n_samples)
-        audio = np.vstack(samples_per_source)
+        if len(samples_per_source) == 1:
+            # Avoid a copy when reading a single source.
+            audio = np.atleast_2d(samples_per_source[0])
+        else:
+            audio = np.vstack(samples_per_source)
 
         # We'll apply the transforms now (if any).
-        for tfn in transforms:
+        # Consecutive speed perturbations and resamplings are fused into a single resampling.
+        for tfn in fuse_resampling_transforms(transforms):
             audio = tfn(audio, self.sampling_rate)
 
         # Transformation chains can introduce small mismatches in the number of samples:
@@ -345,7 +733,7 @@ class Recording:
             recording=self
         )
 
-        return audio
+        return convert_audio_dtype(audio, dtype)
 
     def _expected_num_samples(self, offset: Seconds, duration: Optional[Seconds]) -> int:
         if offset == 0 and duration is None:
@@ -480,7 +868,8 @@ class RecordingSet(Serializable, Sequence[Recording]):
         Indicates whether this manifest was opened in lazy (read-on-the-fly) mode or not.
         """
         from lhotse.serialization import LazyJsonlIterator
-        return isinstance(self.recordings, LazyJsonlIterator)
+        from lhotse.sharding import ShardedJsonlIterator
+        return isinstance(self.recordings, (LazyJsonlIterator, ShardedJsonlIterator))
 
     @property
     def ids(self) -> Iterable[str]:
@@ -496,7 +885,9 @@ class RecordingSet(Serializable, Sequence[Recording]):
             pattern: str,
             num_jobs: int = 1,
             force_opus_sampling_rate: Optional[int] = None,
-    ):
+            output_path: Optional[Pathlike] = None,
+            chunk_size: int = 256,
+    ) -> 'RecordingSet':
         """
         Recursively scan a directory ``path`` for audio files that match the given ``pattern`` and create
         a :class:`.RecordingSet` manifest for them.
@@ -508,34 +899,59 @@ class RecordingSet(Serializable, Sequence[Recording]):
             file represented as a separate :class:`.AudioSource` object, and then
             a :class:`RecordingSet` that contains all the recordings.
 
+        When ``output_path`` is specified, the recordings are written to that JSONL file as they are scanned
+        (see :meth:`RecordingSet.open_writer`), rather than kept in memory, and a lazily opened
+        :class:`.RecordingSet` is returned. If the file already exists (e.g. the previous scan was interrupted),
+        the scan is resumed: the files whose recording IDs are already in it are skipped.
+
         :param path: Path to a directory of audio of files (possibly with sub-directories).
         :param pattern: A bash-like pattern specifying allowed filenames, e.g. ``*.wav`` or ``session1-*.flac``.
-        :param num_jobs: The number of parallel workers for reading audio files to get their metadata.
+        :param num_jobs: The number of parallel workers for reading audio files to get their metadata
+            (processes), and for listing the directories (threads).
+            When the audio metadata cache is enabled (see :func:`set_audio_metadata_cache`),
+            only the files missing from the cache (or modified since) are read by the workers.
         :param force_opus_sampling_rate: when specified, this value will be used as the sampling rate
             instead of the one we read from the manifest. This is useful for OPUS files that always
             have 48kHz rate and need to be resampled to the real one -- we will perform that operation
             "under-the-hood". For non-OPUS files this input does nothing.
-        :return: a new ``Recording`` instance pointing to the audio file.
+        :param output_path: optional path to a JSONL manifest (``.jsonl`` or ``.jsonl.gz``)
+            to write the recordings to. The scans written to a ``.jsonl`` file can be resumed after a crash;
+            a ``.jsonl.gz`` file only if it was closed properly.
+        :param chunk_size: how many files are sent to a worker process at once.
+        :return: a new ``RecordingSet`` with the recordings of the audio files.
         """
         msg = f'Scanning audio files ({pattern})'
-        fn = Recording.from_file
-        if force_opus_sampling_rate is not None:
-            fn = partial(Recording.from_file, force_opus_sampling_rate=force_opus_sampling_rate)
-        if num_jobs == 1:
-            # Avoid spawning process for one job.
-            return RecordingSet.from_recordings(
-                tqdm(
-                    map(fn, Path(path).rglob(pattern)),
-                    desc=msg
-                )
-            )
-        with ProcessPoolExecutor(num_jobs) as ex:
-            return RecordingSet.from_recordings(
-                tqdm(
-                    ex.map(fn, Path(path).rglob(pattern)),
-                    desc=msg
-                )
-            )
+        paths = walk_files(path, pattern, num_jobs=num_jobs)
+        start = time.perf_counter()
+        num_files = 0
+
+        def scan(paths: Iterable[Path]) -> Iterable[Recording]:
+            nonlocal num_files
+            infos = scan_audio_info(paths, num_jobs=num_jobs, force_opus_sampling_rate=force_opus_sampling_rate,
+                                    chunk_size=chunk_size)
+            for audio_path, info in tqdm(infos, desc=msg, unit='file'):
+                num_files += 1
+                yield Recording._from_info(audio_path, info)
+
+        if output_path is None:
+            recordings = RecordingSet.from_recordings(scan(paths))
+        else:
+            output_path = Path(output_path)
+            if not extension_contains('.gz', output_path):
+                drop_incomplete_last_line(output_path)
+            with RecordingSet.open_writer(output_path, overwrite=False) as writer:
+                if writer.ignore_ids:
+                    logging.info(f'Resuming the scan: {len(writer.ignore_ids)} recordings '
+                                 f'were already written to {output_path}.')
+                for recording in scan(p for p in paths if p.stem not in writer):
+                    writer.write(recording)
+                    if num_files % RECORDING_WRITER_FLUSH_INTERVAL == 0:
+                        writer.flush()
+            recordings = RecordingSet.from_jsonl_lazy(output_path)
+        elapsed = time.perf_counter() - start
+        logging.info(f'Scanned {num_files} audio files in {elapsed:.1f}s '
+                     f'({num_files / max(elapsed, 1e-6):.1f} files/s).')
+        return recordings
 
     @staticmethod
     def from_dicts(data: Iterable[dict]) -> 'RecordingSet':
@@ -616,11 +1032,13 @@ class RecordingSet(Serializable, Sequence[Recording]):
             channels: Optional[Channels] = None,
             offset_seconds: float = 0.0,
             duration_seconds: Optional[float] = None,
+            dtype: AudioDtype = 'float32',
     ) -> np.ndarray:
         return self.recordings[recording_id].load_audio(
             channels=channels,
             offset=offset_seconds,
-            duration=duration_seconds
+            duration=duration_seconds,
+            dtype=dtype,
         )
 
     def with_path_prefix(self, path: Pathlike) -> 'RecordingSet':
@@ -696,18 +1114,40 @@ class AudioMixer:
     The time offset is relative to the start of the reference signal
     (only positive values are supported).
     The SNR is relative to the energy of the signal used to initialize the ``AudioMixer``.
+
+    The tracks are accumulated in place into a single buffer, which is allocated once
+    when the final number of samples is known up front (see ``num_samples``),
+    and otherwise grows geometrically. The individual (padded and scaled) tracks
+    are only materialized when ``unmixed_audio`` is requested.
     """
 
-    def __init__(self, base_audio: np.ndarray, sampling_rate: int):
+    def __init__(
+            self,
+            base_audio: np.ndarray,
+            sampling_rate: int,
+            num_samples: Optional[int] = None,
+            keep_tracks: bool = True,
+    ):
         """
         :param base_audio: A numpy array with the audio samples for the base signal
             (all the other signals will be mixed to it).
         :param sampling_rate: Sampling rate of the audio.
+        :param num_samples: The expected number of samples of the mix, used to preallocate the mix buffer
+            (e.g. the ``num_samples`` of a ``MixedCut``). The mix is still extended if the tracks turn out longer.
+        :param keep_tracks: When ``False``, the mixer doesn't keep references to the tracks added to the mix,
+            and ``unmixed_audio`` is not available.
         """
-        self.tracks = [base_audio]
         self.sampling_rate = sampling_rate
         self.reference_energy = audio_energy(base_audio)
-        self.dtype = self.tracks[0].dtype
+        self.dtype = base_audio.dtype
+        self.keep_tracks = keep_tracks
+        # (start sample, gain, audio) of each track added to the mix.
+        self.tracks: List[Tuple[int, float, np.ndarray]] = []
+        self._num_samples = 0
+        self._mix = np.zeros((1, max(base_audio.shape[1], ifnone(num_samples, 0))), dtype=self.dtype)
+        # Each channel of a multi-channel base signal is a separate track (i.e. the channels are summed in the mix).
+        for channel in base_audio:
+            self._accumulate(channel[np.newaxis], start=0, gain=1.0)
 
     @property
     def unmixed_audio(self) -> np.ndarray:
@@ -715,15 +1155,20 @@ class AudioMixer:
         Return a numpy ndarray with the shape (num_tracks, num_samples), where each track is
         zero padded and scaled adequately to the offsets and SNR used in ``add_to_mix`` call.
         """
-        return np.vstack(self.tracks)
+        assert self.keep_tracks, "The AudioMixer was created with keep_tracks=False: the tracks are not available."
+        unmixed = np.zeros((len(self.tracks), self._num_samples), dtype=self.dtype)
+        for idx, (start, gain, audio) in enumerate(self.tracks):
+            np.multiply(audio, gain, out=unmixed[idx: idx + 1, start: start + audio.shape[1]], casting='unsafe')
+        return unmixed
 
     @property
     def mixed_audio(self) -> np.ndarray:
         """
         Return a numpy ndarray with the shape (1, num_samples) - a mono mix of the tracks
         supplied with ``add_to_mix`` calls.
+        Note: it is a view of the mixer's buffer, which is modified by subsequent ``add_to_mix`` calls.
         """
-        return np.sum(self.unmixed_audio, axis=0, keepdims=True)
+        return self._mix[:, :self._num_samples]
 
     def add_to_mix(
             self,
@@ -743,44 +1188,6 @@ class AudioMixer:
         assert audio.shape[0] == 1  # TODO: support multi-channels
         assert offset >= 0.0, "Negative offset in mixing is not supported."
 
-        reference_audio = self.tracks[0]
-        num_samples_offset = round(offset * self.sampling_rate)
-        current_num_samples = reference_audio.shape[1]
-
-        audio_to_add = audio
-
-        # When there is an offset, we need to pad before the start of the audio we're adding.
-        if offset > 0:
-            audio_to_add = np.hstack([
-                np.zeros((1, num_samples_offset), self.dtype),
-                audio_to_add
-            ])
-
-        incoming_num_samples = audio_to_add.shape[1]
-        mix_num_samples = max(current_num_samples, incoming_num_samples)
-
-        # When the existing samples are less than what we anticipate after the mix,
-        # we need to pad after the end of the existing audio mixed so far.
-        # Since we're keeping every track as a separate entry in the ``self.tracks`` list,
-        # we need to pad each of them so that their shape matches when performing the final mix.
-        if current_num_samples < mix_num_samples:
-            for idx in range(len(self.tracks)):
-                padded_audio = np.hstack([
-                    self.tracks[idx],
-                    np.zeros((1, mix_num_samples - current_num_samples), self.dtype)
-                ])
-                self.tracks[idx] = padded_audio
-
-        # When the audio we're mixing in are shorter that the anticipated mix length,
-        # we need to pad after their end.
-        # Note: we're doing that non-efficiently, as it we potentially re-allocate numpy arrays twice,
-        # during this padding and the  offset padding before. If that's a bottleneck, we'll optimize.
-        if incoming_num_samples < mix_num_samples:
-            audio_to_add = np.hstack([
-                audio_to_add,
-                np.zeros((1, mix_num_samples - incoming_num_samples), self.dtype)
-            ])
-
         # When SNR is requested, find what gain is needed to satisfy the SNR
         gain = 1.0
         if snr is not None:
@@ -795,8 +1202,21 @@ class AudioMixer:
             # we need to take a square root of the energy ratio.
             gain = sqrt(target_energy / added_audio_energy)
 
-        # self.mixed_audio = reference_audio + gain * audio_to_add
-        self.tracks.append(gain * audio_to_add)
+        self._accumulate(audio, start=round(offset * self.sampling_rate), gain=gain)
+
+    def _accumulate(self, audio: np.ndarray, start: int, gain: float) -> None:
+        end = start + audio.shape[1]
+        if end > self._mix.shape[1]:
+            # The tracks are longer than anticipated: grow the buffer geometrically,
+            # so that adding many tracks is linear in the number of samples.
+            grown = np.zeros((1, max(end, self._mix.shape[1] * 3 // 2)), dtype=self.dtype)
+            grown[:, :self._num_samples] = self._mix[:, :self._num_samples]
+            self._mix = grown
+        target = self._mix[:, start: end]
+        np.add(target, audio if gain == 1.0 else gain * audio, out=target, casting='unsafe')
+        self._num_samples = max(self._num_samples, end)
+        if self.keep_tracks:
+            self.tracks.append((start, gain, audio))
 
 
 def audio_energy(audio: np.ndarray) -> float:
@@ -806,25 +1226,45 @@ def audio_energy(audio: np.ndarray) -> float:
 FileObject = Any  # Alias for file-like objects
 
 
+# When only some of the channels of a multi-channel file are read, the audio is decoded in blocks
+# of this many frames, and only the selected channels are copied from each block to the output.
+CHANNEL_SELECTIVE_READ_BLOCK_FRAMES = 16384
+
+
 def read_audio(
         path_or_fd: Union[Pathlike, FileObject],
         offset: Seconds = 0.0,
         duration: Optional[Seconds] = None,
         force_opus_sampling_rate: Optional[int] = None,
+        channels: Optional[List[int]] = None,
+        dtype: AudioDtype = 'float32',
 ) -> Tuple[np.ndarray, int]:
+    """
+    Read the audio samples and the sampling rate from a file (or a file-like object).
+
+    :param channels: optional indices of the channels in the file to read. When specified,
+        the result has a shape of ``(len(channels), num_samples)``, and the other channels
+        are never copied to memory (for the formats read with soundfile).
+    :param dtype: the dtype of the returned samples, ``'float32'`` (in the range [-1.0, 1.0])
+        or ``'int16'``. The formats read with soundfile are decoded directly to the requested dtype;
+        the others are converted with :func:`convert_audio_dtype`.
+    """
+    dtype = _check_audio_dtype(dtype)
     if isinstance(path_or_fd, (str, Path)) and str(path_or_fd).lower().endswith('.opus'):
-        return read_opus(
+        samples, sampling_rate = read_opus(
             path_or_fd,
             offset=offset,
             duration=duration,
             force_opus_sampling_rate=force_opus_sampling_rate,
         )
+        return convert_audio_dtype(_select_channels(samples, channels), dtype), sampling_rate
     elif isinstance(path_or_fd, (str, Path)) and str(path_or_fd).lower().endswith('.sph'):
-        return read_sph(
+        samples, sampling_rate = read_sph(
             path_or_fd,
             offset=offset,
             duration=duration
         )
+        return convert_audio_dtype(_select_channels(samples, channels), dtype), sampling_rate
     try:
         import soundfile as sf
         with sf.SoundFile(path_or_fd) as sf_desc:
@@ -836,10 +1276,105 @@ def read_audio(
                 frame_duration = compute_num_samples(duration, sampling_rate)
             else:
                 frame_duration = -1
+            if channels is not None and sf_desc.channels > 1 and sf_desc.seekable():
+                return _soundfile_read_channels(sf_desc, frame_duration, channels, dtype), sampling_rate
             # Load the target number of frames, and transpose to match librosa form
-            return sf_desc.read(frames=frame_duration, dtype=np.float32, always_2d=False).T, sampling_rate
+            samples = sf_desc.read(frames=frame_duration, dtype=dtype.name, always_2d=False).T
+            return _select_channels(samples, channels), sampling_rate
     except:
-        return _audioread_load(path_or_fd, offset=offset, duration=duration)
+        samples, sampling_rate = _audioread_load(path_or_fd, offset=offset, duration=duration)
+        return convert_audio_dtype(_select_channels(samples, channels), dtype), sampling_rate
+
+
+def _is_soundfile_readable(f: FileObject) -> bool:
+    """
+    Check if soundfile can decode the audio from a seekable file-like object
+    (the other decoders require the whole file). The position of ``f`` is reset to the start.
+    """
+    import soundfile as sf
+    try:
+        with sf.SoundFile(f):
+            return True
+    except RuntimeError:
+        # Unknown or unsupported format (``soundfile.LibsndfileError`` is a subclass of RuntimeError).
+        return False
+    finally:
+        f.seek(0)
+
+
+def _soundfile_read_channels(
+        sf_desc,
+        frames: int,
+        channels: List[int],
+        dtype: np.dtype = np.dtype(np.float32),
+) -> np.ndarray:
+    """
+    Read ``frames`` frames (or until the end when negative) of the selected ``channels``
+    from an open ``soundfile.SoundFile``. The interleaved frames are decoded in blocks
+    into a re-used buffer and only the selected channels are de-interleaved into the output,
+    so that the memory used for the unneeded channels does not depend on the duration.
+    """
+    available = sf_desc.frames - sf_desc.tell()
+    frames = available if frames < 0 else min(frames, available)
+    out = np.empty((len(channels), max(frames, 0)), dtype=dtype)
+    block = np.empty((min(CHANNEL_SELECTIVE_READ_BLOCK_FRAMES, max(frames, 1)), sf_desc.channels), dtype=dtype)
+    pos = 0
+    while pos < frames:
+        chunk = sf_desc.read(frames=min(len(block), frames - pos), dtype=dtype.name, out=block[:frames - pos])
+        if len(chunk) == 0:
+            break
+        out[:, pos: pos + len(chunk)] = chunk[:, channels].T
+        pos += len(chunk)
+    return out[:, :pos]
+
+
+def _select_channels(samples: np.ndarray, channels: Optional[List[int]]) -> np.ndarray:
+    if channels is None:
+        return samples
+    return np.atleast_2d(samples)[channels]
+
+
+def _check_audio_dtype(dtype: AudioDtype) -> np.dtype:
+    dtype = np.dtype(dtype)
+    assert dtype in AUDIO_DTYPES, f"Unsupported audio dtype: {dtype} (supported: {[d.name for d in AUDIO_DTYPES]})."
+    return dtype
+
+
+def convert_audio_dtype(samples: np.ndarray, dtype: AudioDtype) -> np.ndarray:
+    """
+    Convert the audio samples between float32 (in the range [-1.0, 1.0]) and int16,
+    using the same scaling as soundfile (i.e. ``int16 = float32 * 32768``, clipped to the int16 range).
+    Other integer PCM inputs (e.g. int8, int32 or unsigned 8-bit) are rescaled by the range of their dtype.
+    The input is returned as-is (without a copy) when it already has the requested dtype.
+    """
+    dtype = _check_audio_dtype(dtype)
+    if samples.dtype == dtype:
+        return samples
+    if np.issubdtype(samples.dtype, np.integer) and samples.dtype != np.int16:
+        samples = _integer_pcm_to_float32(samples)
+        if dtype == np.float32:
+            return samples
+    if dtype == np.int16:
+        scaled = np.multiply(samples, INT16MAX, dtype=np.float32)
+        np.rint(scaled, out=scaled)
+        np.clip(scaled, -INT16MAX, INT16MAX - 1, out=scaled)
+        return scaled.astype(np.int16)
+    if samples.dtype == np.int16:
+        out = samples.astype(np.float32)
+        out *= 1.0 / INT16MAX
+        return out
+    return samples.astype(np.float32)
+
+
+def _integer_pcm_to_float32(samples: np.ndarray) -> np.ndarray:
+    info = np.iinfo(samples.dtype)
+    # Unsigned PCM (e.g. 8-bit WAV) is offset by half of its range.
+    half_range = (int(info.max) + 1) // 2 if info.min == 0 else -int(info.min)
+    out = samples.astype(np.float64 if info.bits > 16 else np.float32)
+    if info.min == 0:
+        out -= half_range
+    out /= half_range
+    return out.astype(np.float32, copy=False)
 
 
 class LibsndfileCompatibleAudioInfo(NamedTuple):
@@ -849,6 +1384,184 @@ class LibsndfileCompatibleAudioInfo(NamedTuple):
     duration: float
 
 
+def read_audio_info(
+        path: Pathlike,
+        force_opus_sampling_rate: Optional[int] = None,
+        use_cache: bool = True,
+) -> LibsndfileCompatibleAudioInfo:
+    """
+    Read the metadata of the audio file at ``path`` (as in :meth:`Recording.from_file`).
+    When ``use_cache`` is true and the audio metadata cache is enabled (see :func:`set_audio_metadata_cache`),
+    the cached metadata is returned if the file did not change, and the metadata read from the file is cached.
+    """
+    cache = get_audio_metadata_cache() if use_cache else None
+    if cache is not None:
+        stat = os.stat(path)
+        info = cache.get(path, stat=stat, force_opus_sampling_rate=force_opus_sampling_rate)
+        if info is None:
+            info = read_audio_info(path, force_opus_sampling_rate=force_opus_sampling_rate, use_cache=False)
+            cache.put(path, info, stat=stat, force_opus_sampling_rate=force_opus_sampling_rate)
+        return info
+    path = Path(path)
+    if path.suffix.lower() == '.opus':
+        # We handle OPUS as a special case because we might need to force a certain sampling rate.
+        return opus_info(path, force_opus_sampling_rate=force_opus_sampling_rate)
+    elif path.suffix.lower() == '.sph':
+        # We handle SPHERE as another special case because some old codecs (i.e. "shorten" codec)
+        # can't be handled by neither pysoundfile nor pyaudioread.
+        return sph_info(path)
+    try:
+        # Try to parse the file using pysoundfile first.
+        import soundfile as sf
+        info = sf.info(str(path))
+    except:
+        # Try to parse the file using audioread as a fallback.
+        # If both fail, then Python 3 will display both exception messages.
+        return audioread_info(str(path))
+    return LibsndfileCompatibleAudioInfo(
+        channels=info.channels, frames=info.frames, samplerate=info.samplerate, duration=info.duration
+    )
+
+
+# How many audio files are read between the writes of their metadata to the audio metadata cache.
+AUDIO_METADATA_CACHE_WRITE_INTERVAL = 1000
+# How many recordings are written by ``RecordingSet.from_dir`` between the flushes of the output manifest.
+RECORDING_WRITER_FLUSH_INTERVAL = 1000
+
+
+def scan_audio_info(
+        paths: Iterable[Pathlike],
+        num_jobs: int = 1,
+        force_opus_sampling_rate: Optional[int] = None,
+        chunk_size: int = 256,
+) -> Iterable[Tuple[Path, LibsndfileCompatibleAudioInfo]]:
+    """
+    Read the metadata of many audio files, yielding ``(path, info)`` tuples in the order of ``paths``.
+
+    When the audio metadata cache is enabled (see :func:`set_audio_metadata_cache`), the files are looked up
+    in the cache first (which requires only a ``stat`` call), and only the remaining ones are read
+    (by ``num_jobs`` processes when ``num_jobs > 1``, in tasks of ``chunk_size`` files).
+    Their metadata is written to the cache as the scan goes,
+    so that an interrupted scan doesn't have to read them again.
+    """
+    cache = get_audio_metadata_cache()
+    executor = ProcessPoolExecutor(num_jobs) if num_jobs > 1 else None
+    max_pending = 2 * num_jobs * chunk_size
+    # The entries are lists of [path, stat, info, whether it needs to be cached, future, index in the chunk];
+    # the future is set for the entries read in the worker processes, until they are resolved.
+    pending = deque()
+    chunk = []
+    to_cache = []
+
+    def submit_chunk() -> None:
+        future = executor.submit(_read_audio_info_chunk, [entry[0] for entry in chunk], force_opus_sampling_rate)
+        for idx, entry in enumerate(chunk):
+            entry[4], entry[5] = future, idx
+        chunk.clear()
+
+    def resolve_first() -> Tuple[Path, LibsndfileCompatibleAudioInfo]:
+        if pending[0][2] is None and pending[0][4] is None:
+            # The first entry is in the chunk that was not submitted yet.
+            submit_chunk()
+        audio_path, stat, info, missed, future, idx = pending.popleft()
+        if future is not None:
+            info = future.result()[idx]
+        if missed and cache is not None:
+            to_cache.append((audio_path, info, stat))
+            if len(to_cache) >= AUDIO_METADATA_CACHE_WRITE_INTERVAL:
+                cache.put_many(to_cache, force_opus_sampling_rate=force_opus_sampling_rate)
+                to_cache.clear()
+        return audio_path, info
+
+    def is_resolved(entry) -> bool:
+        return entry[2] is not None or (entry[4] is not None and entry[4].done())
+
+    try:
+        for audio_path in paths:
+            audio_path = Path(audio_path)
+            stat, info = None, None
+            if cache is not None:
+                stat = os.stat(audio_path)
+                info = cache.get(audio_path, stat=stat, force_opus_sampling_rate=force_opus_sampling_rate)
+            missed = info is None
+            entry = [audio_path, stat, info, missed, None, None]
+            if missed:
+                if executor is None:
+                    entry[2] = read_audio_info(
+                        audio_path, force_opus_sampling_rate=force_opus_sampling_rate, use_cache=False
+                    )
+                else:
+                    chunk.append(entry)
+                    if len(chunk) >= chunk_size:
+                        submit_chunk()
+            pending.append(entry)
+            while pending and (len(pending) > max_pending or is_resolved(pending[0])):
+                yield resolve_first()
+        if chunk:
+            submit_chunk()
+        while pending:
+            yield resolve_first()
+    finally:
+        if cache is not None and to_cache:
+            cache.put_many(to_cache, force_opus_sampling_rate=force_opus_sampling_rate)
+        if executor is not None:
+            executor.shutdown()
+
+
+def _read_audio_info_chunk(
+        paths: List[Path],
+        force_opus_sampling_rate: Optional[int] = None
+) -> List[LibsndfileCompatibleAudioInfo]:
+    return [
+        read_audio_info(path, force_opus_sampling_rate=force_opus_sampling_rate, use_cache=False)
+        for path in paths
+    ]
+
+
+def walk_files(root: Pathlike, pattern: str, num_jobs: int = 1) -> Iterable[Path]:
+    """
+    Recursively find the files whose names match ``pattern`` (e.g. ``*.wav``) in the directory ``root``,
+    like ``Path(root).rglob(pattern)``. The directories are listed in a breadth-first order,
+    up to ``num_jobs`` of them at once (in threads, and at most ``2 * num_jobs`` ahead of the consumer),
+    and the files are yielded as soon as their directory is listed. The order of the files is deterministic.
+    Patterns containing path separators are handled with ``Path.rglob``.
+    """
+    if '/' in pattern or os.sep in pattern:
+        yield from Path(root).rglob(pattern)
+        return
+
+    def list_dir(directory: str) -> Tuple[List[Path], List[str]]:
+        files, subdirs = [], []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                # Like Path.rglob, don't descend into symlinked directories (they might form loops).
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif fnmatch.fnmatchcase(entry.name, pattern):
+                    files.append(Path(entry.path))
+        return sorted(files), sorted(subdirs)
+
+    if num_jobs <= 1:
+        directories = deque([str(root)])
+        while directories:
+            files, subdirs = list_dir(directories.popleft())
+            directories.extend(subdirs)
+            yield from files
+        return
+
+    # Like in ``map_read_ahead``, at most ``2 * num_jobs`` directories are listed ahead of the consumer;
+    # the other directories that are found wait in ``directories``.
+    with ThreadPoolExecutor(num_jobs) as executor:
+        directories = deque([str(root)])
+        listings = deque()
+        while directories or listings:
+            while directories and len(listings) < 2 * num_jobs:
+                listings.append(executor.submit(list_dir, directories.popleft()))
+            files, subdirs = listings.popleft().result()
+            directories.extend(subdirs)
+            yield from files
+
+
 def audioread_info(path: Pathlike) -> LibsndfileCompatibleAudioInfo:
     """
     Return an audio info data structure that's a compatible subset of ``pysoundfile.info()``
@@ -1029,19 +1742,129 @@ def assert_and_maybe_fix_num_samples(
                          f"following: diff={diff}, audio.shape={audio.shape}, recording={recording}")
 
 
+@dataclass
+class DecoderStats:
+    """Throughput statistics of an audio decoder (see :func:`get_decoder_stats`)."""
+    calls: int = 0
+    decoded_seconds: Seconds = 0.0
+    wall_seconds: Seconds = 0.0
+
+    @property
+    def realtime_factor(self) -> float:
+        """How many seconds of audio were decoded per one second of wall time."""
+        return self.decoded_seconds / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+
+_DECODER_STATS: Dict[str, DecoderStats] = defaultdict(DecoderStats)
+
+
+def get_decoder_stats() -> Dict[str, DecoderStats]:
+    """
+    Return the throughput statistics of the audio decoders and header parsers used in this process,
+    e.g. ``{'ffmpeg': DecoderStats(calls=10, decoded_seconds=600.0, wall_seconds=2.5), 'opus_header': ...}``.
+    """
+    return dict(_DECODER_STATS)
+
+
+def reset_decoder_stats() -> None:
+    _DECODER_STATS.clear()
+
+
+@contextmanager
+def _track_decoder(name: str):
+    """Collects the number of calls and the wall time; the caller adds the decoded duration to the stats."""
+    stats = _DECODER_STATS[name]
+    start = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        stats.calls += 1
+        stats.wall_seconds += time.perf_counter() - start
+
+
 def opus_info(
         path: Pathlike,
         force_opus_sampling_rate: Optional[int] = None
 ) -> LibsndfileCompatibleAudioInfo:
-    samples, sampling_rate = read_opus(path, force_opus_sampling_rate=force_opus_sampling_rate)
+    """
+    Return the audio info of an OPUS file. It is read from the Ogg container headers when possible
+    (without decoding the audio), and otherwise by decoding the whole file with ffmpeg.
+    """
+    try:
+        with _track_decoder('opus_header'):
+            channels, num_samples = _read_opus_header_info(path)
+    except Exception:
+        samples, sampling_rate = read_opus(path, force_opus_sampling_rate=force_opus_sampling_rate)
+        return LibsndfileCompatibleAudioInfo(
+            channels=samples.shape[0],
+            frames=samples.shape[1],
+            samplerate=sampling_rate,
+            duration=samples.shape[1] / sampling_rate
+        )
+    sampling_rate = 48000
+    if force_opus_sampling_rate is not None:
+        # ffmpeg's resampler outputs a partial sample at the end of the signal, if there is one.
+        num_samples = int(ceil(num_samples * force_opus_sampling_rate / sampling_rate))
+        sampling_rate = force_opus_sampling_rate
     return LibsndfileCompatibleAudioInfo(
-        channels=samples.shape[0],
-        frames=samples.shape[1],
+        channels=channels,
+        frames=num_samples,
         samplerate=sampling_rate,
-        duration=samples.shape[1] / sampling_rate
+        duration=num_samples / sampling_rate
     )
 
 
+def _read_opus_header_info(path: Pathlike) -> Tuple[int, int]:
+    """
+    Read the number of channels and the number of samples (at 48kHz) of an Ogg OPUS file from its headers.
+    The channels and the pre-skip are read from the "OpusHead" packet in the first Ogg page,
+    and the number of samples is the granule position of the last Ogg page minus the pre-skip.
+    """
+    with open(path, 'rb') as f:
+        first_page = f.read(4096)
+        head_pos = first_page.find(b'OpusHead')
+        if not first_page.startswith(b'OggS') or head_pos < 0:
+            raise ValueError(f'Not an Ogg OPUS file: {path}')
+        channels = first_page[head_pos + 9]
+        pre_skip, = struct.unpack('<H', first_page[head_pos + 10:head_pos + 12])
+        serial = first_page[14:18]
+        # Find the last Ogg page in the file and read its granule position.
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        tail_size = min(size, 65536)
+        f.seek(size - tail_size)
+        tail = f.read()
+    # The capture pattern may also occur inside the audio payload, so we keep searching backwards
+    # until we find a well-formed page of the same logical stream.
+    page_pos = tail.rfind(b'OggS')
+    while page_pos >= 0:
+        if _is_ogg_page(tail, page_pos, serial):
+            granule, = struct.unpack('<q', tail[page_pos + 6:page_pos + 14])
+            if granule >= 0:
+                return channels, granule - pre_skip
+        page_pos = tail.rfind(b'OggS', 0, page_pos)
+    raise ValueError(f'Could not find the final granule position in OPUS file: {path}')
+
+
+def _is_ogg_page(data: bytes, pos: int, serial: bytes) -> bool:
+    """
+    Check that ``data[pos:]`` starts with a valid Ogg page header of the stream ``serial``:
+    stream structure version 0, only the known header type flags set, a segment table that fits in ``data``,
+    and a page that ends either at the end of ``data`` or right before the next page.
+    """
+    header_end = pos + 27
+    if header_end > len(data):
+        return False
+    version, header_type = data[pos + 4], data[pos + 5]
+    if version != 0 or header_type & ~0x07 or data[pos + 14:pos + 18] != serial:
+        return False
+    num_segments = data[pos + 26]
+    if header_end + num_segments > len(data):
+        return False
+    page_end = header_end + num_segments + sum(data[header_end:header_end + num_segments])
+    return page_end == len(data) or data[page_end:page_end + 4] == b'OggS'
+
+
 def read_opus(
         path: Pathlike,
         offset: Seconds = 0.0,
@@ -1049,32 +1872,34 @@ def read_opus(
         force_opus_sampling_rate: Optional[int] = None
 ) -> Tuple[np.ndarray, int]:
     """
-    Reads OPUS files using ffmpeg in a shell subprocess.
+    Reads OPUS files using ffmpeg in a subprocess.
     Unlike audioread, correctly supports offsets and durations for reading short chunks.
     Optionally, we can force ffmpeg to resample to the true sampling rate (if we know it up-front).
 
     :return: a tuple of audio samples and the sampling rate.
     """
     # Construct the ffmpeg command depending on the arguments passed.
-    cmd = f'ffmpeg'
+    # We run it directly rather than through a shell, which saves spawning an extra process.
+    cmd = ['ffmpeg']
     sampling_rate = 48000
     # Note: we have to add offset and duration options (-ss and -t) BEFORE specifying the input
     #       (-i), otherwise ffmpeg will decode everything and trim afterwards...
     if offset > 0:
-        cmd += f' -ss {offset}'
+        cmd += ['-ss', str(offset)]
     if duration is not None:
-        cmd += f' -t {duration}'
+        cmd += ['-t', str(duration)]
     # Add the input specifier after offset and duration.
-    cmd += f' -i {path}'
+    cmd += ['-i', str(path)]
     # Optionally resample the output.
     if force_opus_sampling_rate is not None:
-        cmd += f' -ar {force_opus_sampling_rate}'
+        cmd += ['-ar', str(force_opus_sampling_rate)]
         sampling_rate = force_opus_sampling_rate
     # Read audio samples directly as float32.
-    cmd += ' -f f32le pipe:1'
+    cmd += ['-f', 'f32le', 'pipe:1']
     # Actual audio reading.
-    proc = run(cmd, shell=True, stdout=PIPE, stderr=PIPE)
-    raw_audio = proc.stdout
+    with _track_decoder('ffmpeg'):
+        proc = run(cmd, stdout=PIPE, stderr=PIPE)
+        raw_audio = proc.stdout
     audio = np.frombuffer(raw_audio, dtype=np.float32)
     # Determine if the recording is mono or stereo and decode accordingly.
     channel_string = parse_channel_from_ffmpeg_output(proc.stderr)
@@ -1087,6 +1912,7 @@ def read_opus(
         audio = audio.reshape(1, -1)
     else:
         raise NotImplementedError(f'Unknown channel description from ffmpeg: {channel_string}')
+    _DECODER_STATS['ffmpeg'].decoded_seconds += audio.shape[1] / sampling_rate
     return audio, sampling_rate
 
 
@@ -1115,43 +1941,174 @@ def parse_channel_from_ffmpeg_output(ffmpeg_stderr: bytes) -> str:
 
 
 def sph_info(path: Pathlike) -> LibsndfileCompatibleAudioInfo:
-    samples, sampling_rate = read_sph(path)
+    """
+    Return the audio info of a SPHERE file. It is read from the NIST header when possible
+    (without decoding the audio), and otherwise by decoding the whole file with sph2pipe.
+    """
+    try:
+        with _track_decoder('sph_header'):
+            header = read_sph_header(path)
+            channels = int(header['channel_count'])
+            num_samples = int(header['sample_count'])
+            sampling_rate = int(header['sample_rate'])
+    except Exception:
+        samples, sampling_rate = read_sph(path)
+        channels, num_samples = samples.shape
     return LibsndfileCompatibleAudioInfo(
-        channels=samples.shape[0],
-        frames=samples.shape[1],
+        channels=channels,
+        frames=num_samples,
         samplerate=sampling_rate,
-        duration=samples.shape[1] / sampling_rate
+        duration=num_samples / sampling_rate
     )
 
 
+def read_sph_header(path: Pathlike) -> Dict[str, Union[int, float, str]]:
+    """
+    Parse the NIST SPHERE header of a ``.sph`` file, e.g.:
+    ``{'sample_count': 8000, 'channel_count': 2, 'sample_rate': 8000, 'sample_coding': 'pcm', ...}``.
+    The special key ``'header_size'`` holds the size of the header in bytes.
+    """
+    with open(path, 'rb') as f:
+        if f.readline().strip() != b'NIST_1A':
+            raise ValueError(f'Not a NIST SPHERE file: {path}')
+        header_size = int(f.readline().strip())
+        lines = f.read(header_size - f.tell()).decode('latin-1').splitlines()
+    header = {'header_size': header_size}
+    for line in lines:
+        fields = line.strip().split(maxsplit=2)
+        if not fields or fields[0] == 'end_head':
+            break
+        if len(fields) < 3:
+            continue
+        key, kind, value = fields
+        if kind == '-i':
+            header[key] = int(value)
+        elif kind == '-r':
+            header[key] = float(value)
+        else:
+            header[key] = value
+    return header
+
+
 def read_sph(
         sph_path: Pathlike,
         offset: Seconds = 0.0,
         duration: Optional[Seconds] = None
 ) -> Tuple[np.ndarray, int]:
     """
-    Reads SPH files using sph2pipe in a shell subprocess.
+    Reads SPH files. Uncompressed PCM, u-law and a-law files are read natively: we parse the header,
+    seek to the requested offset and decode only the requested samples.
+    Shorten-compressed files (e.g. some of LDC's Switchboard releases) are decoded with sph2pipe in a subprocess.
     Unlike audioread, correctly supports offsets and durations for reading short chunks.
 
     :return: a tuple of audio samples and the sampling rate.
     """
+    try:
+        header = read_sph_header(sph_path)
+    except ValueError:
+        header = None
+    if header is not None and _is_natively_readable_sph(header):
+        return _read_sph_native(sph_path, header=header, offset=offset, duration=duration)
+    return _read_sph_sph2pipe(sph_path, offset=offset, duration=duration)
+
+
+def _is_natively_readable_sph(header: Dict[str, Any]) -> bool:
+    coding = str(header.get('sample_coding', 'pcm')).lower()
+    return coding in ('pcm', 'ulaw', 'mu-law', 'alaw') and all(
+        key in header for key in ('sample_count', 'sample_rate', 'channel_count')
+    )
+
 
+def _read_sph_native(
+        sph_path: Pathlike,
+        header: Dict[str, Any],
+        offset: Seconds = 0.0,
+        duration: Optional[Seconds] = None
+) -> Tuple[np.ndarray, int]:
+    sampling_rate = int(header['sample_rate'])
+    num_channels = int(header['channel_count'])
+    total_samples = int(header['sample_count'])
+    coding = str(header.get('sample_coding', 'pcm')).lower()
+    sample_width = int(header.get('sample_n_bytes', 2 if coding == 'pcm' else 1))
+
+    start = min(compute_num_samples(offset, sampling_rate), total_samples)
+    end = total_samples
+    if duration is not None:
+        end = min(start + compute_num_samples(duration, sampling_rate), total_samples)
+
+    with _track_decoder('sph_native') as stats:
+        with open(sph_path, 'rb') as f:
+            frame_size = num_channels * sample_width
+            f.seek(header['header_size'] + start * frame_size)
+            data = f.read((end - start) * frame_size)
+        data = data[:len(data) - len(data) % frame_size]
+
+        if coding == 'pcm':
+            if sample_width != 2:
+                raise NotImplementedError(f'Unsupported SPHERE PCM sample width: {sample_width} bytes ({sph_path})')
+            byte_order = '>' if str(header.get('sample_byte_format', '01')) == '10' else '<'
+            audio = np.frombuffer(data, dtype=f'{byte_order}i2').astype(np.float32) / 32768.0
+        elif coding == 'alaw':
+            audio = _ALAW_TO_FLOAT[np.frombuffer(data, dtype=np.uint8)]
+        else:
+            audio = _ULAW_TO_FLOAT[np.frombuffer(data, dtype=np.uint8)]
+        # De-interleave the channels.
+        audio = audio.reshape(-1, num_channels).T
+        stats.decoded_seconds += audio.shape[1] / sampling_rate
+
+    return audio, sampling_rate
+
+
+def _ulaw_to_float_table() -> np.ndarray:
+    """G.711 u-law to linear PCM conversion table (same as in sph2pipe), scaled to [-1, 1]."""
+    u = ~np.arange(256, dtype=np.uint8)
+    exponent = (u >> 4) & 0x07
+    mantissa = (u & 0x0F).astype(np.int32)
+    magnitude = (((mantissa << 3) + 0x84) << exponent) - 0x84
+    linear = np.where(u & 0x80, -magnitude, magnitude)
+    return (linear / 32768.0).astype(np.float32)
+
+
+def _alaw_to_float_table() -> np.ndarray:
+    """G.711 a-law to linear PCM conversion table, scaled to [-1, 1]."""
+    a = np.arange(256, dtype=np.uint8) ^ 0x55
+    exponent = ((a >> 4) & 0x07).astype(np.int32)
+    mantissa = (a & 0x0F).astype(np.int32)
+    magnitude = np.where(
+        exponent == 0,
+        (mantissa << 4) + 8,
+        ((mantissa << 4) + 0x108) << np.maximum(exponent - 1, 0)
+    )
+    linear = np.where(a & 0x80, magnitude, -magnitude)
+    return (linear / 32768.0).astype(np.float32)
+
+
+_ULAW_TO_FLOAT = _ulaw_to_float_table()
+_ALAW_TO_FLOAT = _alaw_to_float_table()
+
+
+def _read_sph_sph2pipe(
+        sph_path: Pathlike,
+        offset: Seconds = 0.0,
+        duration: Optional[Seconds] = None
+) -> Tuple[np.ndarray, int]:
     sph_path = Path(sph_path)
 
     # Construct the sph2pipe command depending on the arguments passed.
-    cmd = f'sph2pipe -f wav -p -t {offset}:'
-
+    # We run it directly rather than through a shell, which saves spawning an extra process.
+    time_range = f'{offset}:'
     if duration is not None:
-        cmd += f'{round(offset + duration, 5)}'
-    # Add the input specifier after offset and duration.
-    cmd += f' {sph_path}'
+        time_range += f'{round(offset + duration, 5)}'
+    cmd = ['sph2pipe', '-f', 'wav', '-p', '-t', time_range, str(sph_path)]
 
     # Actual audio reading.
-    proc = BytesIO(run(cmd, shell=True, check=True, stdout=PIPE, stderr=PIPE).stdout)
+    with _track_decoder('sph2pipe') as stats:
+        proc = BytesIO(run(cmd, check=True, stdout=PIPE, stderr=PIPE).stdout)
 
-    import soundfile as sf
-    with sf.SoundFile(proc) as sf_desc:
-        audio, sampling_rate = sf_desc.read(dtype=np.float32), sf_desc.samplerate
-        audio = audio.reshape(1, -1) if sf_desc.channels == 1 else audio.T
+        import soundfile as sf
+        with sf.SoundFile(proc) as sf_desc:
+            audio, sampling_rate = sf_desc.read(dtype=np.float32), sf_desc.samplerate
+            audio = audio.reshape(1, -1) if sf_desc.channels == 1 else audio.T
+        stats.decoded_seconds += audio.shape[1] / sampling_rate
 
     return audio, sampling_rate
@@ -1,2 +1,4 @@
 from .common import AugmentFn
+from .resample import (get_resampling_backend, resample_polyphase, resample_polyphase_batch, set_resampling_backend,
+                       speed_perturb_batch)
 from .torchaudio import *
@@ -0,0 +1,152 @@
+"""
+Rational resampling of audio with windowed-sinc polyphase filters, used by the ``Speed`` and ``Resample``
+transforms instead of running a SoX effect chain for each cut.
+
+Resampling by a rational ratio ``new / orig`` (reduced to the lowest terms) is a strided 1D convolution
+with ``new`` filters (one per output phase), which only depend on ``orig`` and ``new``:
+they are computed once per ratio and cached.
+Both speed perturbation (the ratio is ``1 / factor``) and changing the sampling rate
+(the ratio is ``target / source``) are such resamplings, so a chain of them can be applied at once
+with the product of their ratios.
+
+Ratios with large terms (e.g. ``Speed(factor=1.0537)``) would require huge filter banks;
+they are delegated to SoX (see :func:`is_polyphase_resampling_supported`).
+"""
+import math
+from fractions import Fraction
+from functools import lru_cache
+from typing import List, Sequence, Tuple, Union
+
+import numpy as np
+import torch
+
+# The number of zero-crossings of the sinc filter on each side, and its cutoff relative to the Nyquist frequency
+# of the lower sampling rate (the same defaults as ``torchaudio.functional.resample``).
+LOWPASS_FILTER_WIDTH = 6
+ROLLOFF = 0.99
+# The resampling ratios whose filter bank would have more elements than this are delegated to SoX.
+MAX_KERNEL_ELEMENTS = 2 ** 22
+
+RESAMPLING_BACKENDS = ('polyphase', 'sox')
+_RESAMPLING_BACKEND = 'polyphase'
+
+
+def set_resampling_backend(name: str) -> None:
+    """
+    Choose how the ``Speed`` and ``Resample`` transforms resample the audio:
+    with the cached polyphase filters (``'polyphase'``, the default), or with SoX (``'sox'``),
+    as in the earlier versions of Lhotse.
+    """
+    assert name in RESAMPLING_BACKENDS, f"Unknown resampling backend: '{name}' (supported: {RESAMPLING_BACKENDS})"
+    global _RESAMPLING_BACKEND
+    _RESAMPLING_BACKEND = name
+
+
+def get_resampling_backend() -> str:
+    return _RESAMPLING_BACKEND
+
+
+def _kernel_width(orig: int, new: int) -> int:
+    return math.ceil(LOWPASS_FILTER_WIDTH * orig / (min(orig, new) * ROLLOFF))
+
+
+def is_polyphase_resampling_supported(ratio: Fraction) -> bool:
+    """Check if the filter bank for resampling by ``ratio`` (output rate / input rate) is small enough."""
+    orig, new = ratio.denominator, ratio.numerator
+    return new * (2 * _kernel_width(orig, new) + orig) <= MAX_KERNEL_ELEMENTS
+
+
+@lru_cache(maxsize=64)
+def get_resampling_kernel(orig: int, new: int) -> Tuple[torch.Tensor, int]:
+    """
+    Return the polyphase filter bank for resampling from ``orig`` to ``new`` sampling rate
+    (relatively prime integers), with a shape of ``(new, 1, 2 * width + orig)``, and the ``width``
+    of the filters' support on each side (in input samples). The results are cached.
+    """
+    base_freq = min(orig, new) * ROLLOFF
+    width = _kernel_width(orig, new)
+    idx = torch.arange(-width, width + orig, dtype=torch.float64)[None, None] / orig
+    t = torch.arange(0, -new, -1, dtype=torch.float64)[:, None, None] / new + idx
+    t *= base_freq
+    t.clamp_(-LOWPASS_FILTER_WIDTH, LOWPASS_FILTER_WIDTH)
+    # Hann window over the filter support.
+    window = torch.cos(t * math.pi / LOWPASS_FILTER_WIDTH / 2) ** 2
+    t *= math.pi
+    kernels = torch.where(t == 0, torch.ones_like(t), torch.sin(t) / t)
+    kernels *= window * (base_freq / orig)
+    return kernels.to(torch.float32), width
+
+
+def num_resampled_samples(num_samples: int, ratio: Fraction) -> int:
+    """The number of samples after resampling ``num_samples`` samples by ``ratio`` (rounded half up)."""
+    return (2 * num_samples * ratio.numerator + ratio.denominator) // (2 * ratio.denominator)
+
+
+def resample_polyphase(samples: Union[np.ndarray, torch.Tensor], ratio: Union[Fraction, int, float]) -> np.ndarray:
+    """
+    Resample the audio by ``ratio`` (output sampling rate / input sampling rate), e.g. ``Fraction(22050, 16000)``.
+
+    :param samples: a 1D array, or a 2D array with shape ``(num_channels, num_samples)``.
+    :return: a float32 numpy array with the same number of dimensions.
+    """
+    return resample_polyphase_batch([samples], ratio)[0]
+
+
+def resample_polyphase_batch(
+        samples: Sequence[Union[np.ndarray, torch.Tensor]],
+        ratio: Union[Fraction, int, float],
+) -> List[np.ndarray]:
+    """
+    Resample a batch of recordings (possibly of different lengths and numbers of channels) by the same ``ratio``
+    with a single convolution. The results are the same as calling :func:`resample_polyphase` on each of them.
+    """
+    ratio = Fraction(ratio)
+    arrays = [s.numpy() if isinstance(s, torch.Tensor) else np.asarray(s) for s in samples]
+    if ratio == 1:
+        return [a.astype(np.float32, copy=False) for a in arrays]
+    orig, new = ratio.denominator, ratio.numerator
+    kernel, width = get_resampling_kernel(orig, new)
+    arrays_2d = [np.atleast_2d(a) for a in arrays]
+    max_len = max(a.shape[1] for a in arrays_2d)
+    # Zero padding: ``width`` samples on the left, and enough on the right to compute the last output samples.
+    batch = torch.zeros(sum(a.shape[0] for a in arrays_2d), 1, width + max_len + width + orig)
+    row = 0
+    for a in arrays_2d:
+        batch[row: row + a.shape[0], 0, width: width + a.shape[1]] = torch.from_numpy(a)
+        row += a.shape[0]
+    with torch.no_grad():
+        # Shape: (num_rows, new, num_output_frames) -> (num_rows, num_output_frames * new)
+        resampled = torch.nn.functional.conv1d(batch, kernel, stride=orig)
+    resampled = resampled.transpose(1, 2).reshape(batch.shape[0], -1).numpy()
+    results = []
+    row = 0
+    for a, a_2d in zip(arrays, arrays_2d):
+        out = np.ascontiguousarray(resampled[row: row + a_2d.shape[0], :num_resampled_samples(a_2d.shape[1], ratio)])
+        row += a_2d.shape[0]
+        results.append(out if a.ndim > 1 else out[0])
+    return results
+
+
+def speed_perturb_batch(
+        samples: Sequence[Union[np.ndarray, torch.Tensor]],
+        factors: Sequence[float],
+) -> List[np.ndarray]:
+    """
+    Apply speed perturbation (see :class:`lhotse.augmentation.Speed`) with the corresponding ``factors``
+    to a batch of recordings. The recordings with the same factor are resampled together
+    with :func:`resample_polyphase_batch`.
+    """
+    assert len(samples) == len(factors)
+    results = [None] * len(samples)
+    for factor in set(factors):
+        indices = [idx for idx, f in enumerate(factors) if f == factor]
+        ratio = 1 / Fraction(str(factor))
+        if is_polyphase_resampling_supported(ratio):
+            resampled = resample_polyphase_batch([samples[idx] for idx in indices], ratio)
+        else:
+            from lhotse.augmentation.torchaudio import Speed
+            # The sampling rate doesn't matter for speed perturbation.
+            resampled = [Speed(factor=factor)(samples[idx], 16000) for idx in indices]
+        for idx, audio in zip(indices, resampled):
+            results[idx] = audio
+    return results
@@ -1,13 +1,16 @@
 import warnings
 from dataclasses import asdict, dataclass
 from decimal import ROUND_HALF_UP
-from typing import List, Optional, Tuple, Union
+from fractions import Fraction
+from typing import Callable, List, Optional, Tuple, Union
 
 import numpy as np
 import torch
 import torchaudio
 from packaging.version import parse as _version
 
+from lhotse.augmentation.resample import get_resampling_backend, is_polyphase_resampling_supported, \
+    resample_polyphase
 from lhotse.utils import Seconds, compute_num_samples, during_docs_build, perturb_num_samples
 
 if not during_docs_build() and _version(torchaudio.__version__) < _version('0.7'):
@@ -167,10 +170,19 @@ class Speed(AudioTransform):
 
     It resamples the signal back to the input sampling rate, so the number of output samples will
     be smaller or greater, depending on the speed factor.
+    Unless the SoX backend is selected with :func:`~lhotse.augmentation.set_resampling_backend`,
+    it is implemented with the cached polyphase filters from :mod:`lhotse.augmentation.resample`.
     """
     factor: float
 
+    @property
+    def resampling_ratio(self) -> Fraction:
+        """The ratio of the number of output samples to the number of input samples."""
+        return 1 / Fraction(str(self.factor))
+
     def __call__(self, samples: np.ndarray, sampling_rate: int) -> np.ndarray:
+        if _use_polyphase_resampling(self.resampling_ratio):
+            return resample_polyphase(samples, self.resampling_ratio)
         sampling_rate = int(sampling_rate)  # paranoia mode
         effect = [['speed', str(self.factor)], ['rate', str(sampling_rate)]]
         if isinstance(samples, np.ndarray):
@@ -201,6 +213,8 @@ class Speed(AudioTransform):
 class Resample(AudioTransform):
     """
     Resampling effect, the same one as invoked with `sox rate` in the command line.
+    Unless the SoX backend is selected with :func:`~lhotse.augmentation.set_resampling_backend`,
+    it is implemented with the cached polyphase filters from :mod:`lhotse.augmentation.resample`.
     """
     source_sampling_rate: int
     target_sampling_rate: int
@@ -210,7 +224,14 @@ class Resample(AudioTransform):
         self.source_sampling_rate = int(self.source_sampling_rate)
         self.target_sampling_rate = int(self.target_sampling_rate)
 
+    @property
+    def resampling_ratio(self) -> Fraction:
+        """The ratio of the number of output samples to the number of input samples."""
+        return Fraction(self.target_sampling_rate, self.source_sampling_rate)
+
     def __call__(self, samples: np.ndarray, *args, **kwargs) -> np.ndarray:
+        if _use_polyphase_resampling(self.resampling_ratio):
+            return resample_polyphase(samples, self.resampling_ratio)
         effect = [['rate', str(self.target_sampling_rate)]]
         if isinstance(samples, np.ndarray):
             samples = torch.from_numpy(samples)
@@ -245,6 +266,59 @@ class Resample(AudioTransform):
         return old_offset, old_duration
 
 
+class ResamplingChain:
+    """
+    A sequence of consecutive ``Speed`` and ``Resample`` transforms, applied as a single resampling
+    by the product of their ratios (e.g. speed perturbation followed by changing the sampling rate
+    resamples the audio once, rather than twice).
+    It is created by :func:`fuse_resampling_transforms` when the audio is loaded, and it is not serialized.
+    """
+
+    def __init__(self, transforms: List[Union[Speed, Resample]]):
+        self.transforms = transforms
+
+    @property
+    def resampling_ratio(self) -> Fraction:
+        ratio = Fraction(1)
+        for tfn in self.transforms:
+            ratio *= tfn.resampling_ratio
+        return ratio
+
+    def __call__(self, samples: np.ndarray, sampling_rate: int) -> np.ndarray:
+        if _use_polyphase_resampling(self.resampling_ratio):
+            return resample_polyphase(samples, self.resampling_ratio)
+        for tfn in self.transforms:
+            samples = tfn(samples, sampling_rate)
+        return samples
+
+
+def fuse_resampling_transforms(
+        transforms: List[AudioTransform]
+) -> List[Callable[[np.ndarray, int], np.ndarray]]:
+    """
+    Replace the runs of consecutive ``Speed`` and ``Resample`` transforms with a :class:`ResamplingChain`
+    that resamples the audio once. The other transforms are returned unchanged.
+    """
+    fused = []
+    run = []
+    for tfn in transforms + [None]:
+        if isinstance(tfn, (Speed, Resample)):
+            run.append(tfn)
+            continue
+        if len(run) == 1:
+            fused.append(run[0])
+        elif run:
+            fused.append(ResamplingChain(run))
+        run = []
+        if tfn is not None:
+            fused.append(tfn)
+    return fused
+
+
+def _use_polyphase_resampling(ratio: Fraction) -> bool:
+    return get_resampling_backend() == 'polyphase' and is_polyphase_resampling_supported(ratio)
+
+
 def speed(sampling_rate: int) -> List[List[str]]:
     return [
         ['speed', RandomValue(0.9, 1.1)],
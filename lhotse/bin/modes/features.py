@@ -5,10 +5,11 @@ from typing import Optional
 import click
 from tqdm import tqdm
 
-from lhotse import FeatureSet, Features, LilcomURLWriter
+from lhotse import CutSet, FeatureSet, Features, LilcomURLWriter
 from lhotse.audio import RecordingSet
 from lhotse.bin.modes.cli_base import cli
-from lhotse.features import Fbank, FeatureExtractor, FeatureSetBuilder, create_default_feature_extractor
+from lhotse.features import Fbank, FeatureExtractionPipeline, FeatureExtractor, FeatureSetBuilder, \
+    create_default_feature_extractor
 from lhotse.features.base import FEATURE_EXTRACTORS
 from lhotse.features.io import available_storage_backends, get_writer
 from lhotse.utils import Pathlike, fastcopy
@@ -43,6 +44,12 @@ def write_default_config(output_config: Pathlike, feature_type: str):
 @click.option('-r', '--root-dir', type=click.Path(exists=True, file_okay=False), default=None,
               help='Root directory - all paths in the manifest will use this as prefix.')
 @click.option('-j', '--num-jobs', type=int, default=1, help='Number of parallel processes.')
+@click.option('--pipeline/--no-pipeline', default=False,
+              help='Read the audio, compute the features and write them in concurrent stages '
+                   '(NUM_JOBS extractor processes, NUM_READERS reader threads and a single writer thread).')
+@click.option('--num-readers', type=int, default=4, help='Number of audio reading threads (with --pipeline).')
+@click.option('--queue-size', type=int, default=32,
+              help='Max number of items waiting between the pipeline stages (with --pipeline).')
 def extract(
         recording_manifest: Pathlike,
         output_dir: Pathlike,
@@ -50,7 +57,10 @@ def extract(
         storage_type: str,
         lilcom_tick_power: int,
         root_dir: Optional[Pathlike],
-        num_jobs: int
+        num_jobs: int,
+        pipeline: bool,
+        num_readers: int,
+        queue_size: int,
 ):
     """
     Extract features for recordings in a given AUDIO_MANIFEST. The features are stored in OUTPUT_DIR,
@@ -67,6 +77,25 @@ def extract(
     output_dir.mkdir(exist_ok=True, parents=True)
     storage_path = output_dir / 'feats.h5' if 'hdf5' in storage_type else output_dir / 'storage'
 
+    if pipeline:
+        extraction_pipeline = FeatureExtractionPipeline(
+            num_readers=num_readers,
+            num_workers=num_jobs,
+            queue_size=queue_size,
+        )
+        with get_writer(storage_type)(storage_path, tick_power=lilcom_tick_power) as storage:
+            cuts = extraction_pipeline.run(
+                CutSet.from_manifests(recordings=recordings),
+                extractor=feature_extractor,
+                storage=storage,
+                progress_bar=True,
+            )
+        FeatureSet.from_features(
+            fastcopy(cut.features, recording_id=cut.recording_id) for cut in cuts
+        ).to_file(output_dir / 'feature_manifest.json.gz')
+        click.echo(extraction_pipeline.stats)
+        return
+
     with get_writer(storage_type)(storage_path, tick_power=lilcom_tick_power) as storage:
         feature_set_builder = FeatureSetBuilder(
             feature_extractor=feature_extractor,
@@ -124,3 +153,56 @@ def _upload_one(item: Features, url: str) -> Features:
         storage_key=new_key,
         storage_type=feats_writer.name
     )
+
+
+@feat.command(context_settings=dict(show_default=True))
+@click.argument('cuts_manifest', type=click.Path(exists=True, dir_okay=False))
+@click.argument('output_cuts', type=click.Path())
+@click.argument('storage_path', type=click.Path())
+@click.option('--storage-type', type=click.Choice(available_storage_backends()),
+              default='chunked_lilcom_hdf5',
+              help='Select a storage backend for the repacked feature matrices.')
+@click.option('-o', '--order', type=click.Path(exists=True, dir_okay=False), default=None,
+              help='A cut manifest, or a text file with one cut ID per line, specifying the order in which '
+                   'the feature matrices are written (e.g. the sampling order). '
+                   'By default, the order of CUTS_MANIFEST is used.')
+@click.option('--sort-by-duration/--no-sort-by-duration', default=False,
+              help='Write the feature matrices in the order of descending cut duration '
+                   '(useful with bucketing samplers). Cannot be used together with --order.')
+@click.option('-t', '--lilcom-tick-power', type=int, default=-5,
+              help='Determines the compression accuracy for lilcom storage backends; '
+                   'the input will be compressed to integer multiples of 2^tick_power')
+@click.option('-j', '--num-jobs', type=int, default=1, help='Number of parallel processes reading the features.')
+def repack(
+        cuts_manifest: Pathlike,
+        output_cuts: Pathlike,
+        storage_path: Pathlike,
+        storage_type: str,
+        order: Optional[Pathlike],
+        sort_by_duration: bool,
+        lilcom_tick_power: int,
+        num_jobs: int,
+):
+    """
+    Copy the feature matrices of the cuts in CUTS_MANIFEST into a new storage at STORAGE_PATH
+    (e.g. to convert many small lilcom files into a single HDF5 file), and save the cuts
+    referring to the new storage to OUTPUT_CUTS.
+    """
+    assert not (order is not None and sort_by_duration), "--order and --sort-by-duration are mutually exclusive."
+    cuts = CutSet.from_file(cuts_manifest)
+    if order is not None:
+        if '.json' in Path(order).suffixes or '.jsonl' in Path(order).suffixes:
+            order = CutSet.from_file(order)
+        else:
+            order = Path(order).read_text().split()
+    elif sort_by_duration:
+        order = cuts.sort_by_duration()
+    repacked = cuts.repack_features(
+        storage_type=storage_type,
+        storage_path=storage_path,
+        order=order,
+        num_jobs=num_jobs,
+        progress_bar=True,
+        tick_power=lilcom_tick_power,
+    )
+    repacked.to_file(output_cuts)
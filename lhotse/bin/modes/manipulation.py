@@ -21,14 +21,16 @@ __all__ = ['split', 'combine', 'subset', 'filter']
 @cli.command()
 @click.argument('input_manifest', type=click.Path(exists=True, dir_okay=False))
 @click.argument('output_manifest', type=click.Path())
-def copy(input_manifest, output_manifest):
+@click.option('-j', '--num-jobs', type=int, default=1,
+              help='Number of worker processes used to read and write JSONL manifests.')
+def copy(input_manifest, output_manifest, num_jobs: int):
     """
     Load INPUT_MANIFEST and store it to OUTPUT_MANIFEST.
     Useful for conversion between different serialization formats (e.g. JSON, JSONL, YAML).
     Automatically supports gzip compression when '.gz' suffix is detected.
     """
-    data = load_manifest(input_manifest)
-    data.to_file(output_manifest)
+    data = load_manifest(input_manifest, num_jobs=num_jobs)
+    data.to_file(output_manifest, num_jobs=num_jobs)
 
 
 @cli.command()
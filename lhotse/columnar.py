@@ -0,0 +1,379 @@
+"""
+Columnar, memory-mapped storage for very large manifests.
+
+A columnar manifest is a directory that keeps the most frequently used scalar attributes
+of manifest items (IDs, start times, durations, channels, etc.) in flat numpy arrays,
+and the full JSON description of each item in a single binary blob indexed by byte offsets.
+All of these are memory-mapped when the manifest is opened, so that opening a manifest
+with tens of millions of items costs almost no RAM and no deserialization time.
+The actual :class:`~lhotse.cut.MonoCut` (or other) objects are only created when an item is accessed.
+
+The directory layout is::
+
+    manifest_dir/
+        meta.json           # format version, manifest type, number of items
+        id.npy              # fixed-width byte strings with item IDs
+        sorted_id.npy       # item IDs sorted lexicographically (for O(log N) lookups)
+        sorted_row.npy      # row index of each item in ``sorted_id.npy``
+        start.npy           # float64, NaN when not applicable
+        duration.npy        # float64, NaN when not applicable
+        channel.npy         # int64, -1 when not applicable
+        num_frames.npy      # int64, -1 when not applicable
+        num_samples.npy     # int64, -1 when not applicable
+        sampling_rate.npy   # int64, -1 when not applicable
+        recording_id.npy    # fixed-width byte strings, empty when not applicable
+        item_type.npy       # fixed-width byte strings with the class names of the items (e.g. MonoCut)
+        features_storage_type.npy, features_storage_path.npy, features_storage_key.npy
+                            # fixed-width byte strings with the feature references of MonoCuts,
+                            # empty when not applicable
+        offsets.npy         # int64 byte offsets into data.bin (N + 1 entries)
+        data.bin            # concatenated JSON of all items
+
+Example:
+
+    >>> cuts = CutSet.from_file('cuts.jsonl.gz')
+    >>> cuts.to_columnar('cuts_columnar')
+    >>> cuts = CutSet.from_columnar('cuts_columnar')
+    >>> long_cuts = cuts.filter(lambda c: c.duration > 10).sort_by_duration()
+
+The supervisions (and any other attributes that are not listed above) are only available
+in the full items, which are deserialized when these attributes are accessed.
+The ``item_type`` and ``features_*`` columns are absent in the manifests written by the earlier versions;
+they are then read from the full items.
+"""
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from lhotse.utils import Pathlike
+
+COLUMNAR_FORMAT_VERSION = 1
+META_FILENAME = 'meta.json'
+
+# Column name -> (numpy dtype, the value used to represent "not available").
+NUMERIC_COLUMNS = {
+    'start': (np.float64, np.nan),
+    'duration': (np.float64, np.nan),
+    'channel': (np.int64, -1),
+    'num_frames': (np.int64, -1),
+    'num_samples': (np.int64, -1),
+    'sampling_rate': (np.int64, -1),
+}
+STRING_COLUMNS = ('id', 'recording_id')
+# The columns that are not exposed as item attributes (and are optional when reading).
+EXTRA_STRING_COLUMNS = ('item_type', 'features_storage_type', 'features_storage_path', 'features_storage_key')
+
+
+def is_columnar_manifest(path: Pathlike) -> bool:
+    """Check whether ``path`` points to a directory with a columnar manifest."""
+    return (Path(path) / META_FILENAME).is_file()
+
+
+def write_columnar(manifest: Iterable[Any], path: Pathlike) -> None:
+    """
+    Store the items of a manifest (e.g. a :class:`~lhotse.cut.CutSet`) in the columnar format.
+    The items are consumed in a single pass, so ``manifest`` can be a lazily opened manifest.
+
+    :param manifest: a ``CutSet``, ``RecordingSet`` or ``SupervisionSet``.
+    :param path: the output directory (it will be created if it does not exist).
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    ids = []
+    recording_ids = []
+    extra = {name: [] for name in EXTRA_STRING_COLUMNS}
+    numeric = {name: [] for name in NUMERIC_COLUMNS}
+    offsets = [0]
+    with open(path / 'data.bin', 'wb') as f:
+        for item in manifest:
+            assert hasattr(item, 'id'), \
+                f"Only manifests whose items have IDs can be stored in columnar format (got: {type(item)})."
+            ids.append(item.id)
+            recording_ids.append(_maybe_get(item, 'recording_id', ''))
+            extra['item_type'].append(type(item).__name__)
+            # Only MonoCuts have a single feature reference (MixedCuts refer to the features of their tracks).
+            features = _maybe_get(item, 'features', None) if type(item).__name__ == 'MonoCut' else None
+            for attr in ('storage_type', 'storage_path', 'storage_key'):
+                extra[f'features_{attr}'].append(getattr(features, attr) if features is not None else '')
+            for name, (dtype, null) in NUMERIC_COLUMNS.items():
+                value = _maybe_get(item, name, null)
+                numeric[name].append(null if not isinstance(value, (int, float)) else value)
+            data = json.dumps(item.to_dict()).encode('utf-8')
+            f.write(data)
+            offsets.append(offsets[-1] + len(data))
+
+    id_column = _encode_strings(ids)
+    np.save(path / 'id.npy', id_column)
+    order = np.argsort(id_column, kind='stable')
+    np.save(path / 'sorted_id.npy', id_column[order])
+    np.save(path / 'sorted_row.npy', order.astype(np.int64))
+    np.save(path / 'recording_id.npy', _encode_strings(recording_ids))
+    for name, values in extra.items():
+        np.save(path / f'{name}.npy', _encode_strings(values))
+    for name, (dtype, null) in NUMERIC_COLUMNS.items():
+        np.save(path / f'{name}.npy', np.asarray(numeric[name], dtype=dtype))
+    np.save(path / 'offsets.npy', np.asarray(offsets, dtype=np.int64))
+    with open(path / META_FILENAME, 'w') as f:
+        json.dump({
+            'version': COLUMNAR_FORMAT_VERSION,
+            'manifest_type': type(manifest).__name__,
+            'num_items': len(ids),
+        }, f, indent=2)
+
+
+class ColumnarManifest:
+    """
+    ColumnarManifest provides dict-like, read-only access to the items of a columnar manifest
+    stored on disk (see :func:`write_columnar`).
+    It is designed to be a partial "drop-in" replacement for ordinary dicts that hold the items of
+    :class:`~lhotse.cut.CutSet`, :class:`~lhotse.audio.RecordingSet` and
+    :class:`~lhotse.supervision.SupervisionSet`, similarly to
+    :class:`~lhotse.serialization.LazyJsonlIterator`, but with random access support.
+
+    It may represent only a selection of the rows stored on disk (e.g. after filtering or sorting);
+    in that case, ``indices`` holds the row numbers in their current order.
+    Selecting rows never modifies or copies the underlying files.
+
+    Only the path and the selection are pickled, so it can be cheaply sent to DataLoader workers.
+    """
+
+    def __init__(self, path: Pathlike, indices: Optional[np.ndarray] = None) -> None:
+        self.path = Path(path)
+        assert is_columnar_manifest(self.path), f"Not a columnar manifest: {self.path}"
+        self.indices = indices
+        self._columns = None
+        self._positions = None
+
+    @property
+    def manifest_type(self) -> str:
+        with open(self.path / META_FILENAME) as f:
+            return json.load(f)['manifest_type']
+
+    def _open(self) -> Dict[str, np.ndarray]:
+        if self._columns is None:
+            columns = {
+                name: np.load(self.path / f'{name}.npy', mmap_mode='r')
+                for name in (*STRING_COLUMNS, *NUMERIC_COLUMNS, 'sorted_id', 'sorted_row', 'offsets')
+            }
+            for name in EXTRA_STRING_COLUMNS:
+                if (self.path / f'{name}.npy').is_file():
+                    columns[name] = np.load(self.path / f'{name}.npy', mmap_mode='r')
+            data_path = self.path / 'data.bin'
+            if data_path.stat().st_size > 0:
+                columns['data'] = np.memmap(data_path, dtype=np.uint8, mode='r')
+            else:
+                columns['data'] = np.empty(0, dtype=np.uint8)
+            self._columns = columns
+        return self._columns
+
+    def __getstate__(self):
+        """
+        Store the state for pickling -- we'll only store the path and the row selection,
+        and re-open the memory-mapped files when they are needed after unpickling.
+        """
+        return {'path': self.path, 'indices': self.indices}
+
+    def __setstate__(self, state: Dict):
+        self.__dict__.update(state)
+        self._columns = None
+        self._positions = None
+
+    @property
+    def num_rows(self) -> int:
+        """The number of rows stored on disk (regardless of the selection)."""
+        return len(self._open()['offsets']) - 1
+
+    @property
+    def rows(self) -> np.ndarray:
+        """The row numbers (on disk) of the items in this manifest, in their iteration order."""
+        if self.indices is None:
+            return np.arange(self.num_rows)
+        return self.indices
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Return the values of column ``name`` for the items in this manifest, in their iteration order.
+        Missing values are represented as ``NaN`` for float columns, ``-1`` for integer columns,
+        and empty strings for string columns.
+        Raises a ``KeyError`` for the optional columns (see :data:`EXTRA_STRING_COLUMNS`)
+        that are absent in the manifests written by the earlier versions.
+        """
+        col = self._open()[name]
+        if self.indices is None:
+            return col
+        return col[self.indices]
+
+    def select(self, indices: Union[np.ndarray, List[int]]) -> 'ColumnarManifest':
+        """
+        Return a new ``ColumnarManifest`` with the items at positions ``indices``
+        (relative to the current iteration order).
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        return ColumnarManifest(self.path, indices=self.rows[indices])
+
+    def positions(self, keys: Iterable[str]) -> np.ndarray:
+        """
+        Return the positions (relative to the current iteration order) of items with IDs ``keys``.
+        Raises a ``KeyError`` when any of them is not present.
+        """
+        return np.asarray([self._position(key) for key in keys], dtype=np.int64)
+
+    def _row(self, key: str) -> int:
+        cols = self._open()
+        sorted_ids = cols['sorted_id']
+        encoded = key.encode('utf-8')
+        idx = int(np.searchsorted(sorted_ids, encoded))
+        if idx >= len(sorted_ids) or sorted_ids[idx] != encoded:
+            raise KeyError(key)
+        return int(cols['sorted_row'][idx])
+
+    def _position(self, key: str) -> int:
+        row = self._row(key)
+        if self.indices is None:
+            return row
+        if self._positions is None:
+            # Lazily build the inverse mapping: row on disk -> position in the selection.
+            positions = np.full(self.num_rows, -1, dtype=np.int64)
+            positions[self.indices] = np.arange(len(self.indices))
+            self._positions = positions
+        pos = int(self._positions[row])
+        if pos < 0:
+            raise KeyError(key)
+        return pos
+
+    def _materialize(self, row: int) -> Any:
+        from lhotse.serialization import deserialize_item
+        cols = self._open()
+        begin, end = cols['offsets'][row], cols['offsets'][row + 1]
+        return deserialize_item(json.loads(cols['data'][begin:end].tobytes()))
+
+    def _row_at(self, position: int) -> int:
+        """Return the row number (on disk) of the item at ``position``, without allocating :attr:`rows`."""
+        if self.indices is not None:
+            return int(self.indices[position])
+        num_rows = self.num_rows
+        if not -num_rows <= position < num_rows:
+            raise IndexError(f'Position {position} is out of range for a manifest with {num_rows} items.')
+        return position % num_rows
+
+    def row_view(self, position: int) -> 'ColumnarRow':
+        """Return a lightweight proxy for the item at ``position`` that reads its columns directly."""
+        return ColumnarRow(self, self._row_at(position))
+
+    def row_views(self) -> Iterator['ColumnarRow']:
+        """Iterate lightweight proxies (see :meth:`row_view`) for all the items, in their iteration order."""
+        return (ColumnarRow(self, int(row)) for row in self.rows)
+
+    def item_at(self, position: int) -> Any:
+        """Return the item at ``position`` (relative to the current iteration order)."""
+        return self._materialize(self._row_at(position))
+
+    def __getitem__(self, key: str) -> Any:
+        return self._materialize(self._row_at(self._position(key)))
+
+    def __contains__(self, key: str) -> bool:
+        try:
+            self._position(key)
+            return True
+        except KeyError:
+            return False
+
+    def __len__(self) -> int:
+        return self.num_rows if self.indices is None else len(self.indices)
+
+    def __iter__(self) -> Iterator[Any]:
+        return self.values()
+
+    def keys(self) -> Iterator[str]:
+        ids = self._open()['id']
+        return (ids[row].decode('utf-8') for row in self.rows)
+
+    def values(self) -> Iterator[Any]:
+        return (self._materialize(int(row)) for row in self.rows)
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        return ((item.id, item) for item in self.values())
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, ColumnarManifest):
+            return self.path == other.path and np.array_equal(self.rows, other.rows)
+        return dict(self.items()) == other
+
+
+class ColumnarRow:
+    """
+    A read-only proxy for a single item of a :class:`ColumnarManifest`.
+    Attributes stored as columns (e.g. ``id``, ``start``, ``duration``, ``channel``) are read
+    directly from the memory-mapped arrays; any other attribute access materializes the full item
+    (e.g. a :class:`~lhotse.cut.MonoCut`) and forwards the access to it.
+
+    It is used to evaluate user predicates (e.g. in :meth:`lhotse.cut.CutSet.filter`)
+    without creating Python objects for every item.
+    The proxy reports the class of the item as its ``__class__``, so that ``isinstance(row, MonoCut)``
+    works as for the full item (``type(row)`` is still ``ColumnarRow``).
+    """
+    __slots__ = ('_manifest', '_row', '_item')
+
+    def __init__(self, manifest: ColumnarManifest, row: int) -> None:
+        self._manifest = manifest
+        self._row = row
+        self._item = None
+
+    @property
+    def __class__(self) -> type:
+        cols = self._manifest._open()
+        if 'item_type' in cols:
+            cls = _item_classes().get(cols['item_type'][self._row].decode('utf-8'))
+            if cls is not None:
+                return cls
+        return type(self._materialized())
+
+    def _materialized(self) -> Any:
+        if self._item is None:
+            self._item = self._manifest._materialize(self._row)
+        return self._item
+
+    def __getattr__(self, name: str) -> Any:
+        cols = self._manifest._open()
+        if name == 'has_features' and 'features_storage_key' in cols \
+                and cols['item_type'][self._row] == b'MonoCut':
+            return bool(cols['features_storage_key'][self._row])
+        if name in STRING_COLUMNS:
+            value = cols[name][self._row].decode('utf-8')
+            if value:
+                return value
+        elif name in NUMERIC_COLUMNS:
+            value = cols[name][self._row].item()
+            _, null = NUMERIC_COLUMNS[name]
+            if not (value == null or value != value):  # second check is for NaN
+                return value
+        elif name == 'end':
+            start, duration = cols['start'][self._row].item(), cols['duration'][self._row].item()
+            if start == start and duration == duration:
+                return round(start + duration, ndigits=8)
+        # The attribute is not stored in the columns or is not available: use the full object.
+        return getattr(self._materialized(), name)
+
+
+@lru_cache(maxsize=None)
+def _item_classes() -> Dict[str, type]:
+    from lhotse import MonoCut, Recording, SupervisionSegment
+    from lhotse.cut import MixedCut, PaddingCut
+    return {cls.__name__: cls for cls in (MonoCut, MixedCut, PaddingCut, Recording, SupervisionSegment)}
+
+
+def _maybe_get(item: Any, name: str, default: Any) -> Any:
+    try:
+        value = getattr(item, name)
+    except AttributeError:
+        return default
+    return default if value is None else value
+
+
+def _encode_strings(values: List[str]) -> np.ndarray:
+    if not values:
+        return np.empty(0, dtype='S1')
+    return np.asarray([v.encode('utf-8') for v in values], dtype=bytes)
@@ -1,14 +1,16 @@
+import inspect
 import logging
 import random
 import warnings
+from collections import defaultdict
 from concurrent.futures import Executor, ProcessPoolExecutor
 from dataclasses import dataclass, field
-from functools import partial, reduce
+from functools import lru_cache, partial, reduce
 from itertools import chain, islice
 from math import ceil, floor
 from pathlib import Path
-from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Set, Type, TypeVar, \
-    Union
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Set, Tuple, Type, \
+    TypeVar, Union
 
 import numpy as np
 from cytoolz import sliding_window
@@ -17,18 +19,19 @@ from intervaltree import Interval, IntervalTree
 from tqdm.auto import tqdm
 from typing_extensions import Literal
 
-from lhotse.audio import AudioMixer, AudioSource, Recording, RecordingSet
+from lhotse.audio import AudioDtype, AudioMixer, AudioSource, Recording, RecordingSet, convert_audio_dtype
 from lhotse.augmentation import AugmentFn
 from lhotse.features import FeatureExtractor, FeatureMixer, FeatureSet, Features, create_default_feature_extractor
-from lhotse.features.base import compute_global_stats
+from lhotse.features.base import compute_global_stats, load_features_many
 from lhotse.features.io import FeaturesWriter, LilcomFilesWriter, LilcomHdf5Writer
-from lhotse.serialization import Serializable
+from lhotse.features.pipeline import FeatureExtractionPipeline
+from lhotse.serialization import Serializable, drop_incomplete_last_line
 from lhotse.supervision import SupervisionSegment, SupervisionSet
 from lhotse.utils import (Decibels, LOG_EPSILON, NonPositiveEnergyError, Pathlike, Seconds, SetContainingAnything,
                           TimeSpan, asdict_nonull,
                           compute_num_frames, compute_num_samples, compute_start_duration_for_extended_cut,
                           exactly_one_not_null, fastcopy,
-                          ifnone, index_by_id_and_check, measure_overlap, overlaps,
+                          ifnone, index_by_id_and_check, map_read_ahead, measure_overlap, overlaps,
                           overspans, perturb_num_samples, split_sequence, uuid4)
 
 # One of the design principles for Cuts is a maximally "lazy" implementation, e.g. when mixing Cuts,
@@ -38,6 +41,9 @@ from lhotse.utils import (Decibels, LOG_EPSILON, NonPositiveEnergyError, Pathlik
 
 FW = TypeVar('FW', bound=FeaturesWriter)
 
+# How many cuts are processed between the checkpoints of resumable feature extraction.
+RESUME_CHECKPOINT_INTERVAL = 100
+
 
 class Cut:
     """
@@ -173,7 +179,7 @@ class Cut:
     # They are not abstract methods because dataclasses do not work well with the "abc" module.
     # Check a specific child class for their documentation.
     from_dict: Callable[[Dict], 'Cut']
-    load_audio: Callable[[], np.ndarray]
+    load_audio: Callable[..., np.ndarray]
     load_features: Callable[[], np.ndarray]
     compute_and_store_features: Callable
     drop_features: Callable
@@ -643,22 +649,26 @@ class MonoCut(Cut):
         """
         if self.has_features:
             feats = self.features.load(start=self.start, duration=self.duration)
-            # Note: we forgive off-by-one errors in the feature matrix frames
-            #       due to various hard-to-predict floating point arithmetic issues.
-            #       If needed, we will remove or duplicate the last frame to be
-            #       consistent with the manifests declared "num_frames".
-            if feats.shape[0] - self.num_frames == 1:
-                feats = feats[:self.num_frames, :]
-            elif feats.shape[0] - self.num_frames == -1:
-                feats = np.concatenate((feats, feats[-1:, :]), axis=0)
-            return feats
+            return self._fix_num_frames(feats)
         return None
 
-    def load_audio(self) -> Optional[np.ndarray]:
+    def _fix_num_frames(self, feats: np.ndarray) -> np.ndarray:
+        # Note: we forgive off-by-one errors in the feature matrix frames
+        #       due to various hard-to-predict floating point arithmetic issues.
+        #       If needed, we will remove or duplicate the last frame to be
+        #       consistent with the manifests declared "num_frames".
+        if feats.shape[0] - self.num_frames == 1:
+            feats = feats[:self.num_frames, :]
+        elif feats.shape[0] - self.num_frames == -1:
+            feats = np.concatenate((feats, feats[-1:, :]), axis=0)
+        return feats
+
+    def load_audio(self, dtype: AudioDtype = 'float32') -> Optional[np.ndarray]:
         """
         Load the audio by locating the appropriate recording in the supplied RecordingSet.
         The audio is trimmed to the [begin, end] range specified by the MonoCut.
 
+        :param dtype: ``'float32'`` (default) or ``'int16'``, the dtype of the returned samples.
         :return: a numpy ndarray with audio samples, with shape (1 <channel>, N <samples>)
         """
         if self.has_recording:
@@ -666,6 +676,7 @@ class MonoCut(Cut):
                 channels=self.channel,
                 offset=self.start,
                 duration=self.duration,
+                dtype=dtype,
             )
         return None
 
@@ -991,9 +1002,9 @@ class PaddingCut(Cut):
         return None
 
     # noinspection PyUnusedLocal
-    def load_audio(self, *args, **kwargs) -> Optional[np.ndarray]:
+    def load_audio(self, *args, dtype: AudioDtype = 'float32', **kwargs) -> Optional[np.ndarray]:
         if self.has_recording:
-            return np.zeros((1, compute_num_samples(self.duration, self.sampling_rate)), np.float32)
+            return np.zeros((1, compute_num_samples(self.duration, self.sampling_rate)), dtype)
         return None
 
     # noinspection PyUnusedLocal
@@ -1481,9 +1492,10 @@ class MixedCut(Cut):
             return feats
         # When there is more than one "regular" cut, we will perform an actual mix.
         mixer = FeatureMixer(
-            feature_extractor=create_default_feature_extractor(self._first_non_padding_cut.features.type),
+            feature_extractor=_mixing_feature_extractor(self._first_non_padding_cut.features.type),
             base_feats=first_cut.load_features(),
             frame_shift=first_cut.frame_shift,
+            num_frames=self.num_frames,
         )
         for track in self.tracks[1:]:
             try:
@@ -1518,17 +1530,25 @@ class MixedCut(Cut):
         else:
             return mixer.unmixed_feats
 
-    def load_audio(self, mixed: bool = True) -> Optional[np.ndarray]:
+    def load_audio(self, mixed: bool = True, dtype: AudioDtype = 'float32') -> Optional[np.ndarray]:
         """
         Loads the audios of the source cuts and mix them on-the-fly.
 
         :param mixed: When True (default), returns a mono mix of the underlying tracks.
             Otherwise returns a numpy array with the number of channels equal to the number of tracks.
+        :param dtype: ``'float32'`` (default) or ``'int16'``, the dtype of the returned samples.
+            The tracks are always mixed in float32; the result is converted to int16 when requested.
         :return: A numpy ndarray with audio samples and with shape ``(num_channels, num_samples)``
         """
         if not self.has_recording:
             return None
-        mixer = AudioMixer(self.tracks[0].cut.load_audio(), sampling_rate=self.tracks[0].cut.sampling_rate)
+        # The tracks offsets are known, so the mixer can allocate the whole mix up front.
+        mixer = AudioMixer(
+            self.tracks[0].cut.load_audio(),
+            sampling_rate=self.tracks[0].cut.sampling_rate,
+            num_samples=self.num_samples,
+            keep_tracks=not mixed,
+        )
         for track in self.tracks[1:]:
             try:
                 mixer.add_to_mix(
@@ -1551,7 +1571,7 @@ class MixedCut(Cut):
                                                        f"showing the cut below. MixedCut:\n{self}"
         else:
             audio = mixer.unmixed_audio
-        return audio
+        return convert_audio_dtype(audio, dtype)
 
     def plot_tracks_features(self):
         """
@@ -1779,6 +1799,12 @@ class CutSet(Serializable, Sequence[Cut]):
         >>> cuts.to_file('cuts.jsonl.gz')
         >>> cuts4 = CutSet.from_file('cuts.jsonl.gz')
 
+    Very large :class:`~lhotse.cut.CutSet` can be stored in a memory-mapped columnar format,
+    which keeps the memory usage low and creates the cut objects only when they are accessed::
+
+        >>> cuts.to_columnar('cuts_columnar')
+        >>> cuts5 = CutSet.from_columnar('cuts_columnar')
+
     It behaves similarly to a ``dict``::
 
             >>> 'rec1-1-0' in cuts
@@ -1883,7 +1909,19 @@ class CutSet(Serializable, Sequence[Cut]):
         Indicates whether this manifest was opened in lazy (read-on-the-fly) mode or not.
         """
         from lhotse.serialization import LazyJsonlIterator
-        return isinstance(self.cuts, LazyJsonlIterator)
+        from lhotse.sharding import ShardedJsonlIterator
+        return isinstance(self.cuts, (LazyJsonlIterator, ShardedJsonlIterator))
+
+    @property
+    def is_columnar(self) -> bool:
+        """
+        Indicates whether this manifest is backed by a memory-mapped columnar storage
+        (see :meth:`.CutSet.from_columnar`). Such manifests support random access, and
+        operations such as ``filter``, ``sort_by_duration``, ``subset`` or ``split``
+        are performed on the columns without creating the cut objects.
+        """
+        from lhotse.columnar import ColumnarManifest
+        return isinstance(self.cuts, ColumnarManifest)
 
     @property
     def mixed_cuts(self) -> Dict[str, MixedCut]:
@@ -2038,6 +2076,10 @@ class CutSet(Serializable, Sequence[Cut]):
         """
         if rng is None:
             rng = random
+        if self.is_columnar:
+            positions = list(range(len(self)))
+            rng.shuffle(positions)
+            return CutSet(cuts=self.cuts.select(positions))
         ids = list(self.ids)
         rng.shuffle(ids)
         return CutSet(cuts={cid: self[cid] for cid in ids})
@@ -2054,6 +2096,11 @@ class CutSet(Serializable, Sequence[Cut]):
             equally long.
         :return: A list of :class:`~lhotse.CutSet` pieces.
         """
+        if self.is_columnar:
+            return [
+                CutSet(cuts=self.cuts.select(positions)) for positions in
+                split_sequence(range(len(self)), num_splits=num_splits, shuffle=shuffle, drop_last=drop_last)
+            ]
         return [
             CutSet.from_cuts(subset) for subset in
             split_sequence(self, num_splits=num_splits, shuffle=shuffle, drop_last=drop_last)
@@ -2084,6 +2131,9 @@ class CutSet(Serializable, Sequence[Cut]):
         """
         assert exactly_one_not_null(supervision_ids, cut_ids, first, last), "subset() can handle only one non-None arg."
 
+        if self.is_columnar and supervision_ids is None:
+            return self._subset_columnar(cut_ids=cut_ids, first=first, last=last)
+
         if first is not None:
             assert first > 0
             if first > len(self):
@@ -2110,6 +2160,23 @@ class CutSet(Serializable, Sequence[Cut]):
         if cut_ids is not None:
             return CutSet.from_cuts(self[cid] for cid in cut_ids)
 
+    def _subset_columnar(
+            self,
+            cut_ids: Optional[Iterable[str]] = None,
+            first: Optional[int] = None,
+            last: Optional[int] = None
+    ) -> 'CutSet':
+        if cut_ids is not None:
+            return CutSet(cuts=self.cuts.select(self.cuts.positions(cut_ids)))
+        n = first if first is not None else last
+        assert n > 0
+        if n > len(self):
+            logging.warning(f'CutSet has only {len(self)} items but {n} required; not doing anything.')
+            return self
+        if first is not None:
+            return CutSet(cuts=self.cuts.select(np.arange(first)))
+        return CutSet(cuts=self.cuts.select(np.arange(len(self) - last, len(self))))
+
     def filter_supervisions(self, predicate: Callable[[SupervisionSegment], bool]) -> 'CutSet':
         """
         Return a new CutSet with Cuts containing only `SupervisionSegments` satisfying `predicate`
@@ -2134,6 +2201,13 @@ class CutSet(Serializable, Sequence[Cut]):
         :param predicate: a function that takes a cut as an argument and returns bool.
         :return: a filtered CutSet.
         """
+        if self.is_columnar:
+            # The predicate receives lightweight row proxies that read the columns directly;
+            # a full cut object is only created if the predicate uses a non-column attribute.
+            # The proxies report the class of the cut, so ``isinstance`` checks work as usual.
+            return CutSet(cuts=self.cuts.select([
+                pos for pos, row in enumerate(self.cuts.row_views()) if predicate(row)
+            ]))
         return CutSet.from_cuts(cut for cut in self if predicate(cut))
 
     def trim_to_supervisions(
@@ -2262,6 +2336,10 @@ class CutSet(Serializable, Sequence[Cut]):
         """
         Sort the CutSet according to cuts duration and return the result. Descending by default.
         """
+        if self.is_columnar:
+            durations = self.cuts.column('duration')
+            order = np.argsort(durations if ascending else -durations, kind='stable')
+            return CutSet(cuts=self.cuts.select(order))
         return CutSet.from_cuts(sorted(self, key=(lambda cut: cut.duration), reverse=not ascending))
 
     def sort_like(self, other: 'CutSet') -> 'CutSet':
@@ -2269,6 +2347,8 @@ class CutSet(Serializable, Sequence[Cut]):
         Sort the CutSet according to the order of cut IDs in ``other`` and return the result.
         """
         assert set(self.ids) == set(other.ids), "sort_like() expects both CutSet's to have identical cut IDs."
+        if self.is_columnar:
+            return CutSet(cuts=self.cuts.select(self.cuts.positions(other.ids)))
         return CutSet.from_cuts(self[cid] for cid in other.ids)
 
     def index_supervisions(
@@ -2564,6 +2644,10 @@ class CutSet(Serializable, Sequence[Cut]):
             executor: Optional[Executor] = None,
             mix_eagerly: bool = True,
             progress_bar: bool = True,
+            batch_duration: Optional[Seconds] = None,
+            pipeline: Union[bool, FeatureExtractionPipeline] = False,
+            resume: bool = False,
+            share_features: Optional[Literal['spans', 'recording']] = None,
     ) -> 'CutSet':
         """
         Extract features for all cuts, possibly in parallel,
@@ -2616,6 +2700,49 @@ class CutSet(Serializable, Sequence[Cut]):
             ...     storage_type=LilcomURLWriter
             ... )
 
+            Extract fbank features in batches of cuts with similar durations,
+            each batch having at most 200 seconds of (padded) audio:
+
+            >>> cuts = CutSet(...)
+            ... cuts.compute_and_store_features(
+            ...     extractor=KaldiFbank(),
+            ...     storage_path='feats',
+            ...     batch_duration=200,
+            ... )
+
+            Extract fbank features with 4 processes, while 8 threads are reading the audio
+            and a single thread is writing all the features into one HDF5 file:
+
+            >>> pipeline = FeatureExtractionPipeline(num_readers=8, num_workers=4)
+            ... cuts = CutSet(...)
+            ... cuts.compute_and_store_features(
+            ...     extractor=Fbank(),
+            ...     storage_path='feats.h5',
+            ...     pipeline=pipeline,
+            ... )
+            ... print(pipeline.stats)  # throughput of each stage and queue depths
+
+            Extract fbank features in a way that can be resumed if the job is interrupted
+            (re-running the same command only computes the features of the remaining cuts):
+
+            >>> cuts = CutSet(...)
+            ... cuts.compute_and_store_features(
+            ...     extractor=Fbank(),
+            ...     storage_path='feats',
+            ...     num_jobs=8,
+            ...     resume=True,
+            ... )
+
+            Extract fbank features once for each region of a recording covered by (possibly overlapping)
+            cuts, e.g. after ``trim_to_supervisions(keep_overlapping=True)``, and share them between the cuts:
+
+            >>> cuts = CutSet(...)
+            ... cuts.compute_and_store_features(
+            ...     extractor=Fbank(),
+            ...     storage_path='feats',
+            ...     share_features='spans',
+            ... )
+
         :param extractor: A ``FeatureExtractor`` instance
             (either Lhotse's built-in or a custom implementation).
         :param storage_path: The path to location where we will store the features.
@@ -2645,6 +2772,34 @@ class CutSet(Serializable, Sequence[Cut]):
             The returned ``MonoCut`` will not have a ``Recording`` attached.
         :param progress_bar: Should a progress bar be displayed (automatically turned off
             for parallel computation).
+        :param batch_duration: when specified, enables batched feature extraction: the cuts are sorted by
+            duration and grouped into batches with at most this much audio (in seconds, counting the padding),
+            and the features of each batch are computed with a single call to ``FeatureExtractor.extract_batch``.
+            It is much faster for extractors that support it, such as ``KaldiFbank`` or ``KaldiMfcc``,
+            and falls back to per-cut extraction for other extractors.
+            ``MixedCut`` and ``PaddingCut`` are always processed one by one.
+            The cuts in the returned ``CutSet`` keep their original order.
+        :param pipeline: when ``True`` or a :class:`~lhotse.features.pipeline.FeatureExtractionPipeline`
+            instance, the audio reading, feature computation and writing run concurrently in separate stages
+            connected by bounded queues, and all features are written to a single storage at ``storage_path``.
+            When ``True``, ``num_jobs`` extractor processes are used. Pass a pipeline instance to configure
+            the stages and to inspect their statistics (``pipeline.stats``) afterwards.
+            It cannot be combined with ``executor`` or ``batch_duration``.
+        :param resume: when ``True``, the extraction can be resumed after an interruption.
+            Each storage is opened in append mode (if it supports a ``mode`` argument, like the HDF5 writers)
+            and the cuts with stored features are recorded in an append-only progress manifest
+            ``<storage path>.progress.jsonl`` next to it (in parallel execution, there is one per worker).
+            The cuts already listed in the progress manifests are skipped, and their results are merged
+            with the new ones (see :meth:`CutSet.from_extraction_progress`).
+            It requires a local ``storage_path`` and cannot be combined with ``pipeline`` or ``batch_duration``.
+        :param share_features: when specified, the ``MonoCut`` instances are grouped by their recording and channel,
+            and the features are computed and stored once for each group, and attached to all of its cuts
+            (``MonoCut.load_features()`` reads only the cut's frames of the shared matrix).
+            With ``'spans'``, one matrix is stored for each union of overlapping cuts;
+            with ``'recording'``, one matrix is stored for the whole recording.
+            It saves computation and storage when the cuts overlap heavily (e.g. in diarization setups).
+            In parallel execution, the cuts of a recording are processed by the same worker.
+            It cannot be combined with ``pipeline``, ``batch_duration`` or ``resume``.
         :return: Returns a new ``CutSet`` with ``Features`` manifests attached to the cuts.
         """
         from lhotse.manipulation import combine
@@ -2659,13 +2814,71 @@ class CutSet(Serializable, Sequence[Cut]):
                             'we will ignore the executor and use non-parallel execution.')
             executor = None
 
+        if resume:
+            assert '://' not in str(storage_path), "Resumable feature extraction requires a local storage_path."
+            assert pipeline is False, "The pipeline argument cannot be used together with resume."
+            assert batch_duration is None, "The batch_duration argument cannot be used together with resume."
+
+        if share_features is not None:
+            assert share_features in ('spans', 'recording'), \
+                f"Unsupported share_features value: {share_features} (supported: 'spans', 'recording')."
+            assert pipeline is False, "The pipeline argument cannot be used together with share_features."
+            assert batch_duration is None, \
+                "The batch_duration argument cannot be used together with share_features."
+            assert not resume, "The resume argument cannot be used together with share_features."
+
+        # Pipelined execution
+        if pipeline is not False:
+            assert executor is None, "The executor argument cannot be used together with pipeline."
+            assert batch_duration is None, "The batch_duration argument cannot be used together with pipeline."
+            if pipeline is True:
+                pipeline = FeatureExtractionPipeline(num_workers=num_jobs)
+            with storage_type(storage_path) as storage:
+                return CutSet.from_cuts(
+                    pipeline.run(
+                        self,
+                        extractor=extractor,
+                        storage=storage,
+                        augment_fn=augment_fn,
+                        mix_eagerly=mix_eagerly,
+                        progress_bar=progress_bar,
+                    )
+                )
+
         # Non-parallel execution
         if executor is None and num_jobs == 1:
+            if resume:
+                return self._compute_and_store_features_resumable(
+                    extractor=extractor,
+                    storage_path=storage_path,
+                    storage_type=storage_type,
+                    augment_fn=augment_fn,
+                    mix_eagerly=mix_eagerly,
+                    progress_bar=progress_bar,
+                )
             if progress_bar:
                 progress = partial(
                     tqdm, desc='Extracting and storing features', total=len(self)
                 )
             with storage_type(storage_path) as storage:
+                if share_features is not None:
+                    return self._compute_and_store_features_shared(
+                        extractor=extractor,
+                        storage=storage,
+                        share_features=share_features,
+                        augment_fn=augment_fn,
+                        mix_eagerly=mix_eagerly,
+                        progress_bar=progress_bar,
+                    )
+                if batch_duration is not None:
+                    return self._compute_and_store_features_batched(
+                        extractor=extractor,
+                        storage=storage,
+                        batch_duration=batch_duration,
+                        augment_fn=augment_fn,
+                        mix_eagerly=mix_eagerly,
+                        progress_bar=progress_bar,
+                    )
                 return CutSet.from_cuts(
                     progress(
                         cut.compute_and_store_features(
@@ -2692,7 +2905,28 @@ class CutSet(Serializable, Sequence[Cut]):
                 return storage_path / f'feats-{idx}'
 
         # Parallel execution: prepare the CutSet splits
-        cut_sets = self.split(num_jobs, shuffle=True)
+        if resume:
+            # Only the cuts that were not processed in the previous runs are split between the workers.
+            # Each worker appends its progress to a separate manifest,
+            # and the final result is merged from all of them.
+            done_ids = set(CutSet.from_extraction_progress(storage_path).ids)
+            remaining = self.filter(lambda c: c.id not in done_ids)
+            if len(remaining) == 0:
+                return CutSet.from_extraction_progress(storage_path).subset(cut_ids=list(self.ids))
+            cut_sets = remaining.split(min(num_jobs, len(remaining)), shuffle=True)
+        elif share_features is not None:
+            # The cuts of the same recording have to be processed by the same worker to share the features.
+            by_recording = groupby(
+                lambda cut: ('recording', cut.recording_id) if isinstance(cut, MonoCut) else ('cut', cut.id), self
+            )
+            cut_sets = [
+                CutSet.from_cuts(chain.from_iterable(groups))
+                for groups in split_sequence(
+                    list(by_recording.values()), num_splits=min(num_jobs, len(by_recording)), shuffle=True
+                )
+            ]
+        else:
+            cut_sets = self.split(num_jobs, shuffle=True)
 
         # Initialize the default executor if None was given
         if executor is None:
@@ -2710,7 +2944,10 @@ class CutSet(Serializable, Sequence[Cut]):
                 storage_type=storage_type,
                 mix_eagerly=mix_eagerly,
                 # Disable individual workers progress bars for readability
-                progress_bar=False
+                progress_bar=False,
+                batch_duration=batch_duration,
+                resume=resume,
+                share_features=share_features,
             )
             for i, cs in enumerate(cut_sets)
         ]
@@ -2721,8 +2958,199 @@ class CutSet(Serializable, Sequence[Cut]):
             )
 
         cuts_with_feats = combine(progress(f.result() for f in futures))
+        if resume:
+            return CutSet.from_extraction_progress(storage_path).subset(cut_ids=list(self.ids))
+        if share_features is not None:
+            # The cuts were grouped by recording - restore the original order.
+            return cuts_with_feats.sort_like(self)
         return cuts_with_feats
 
+    def _compute_and_store_features_resumable(
+            self,
+            extractor: FeatureExtractor,
+            storage_path: Pathlike,
+            storage_type: Type[FW],
+            augment_fn: Optional[AugmentFn] = None,
+            mix_eagerly: bool = True,
+            progress_bar: bool = True,
+    ) -> 'CutSet':
+        """
+        The non-parallel, resumable variant of :meth:`CutSet.compute_and_store_features`.
+        The results are recorded in the progress manifest in checkpoints: the storage is flushed first,
+        so that the progress manifest never lists cuts whose features might have been lost.
+        """
+        progress_path = extraction_progress_path(storage_path)
+        drop_incomplete_last_line(progress_path)
+        if 'mode' in inspect.signature(storage_type).parameters:
+            storage = storage_type(storage_path, mode='a')
+        else:
+            storage = storage_type(storage_path)
+        with storage, CutSet.open_writer(progress_path, overwrite=False) as progress_writer:
+            if progress_writer.ignore_ids:
+                logging.info(f'Resuming the feature extraction: {len(progress_writer.ignore_ids)} cuts '
+                             f'were already processed according to {progress_path}.')
+            pending = []
+
+            def checkpoint():
+                storage.flush()
+                for c in pending:
+                    progress_writer.write(c)
+                progress_writer.flush()
+                pending.clear()
+
+            for cut in tqdm(self, desc='Extracting and storing features', disable=not progress_bar):
+                if cut.id in progress_writer:
+                    continue
+                pending.append(
+                    cut.compute_and_store_features(
+                        extractor=extractor,
+                        storage=storage,
+                        augment_fn=augment_fn,
+                        mix_eagerly=mix_eagerly
+                    )
+                )
+                if len(pending) >= RESUME_CHECKPOINT_INTERVAL:
+                    checkpoint()
+            checkpoint()
+        return CutSet.from_jsonl(progress_path).subset(cut_ids=list(self.ids))
+
+    @staticmethod
+    def from_extraction_progress(storage_path: Pathlike) -> 'CutSet':
+        """
+        Read the cuts with stored features from the progress manifests of an interrupted (or finished)
+        resumable feature extraction (see ``resume`` in :meth:`CutSet.compute_and_store_features`),
+        which allows to use the partial results without resuming the extraction.
+
+        :param storage_path: the same ``storage_path`` that was passed to ``compute_and_store_features``.
+        :return: a ``CutSet`` with the cuts from all the progress manifests found (possibly empty).
+        """
+        paths = [extraction_progress_path(storage_path)]
+        if Path(storage_path).is_dir():
+            # Progress manifests of the workers in parallel extraction.
+            paths.extend(sorted(Path(storage_path).glob('*.progress.jsonl')))
+        cuts = {}
+        for path in paths:
+            if not path.is_file():
+                continue
+            drop_incomplete_last_line(path)
+            for cut in CutSet.from_jsonl(path):
+                cuts[cut.id] = cut
+        return CutSet(cuts=cuts)
+
+    def _compute_and_store_features_batched(
+            self,
+            extractor: FeatureExtractor,
+            storage: FeaturesWriter,
+            batch_duration: Seconds,
+            augment_fn: Optional[AugmentFn] = None,
+            mix_eagerly: bool = True,
+            progress_bar: bool = True,
+    ) -> 'CutSet':
+        """
+        The non-parallel, batched variant of :meth:`CutSet.compute_and_store_features`.
+        The cuts are sorted by duration, so that each batch contains cuts of similar lengths
+        and wastes little computation on padding.
+        """
+        assert batch_duration > 0, f"batch_duration has to be positive (got: {batch_duration})."
+        progress = tqdm(desc='Extracting and storing features', total=len(self), disable=not progress_bar)
+        cut_ids = []
+        results = {}
+        to_batch = []
+        for cut in self:
+            cut_ids.append(cut.id)
+            if isinstance(cut, MonoCut):
+                to_batch.append(cut)
+            else:
+                results[cut.id] = cut.compute_and_store_features(
+                    extractor=extractor,
+                    storage=storage,
+                    augment_fn=augment_fn,
+                    mix_eagerly=mix_eagerly
+                )
+                progress.update(1)
+
+        def process(batch: List[MonoCut]) -> None:
+            features = extractor.extract_batch_from_samples_and_store(
+                samples=[cut.load_audio() for cut in batch],
+                storage=storage,
+                sampling_rate=batch[0].sampling_rate,
+                offsets=[cut.start for cut in batch],
+                channels=[cut.channel for cut in batch],
+                augment_fn=augment_fn,
+            )
+            for cut, features_info in zip(batch, features):
+                results[cut.id] = fastcopy(cut, features=features_info)
+            progress.update(len(batch))
+
+        # Batches are formed from the shortest to the longest cut; the cost of a batch is estimated
+        # as the duration of its longest cut times the batch size (i.e. including the padding).
+        batch = []
+        for cut in sorted(to_batch, key=lambda c: (c.sampling_rate, c.duration)):
+            if batch and (
+                    cut.sampling_rate != batch[0].sampling_rate
+                    or cut.duration * (len(batch) + 1) > batch_duration
+            ):
+                process(batch)
+                batch = []
+            batch.append(cut)
+        if batch:
+            process(batch)
+        progress.close()
+        return CutSet.from_cuts(results[cid] for cid in cut_ids)
+
+    def _compute_and_store_features_shared(
+            self,
+            extractor: FeatureExtractor,
+            storage: FeaturesWriter,
+            share_features: Literal['spans', 'recording'],
+            augment_fn: Optional[AugmentFn] = None,
+            mix_eagerly: bool = True,
+            progress_bar: bool = True,
+    ) -> 'CutSet':
+        """
+        The non-parallel variant of :meth:`CutSet.compute_and_store_features` that computes the features
+        once for each recording (or each union of overlapping cuts) and shares them between the cuts.
+        """
+        progress = tqdm(desc='Extracting and storing features', total=len(self), disable=not progress_bar)
+        cut_ids = []
+        results = {}
+        groups = defaultdict(list)
+        for cut in self:
+            cut_ids.append(cut.id)
+            if isinstance(cut, MonoCut) and cut.has_recording:
+                groups[cut.recording_id, cut.channel].append(cut)
+            else:
+                results[cut.id] = cut.compute_and_store_features(
+                    extractor=extractor,
+                    storage=storage,
+                    augment_fn=augment_fn,
+                    mix_eagerly=mix_eagerly
+                )
+                progress.update(1)
+
+        for (recording_id, channel), cuts in groups.items():
+            recording = cuts[0].recording
+            if share_features == 'recording':
+                spans = [(TimeSpan(0, recording.duration), cuts)]
+            else:
+                spans = _merge_overlapping_spans(cuts)
+            for span, span_cuts in spans:
+                span_cut = MonoCut(
+                    id=f'{recording_id}-{channel}-{span.start}-{span.end}',
+                    start=span.start,
+                    duration=round(span.end - span.start, ndigits=8),
+                    channel=channel,
+                    recording=recording,
+                )
+                features = span_cut.compute_and_store_features(
+                    extractor=extractor, storage=storage, augment_fn=augment_fn
+                ).features
+                for cut in span_cuts:
+                    results[cut.id] = fastcopy(cut, features=features)
+                progress.update(len(span_cuts))
+        progress.close()
+        return CutSet.from_cuts(results[cid] for cid in cut_ids)
+
     def compute_and_store_recordings(
             self,
             storage_path: Pathlike,
@@ -2852,6 +3280,142 @@ class CutSet(Serializable, Sequence[Cut]):
             storage_path=storage_path
         )
 
+    def load_features_many(self) -> List[np.ndarray]:
+        """
+        Load the feature matrices of all cuts, like calling ``cut.load_features()`` for each of them.
+        The features of ``MonoCut`` instances are read together with
+        :func:`~lhotse.features.base.load_features_many`, i.e. each storage is opened once
+        and its arrays are read in the order they are stored; other cuts are loaded one by one.
+
+        :return: a list of numpy arrays, in the same order as the cuts.
+        """
+        cuts = list(self)
+        assert all(cut.has_features for cut in cuts), "Not all cuts have features."
+        # Find the MonoCuts whose features can be read together: either the cuts themselves,
+        # or the first track of a MixedCut that only pads a MonoCut (e.g. in collation).
+        to_read = {}
+        for idx, cut in enumerate(cuts):
+            if isinstance(cut, MonoCut):
+                to_read[idx] = cut
+            elif (
+                    isinstance(cut, MixedCut)
+                    and len(cut.tracks) > 1
+                    and isinstance(cut.tracks[0].cut, MonoCut)
+                    and all(isinstance(t.cut, PaddingCut) for t in cut.tracks[1:])
+            ):
+                to_read[idx] = cut.tracks[0].cut
+        loaded = load_features_many([(c.features, c.start, c.duration) for c in to_read.values()])
+        loaded = dict(zip(to_read, loaded))
+        results = []
+        for idx, cut in enumerate(cuts):
+            if idx not in to_read:
+                results.append(cut.load_features())
+                continue
+            feats = to_read[idx]._fix_num_frames(loaded[idx])
+            if isinstance(cut, MixedCut):
+                # The same as in MixedCut.load_features() for a padded cut.
+                padded = np.ones((cut.num_frames, cut.num_features)) * cut.tracks[1].cut.feat_value
+                padded[:feats.shape[0], :] = feats
+                feats = padded
+            results.append(feats)
+        return results
+
+    def repack_features(
+            self,
+            storage_type: Union[str, Type[FW]],
+            storage_path: Pathlike,
+            order: Optional[Union['CutSet', Sequence[str]]] = None,
+            num_jobs: int = 1,
+            executor: Optional[Executor] = None,
+            batch_size: int = 64,
+            progress_bar: bool = False,
+            **storage_kwargs
+    ) -> 'CutSet':
+        """
+        Copy the feature matrices of the cuts into a new storage (e.g. to convert millions of
+        ``lilcom_files`` into a single HDF5 file or a memory-mapped arena), and return a new ``CutSet``
+        whose features refer to the new storage.
+
+        The matrices are written in the order of the cuts in ``order`` (e.g. the order in which
+        a sampler or a bucketing sampler will iterate the cuts), so that the data loading reads
+        the new storage sequentially. Cuts that are not present in ``order`` are written last.
+        A matrix shared by several cuts (e.g. recording-level features) is written only once;
+        the start and duration of the ``Features`` manifests do not change.
+
+        :param storage_type: a ``FeaturesWriter`` subclass type, or the name of the target storage backend
+            (see :func:`~lhotse.features.io.available_storage_backends`).
+        :param storage_path: the path of the target storage (must differ from the existing storages).
+        :param order: a ``CutSet`` or a sequence of cut IDs specifying the order in which
+            the feature matrices are written. By default, the order of this ``CutSet`` is used.
+        :param num_jobs: the number of parallel processes used to read the existing feature matrices.
+            The writing is always done in this process.
+        :param executor: when provided, will be used to read the matrices in parallel.
+            By default, we will instantiate a ProcessPoolExecutor with ``num_jobs`` processes.
+        :param batch_size: the number of matrices read together by a single task
+            (see :func:`~lhotse.features.base.load_features_many`).
+        :param progress_bar: Should a progress bar be displayed.
+        :param storage_kwargs: additional arguments for the ``FeaturesWriter`` (e.g. ``tick_power``).
+        :return: a new ``CutSet``, with the same order of cuts as this one.
+        """
+        from cytoolz import identity, partition_all
+        from lhotse.features.io import get_writer
+
+        cuts = list(self)
+        to_write = cuts
+        if order is not None:
+            order_ids = order.ids if isinstance(order, CutSet) else order
+            position = {cut_id: idx for idx, cut_id in enumerate(order_ids)}
+            to_write = sorted(cuts, key=lambda cut: position.get(cut.id, len(position)))
+
+        # Find the unique feature matrices in the order of writing.
+        unique = {}
+        for cut in to_write:
+            for mono_cut in _mono_cuts_with_features(cut):
+                unique.setdefault(_features_location(mono_cut.features), (mono_cut.id, mono_cut.features))
+        source_paths = {str(features.storage_path) for _, features in unique.values()}
+        assert str(storage_path) not in source_paths, \
+            f"Cannot repack features into one of the storages they are read from ({storage_path})."
+
+        batches = list(partition_all(batch_size, unique.values()))
+        to_load = ([features for _, features in batch] for batch in batches)
+        own_executor = executor is None and num_jobs > 1
+        if own_executor:
+            executor = ProcessPoolExecutor(num_jobs)
+        if executor is not None:
+            # Only a few batches are read ahead of the writer, to limit the memory usage.
+            loaded = map_read_ahead(executor, _load_full_features, to_load, read_ahead=2 * max(num_jobs, 1))
+        else:
+            loaded = map(_load_full_features, to_load)
+
+        progress = identity
+        if progress_bar:
+            progress = partial(tqdm, desc='Repacking features', total=len(batches))
+
+        repacked = {}
+        used_keys = set()
+        if isinstance(storage_type, str):
+            storage_type = get_writer(storage_type)
+        with storage_type(storage_path, **storage_kwargs) as writer:
+            for batch, arrays in progress(zip(batches, loaded)):
+                for (key, features), arr in zip(batch, arrays):
+                    # Matrices of different cuts might come from MonoCuts with the same ID
+                    # (e.g. the same cut mixed with others) - make sure the keys are unique.
+                    unique_key, suffix = key, 0
+                    while unique_key in used_keys:
+                        suffix += 1
+                        unique_key = f'{key}-{suffix}'
+                    used_keys.add(unique_key)
+                    repacked[_features_location(features)] = fastcopy(
+                        features,
+                        storage_type=writer.name,
+                        storage_path=writer.storage_path,
+                        storage_key=writer.write(unique_key, arr),
+                    )
+        if own_executor:
+            executor.shutdown()
+
+        return CutSet.from_cuts(_replace_features(cut, repacked) for cut in cuts)
+
     def with_features_path_prefix(self, path: Pathlike) -> 'CutSet':
         return CutSet.from_cuts(c.with_features_path_prefix(path) for c in self)
 
@@ -2917,6 +3481,8 @@ class CutSet(Serializable, Sequence[Cut]):
     def __getitem__(self, cut_id_or_index: Union[int, str]) -> 'Cut':
         if isinstance(cut_id_or_index, str):
             return self.cuts[cut_id_or_index]
+        if self.is_columnar:
+            return self.cuts.item_at(cut_id_or_index)
         # ~100x faster than list(dict.values())[index] for 100k elements
         return next(val for idx, val in enumerate(self.cuts.values()) if idx == cut_id_or_index)
 
@@ -2934,6 +3500,56 @@ class CutSet(Serializable, Sequence[Cut]):
         return CutSet(cuts={**self.cuts, **other.cuts})
 
 
+def extraction_progress_path(storage_path: Pathlike) -> Path:
+    """Return the path of the progress manifest used in resumable feature extraction for ``storage_path``."""
+    return Path(f'{storage_path}.progress.jsonl')
+
+
+def _merge_overlapping_spans(cuts: List[MonoCut]) -> List[Tuple[TimeSpan, List[MonoCut]]]:
+    """Group the cuts (of the same recording and channel) into the unions of overlapping (or touching) cuts."""
+    spans = []
+    for cut in sorted(cuts, key=lambda c: c.start):
+        if spans and cut.start <= spans[-1][0].end + 1e-8:
+            span, span_cuts = spans[-1]
+            spans[-1] = (TimeSpan(span.start, max(span.end, cut.end)), span_cuts + [cut])
+        else:
+            spans.append((TimeSpan(cut.start, cut.end), [cut]))
+    return spans
+
+
+@lru_cache(maxsize=None)
+def _mixing_feature_extractor(name: str) -> FeatureExtractor:
+    # Feature-domain mixing only uses the stateless ``mix`` and ``compute_energy`` methods,
+    # so a single extractor of each type is shared by all the MixedCuts.
+    return create_default_feature_extractor(name)
+
+
+def _mono_cuts_with_features(cut: Cut) -> List[MonoCut]:
+    if isinstance(cut, MonoCut):
+        return [cut] if cut.has_features else []
+    if isinstance(cut, MixedCut):
+        return [t.cut for t in cut.tracks if isinstance(t.cut, MonoCut) and t.cut.has_features]
+    return []
+
+
+def _features_location(features: Features) -> Tuple[str, str, str]:
+    return features.storage_type, features.storage_path, features.storage_key
+
+
+def _load_full_features(features: List[Features]) -> List[np.ndarray]:
+    return load_features_many([(f, None, None) for f in features])
+
+
+def _replace_features(cut: Cut, repacked: Dict[Tuple[str, str, str], Features]) -> Cut:
+    if isinstance(cut, MonoCut):
+        if not cut.has_features:
+            return cut
+        return fastcopy(cut, features=repacked[_features_location(cut.features)])
+    if isinstance(cut, MixedCut):
+        return MixedCut(id=cut.id, tracks=[fastcopy(t, cut=_replace_features(t.cut, repacked)) for t in cut.tracks])
+    return cut
+
+
 def make_windowed_cuts_from_features(
         feature_set: FeatureSet,
         cut_duration: Seconds,
@@ -11,6 +11,11 @@ class PerturbSpeed:
 
     If the effect is applied, then one of the perturbation factors from the constructor's
     :attr:`factors` parameter is sampled with uniform probability.
+
+    The perturbation is lazy: it is applied when the audio of the cuts is loaded,
+    using the resampling filters cached for each factor (see :mod:`lhotse.augmentation.resample`).
+    To perturb audio that is already loaded, use :func:`lhotse.augmentation.speed_perturb_batch`,
+    which resamples all the recordings with the same factor at once.
     """
 
     def __init__(
@@ -141,8 +141,22 @@ class AudioSamples(BatchIO):
 
     It pads the recordings, if needed.
 
+    With ``dtype='int16'``, the audio samples are kept as int16 from decoding to the returned batch,
+    which halves the memory and the inter-process communication with DataLoader workers;
+    convert them to float at the model's input with :func:`lhotse.dataset.collation.audio_to_float`.
+
     .. automethod:: __call__
     """
+    def __init__(self, num_workers: int = 0, dtype: str = 'float32') -> None:
+        """
+        AudioSamples constructor.
+
+        :param num_workers: the number of processes used to read the audio concurrently.
+        :param dtype: the dtype of the returned audio samples, ``'float32'`` (default) or ``'int16'``.
+        """
+        super().__init__(num_workers=num_workers)
+        self.dtype = dtype
+
     def __call__(self, cuts: CutSet) -> Tuple[torch.Tensor, torch.IntTensor]:
         """
         Reads the audio samples from recordings on disk/other storage.
@@ -150,7 +164,7 @@ class AudioSamples(BatchIO):
 
         :return: a tensor with collated audio samples, and a tensor of ``num_samples`` of each cut before padding.
         """
-        return collate_audio(cuts, executor=_get_executor(self.num_workers))
+        return collate_audio(cuts, executor=_get_executor(self.num_workers), dtype=self.dtype)
 
     def supervision_intervals(self, cuts: CutSet) -> Dict[str, torch.Tensor]:
         """
@@ -3,10 +3,11 @@ from dataclasses import dataclass, field
 from math import isclose
 from typing import Callable, Iterable, Optional, Tuple, Union
 
+import torch
 from torch import distributed as dist
 from torch.utils.data import Sampler
 
-from lhotse import Seconds
+from lhotse import CutSet, Seconds
 from lhotse.cut import Cut
 from lhotse.utils import exactly_one_not_null, is_none_or_gt
 
@@ -30,6 +31,13 @@ class CutSampler(Sampler):
     This ensures that we can return an equal number of batches in all distributed workers
     in spite of using a dynamic batch size, at the cost of skipping at most ``world_size - 1`` batches.
 
+    When the CutSet is a sharded manifest (see :mod:`lhotse.sharding`) that has at least ``world_size``
+    shards, and ``torch.distributed`` is initialized, the shards are assigned to the distributed nodes instead,
+    and each node reads and samples only from its own shards. The nodes then sample in lockstep
+    (synchronizing after each batch) and all of them stop as soon as any node runs out of data,
+    so that the number of batches is equal; the remaining batches of the other nodes are dropped,
+    so the shards should be of similar size (which is the case for :meth:`CutSet.to_shards`).
+
     Example usage::
 
         >>> dataset = K2SpeechRecognitionDataset(cuts)
@@ -75,6 +83,8 @@ class CutSampler(Sampler):
         self.provide_len = provide_len
 
         self._maybe_init_distributed(world_size=world_size, rank=rank)
+        self.shards_assigned = False
+        self._sync_group = None
         self.num_batches = None
         self._filter_fn: Optional[Callable[[Cut], bool]] = None
         self.diagnostics = SamplingDiagnostics()
@@ -92,6 +102,43 @@ class CutSampler(Sampler):
         self.rank = dist.get_rank() if rank is None else rank
         assert self.rank < self.world_size
 
+    def _maybe_assign_shards(self, *cut_sets: CutSet) -> Tuple[CutSet, ...]:
+        """
+        When all of ``cut_sets`` are sharded manifests with the same number of shards (that is at least
+        equal to ``world_size``), return the CutSets restricted to the shards of this node.
+        Otherwise, return the CutSets unchanged, and we'll fall back to sampling ``world_size`` batches
+        and returning one of them.
+
+        The nodes have to agree on when to stop sampling, which requires an initialized ``torch.distributed``
+        process group with ``world_size`` nodes; the sampler creates a separate (gloo) group for that,
+        so all the nodes have to create their samplers in the same order.
+        """
+        from lhotse.sharding import ShardedJsonlIterator
+        self.shards_assigned = False
+        self._sync_group = None
+        if self.world_size == 1 or not all(isinstance(cs.cuts, ShardedJsonlIterator) for cs in cut_sets):
+            return cut_sets
+        if not dist.is_available() or not dist.is_initialized() or dist.get_world_size() != self.world_size:
+            warnings.warn(
+                "Sharded CutSet detected, but the shards can't be assigned to distributed nodes "
+                "without an initialized torch.distributed process group (with world_size nodes) "
+                "to synchronize the end of sampling. Each node will read all the shards."
+            )
+            return cut_sets
+        num_shards = {cs.cuts.num_shards for cs in cut_sets}
+        if len(num_shards) > 1 or num_shards.pop() < self.world_size:
+            warnings.warn(
+                "Sharded CutSet detected, but the shards can't be assigned to distributed nodes "
+                "(the number of shards is lower than the world size or differs between CutSets). "
+                "Each node will read all the shards."
+            )
+            return cut_sets
+        self.shards_assigned = True
+        self._sync_group = dist.new_group(backend='gloo')
+        return tuple(
+            CutSet(cs.cuts.select_shards(rank=self.rank, world_size=self.world_size)) for cs in cut_sets
+        )
+
     def set_epoch(self, epoch: int) -> None:
         """
         Sets the epoch for this sampler. When :attr:`shuffle=True`, this ensures all replicas
@@ -170,6 +217,17 @@ class CutSampler(Sampler):
         return self.num_batches
 
     def __next__(self):
+        if self.shards_assigned:
+            # Each node samples from its own shards, which may yield different numbers of batches.
+            # The nodes check that all of them have the next batch before returning it,
+            # so that they stop together when any of them runs out of data.
+            try:
+                batch = self._next_batch()
+            except StopIteration:
+                batch = None
+            if not self._all_nodes_have_batch(batch is not None):
+                raise StopIteration()
+            return batch
         # We use the following trick to ensure equal number of batches for each distributed
         # worker:
         # Every time a next batch is required, we will sample self.world_size batches first,
@@ -181,6 +239,11 @@ class CutSampler(Sampler):
             batches.append(self._next_batch())
         return batches[self.rank]
 
+    def _all_nodes_have_batch(self, has_batch: bool) -> bool:
+        flag = torch.tensor([int(has_batch)], dtype=torch.int32)
+        dist.all_reduce(flag, op=dist.ReduceOp.MIN, group=self._sync_group)
+        return bool(flag.item())
+
     def get_report(self) -> str:
         """Returns a string describing the statistics of the sampling process so far."""
         return self.diagnostics.get_report()
@@ -1,7 +1,6 @@
 import random
 import warnings
 from functools import reduce
-from itertools import chain
 from operator import add
 from typing import Callable, Dict, List, Optional, Tuple, Type
 
@@ -334,25 +333,35 @@ def _create_buckets_equal_duration_single(
 
     See also: :meth:`.create_buckets_from_duration_percentiles`.
     """
-    total_duration = np.sum(c.duration for c in cuts)
+    if cuts.is_columnar:
+        # Read the durations from the columns to avoid creating the cut objects.
+        durations = cuts.cuts.column('duration').tolist()
+    else:
+        cuts = list(cuts)
+        durations = [c.duration for c in cuts]
+    total_duration = np.sum(durations)
     bucket_duration = total_duration / num_buckets
-    iter_cuts = iter(cuts)
-    buckets = []
+    bucket_ranges = []
+    pos = 0
     for bucket_idx in range(num_buckets):
-        bucket = []
+        begin = pos
         current_duration = 0
-        try:
-            while current_duration < bucket_duration:
-                bucket.append(next(iter_cuts))
-                current_duration += bucket[-1].duration
+        exhausted = False
+        while current_duration < bucket_duration:
+            if pos >= len(durations):
+                exhausted = True
+                break
+            current_duration += durations[pos]
+            pos += 1
+        if exhausted:
+            assert bucket_idx == num_buckets - 1
+        elif bucket_idx % 2:
             # Every odd bucket, take the cut that exceeded the bucket's duration
             # and put it in the front of the iterable, so that it goes to the
             # next bucket instead. It will ensure that the last bucket is not too
             # thin (otherwise all the previous buckets are a little too large).
-            if bucket_idx % 2:
-                last_cut = bucket.pop()
-                iter_cuts = chain([last_cut], iter_cuts)
-        except StopIteration:
-            assert bucket_idx == num_buckets - 1
-        buckets.append(CutSet.from_cuts(bucket))
-    return buckets
+            pos -= 1
+        bucket_ranges.append((begin, pos))
+    if isinstance(cuts, CutSet):
+        return [CutSet(cuts=cuts.cuts.select(np.arange(begin, end))) for begin, end in bucket_ranges]
+    return [CutSet.from_cuts(cuts[begin:end]) for begin, end in bucket_ranges]
@@ -64,6 +64,7 @@ class CutPairsSampler(CutSampler):
             rank=rank,
             seed=seed,
         )
+        source_cuts, target_cuts = self._maybe_assign_shards(source_cuts, target_cuts)
         self.source_cuts = DataSource(source_cuts)
         self.target_cuts = DataSource(target_cuts)
         # Constraints
@@ -4,6 +4,7 @@ from typing import Generator, Iterable, Optional
 
 from lhotse import CutSet
 from lhotse.cut import Cut
+from lhotse.sharding import ShardedJsonlIterator
 
 
 class DataSource:
@@ -19,7 +20,11 @@ class DataSource:
         self._iter = None
         self._reusable = deque()
         # Add duration tracking for non-lazy CutSets
-        if not self.is_lazy:
+        if self._orig_items.is_columnar:
+            # Columnar CutSets provide the durations without creating the cut objects.
+            self._total_duration = float(self._orig_items.cuts.column('duration').sum())
+            self._total_cuts = len(self._orig_items)
+        elif not self.is_lazy:
             self._total_duration = sum(c.duration for c in self._orig_items)
             self._total_cuts = len(self._orig_items)
         else:
@@ -49,7 +54,11 @@ class DataSource:
         self.reset()
         r = random.Random(seed)
         if self._orig_items.is_lazy:
-            self._shuffled_items = streaming_shuffle(iter(self._orig_items), rng=r)
+            items = self._orig_items
+            if isinstance(items.cuts, ShardedJsonlIterator):
+                # For sharded manifests, we also shuffle the order in which the shards are read.
+                items = CutSet(items.cuts.shuffle_shards(rng=r))
+            self._shuffled_items = streaming_shuffle(iter(items), rng=r)
         else:
             self._shuffled_items = self._orig_items.shuffle(rng=r)
         return self
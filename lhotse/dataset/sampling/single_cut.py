@@ -66,6 +66,7 @@ class SingleCutSampler(CutSampler):
             rank=rank,
             seed=seed,
         )
+        cuts, = self._maybe_assign_shards(cuts)
         self.data_source = DataSource(cuts)
         self.time_constraint = TimeConstraint(
             max_duration=max_duration, max_frames=max_frames, max_samples=max_samples
@@ -10,10 +10,14 @@ from .fbank import (
     FbankConfig
 )
 from .io import (
+    ArenaMmapPool,
+    ChunkedCompressedHdf5Reader,
+    ChunkedCompressedHdf5Writer,
     ChunkedLilcomHdf5Reader,
     ChunkedLilcomHdf5Writer,
     FeaturesReader,
     FeaturesWriter,
+    Hdf5HandlePool,
     KaldiReader,
     LilcomFilesReader,
     LilcomFilesWriter,
@@ -25,8 +29,16 @@ from .io import (
     NumpyFilesWriter,
     NumpyHdf5Reader,
     NumpyHdf5Writer,
+    NumpyMmapArenaReader,
+    NumpyMmapArenaWriter,
+    QuantizedHdf5Reader,
+    QuantizedHdf5Writer,
     available_storage_backends,
-    close_cached_file_handles
+    close_cached_file_handles,
+    get_arena_mmap_pool,
+    get_hdf5_handle_pool,
+    set_arena_mmap_pool,
+    set_hdf5_handle_pool
 )
 from .kaldi.extractors import (
     KaldiFbank,
@@ -45,6 +57,9 @@ from .mfcc import (
 from .mixer import (
     FeatureMixer
 )
+from .pipeline import (
+    FeatureExtractionPipeline
+)
 from .spectrogram import (
     Spectrogram,
     SpectrogramConfig
@@ -3,12 +3,13 @@ import multiprocessing
 import pickle
 import warnings
 from abc import ABCMeta, abstractmethod
+from collections import defaultdict
 from concurrent.futures.process import ProcessPoolExecutor
 from dataclasses import asdict, dataclass, is_dataclass
 from itertools import chain
 from math import isclose
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Type, Union
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Type, Union
 
 import numpy as np
 import torch
@@ -36,21 +37,30 @@ class FeatureExtractor(metaclass=ABCMeta):
     * the ``extract`` method,
     * the ``frame_shift`` property.
 
+    Feature extractors that can process multiple recordings at once may override ``extract_batch``.
+
     Feature extractors that support feature-domain mixing should additionally specify two static methods:
 
     * ``compute_energy``, and
     * ``mix``.
 
+    The extractors of log-energy features, whose ``mix`` is ``log(exp(features_a) + gain * exp(features_b))``
+    (e.g. log-Mel filter banks), should set the ``mixes_log_energies`` class attribute to ``True``;
+    it lets the ``FeatureMixer`` mix any number of tracks in a single pass in the energy domain.
+
     By itself, the ``FeatureExtractor`` offers the following high-level methods
     that are not intended for overriding:
 
     * ``extract_from_samples_and_store``
+    * ``extract_batch_from_samples_and_store``
     * ``extract_from_recording_and_store``
+    * ``store_and_describe``
 
     These methods run a larger feature extraction pipeline that involves data augmentation and disk storage.
     """
     name = None
     config_type = None
+    mixes_log_energies = False
 
     def __init__(self, config: Optional[Any] = None):
         if config is None:
@@ -67,6 +77,17 @@ class FeatureExtractor(metaclass=ABCMeta):
         """
         pass
 
+    def extract_batch(self, samples: List[np.ndarray], sampling_rate: int) -> List[np.ndarray]:
+        """
+        Extract the features for a batch of audio arrays with the same sampling rate.
+        The default implementation calls ``extract`` for each of them; feature extractors that
+        are able to process a padded batch at once (e.g. with a single call to a ``torch`` module)
+        may override it to speed up the extraction.
+
+        :return: a list of numpy ndarrays with feature matrices, in the same order as ``samples``.
+        """
+        return [self.extract(samples=s, sampling_rate=sampling_rate) for s in samples]
+
     @property
     @abstractmethod
     def frame_shift(self) -> Seconds:
@@ -141,11 +162,66 @@ class FeatureExtractor(metaclass=ABCMeta):
         :param augment_fn: an optional ``WavAugmenter`` instance to modify the waveform before feature extraction.
         :return: a ``Features`` manifest item for the extracted feature matrix (it is not written to disk).
         """
-        from lhotse.qa import validate_features
         if augment_fn is not None:
             samples = augment_fn(samples, sampling_rate)
         duration = round(samples.shape[1] / sampling_rate, ndigits=8)
         feats = self.extract(samples=samples, sampling_rate=sampling_rate)
+        return self.store_and_describe(
+            feats, storage=storage, sampling_rate=sampling_rate, duration=duration, offset=offset, channel=channel
+        )
+
+    def extract_batch_from_samples_and_store(
+            self,
+            samples: List[np.ndarray],
+            storage: FeaturesWriter,
+            sampling_rate: int,
+            offsets: Sequence[Seconds],
+            channels: Sequence[Optional[int]],
+            augment_fn: Optional[AugmentFn] = None,
+    ) -> List['Features']:
+        """
+        A batched variant of ``extract_from_samples_and_store``: the features for all items in ``samples``
+        are computed with a single call to ``extract_batch`` and stored one by one.
+
+        :param samples: a list of numpy ndarrays with the audio samples.
+        :param storage: a ``FeaturesWriter`` object that will handle storing the feature matrices.
+        :param sampling_rate: integer sampling rate of all ``samples``.
+        :param offsets: the offset in seconds of each item of ``samples`` (e.g. ``Cut.start``).
+        :param channels: the channel number to insert into each ``Features`` manifest.
+        :param augment_fn: an optional ``WavAugmenter`` instance to modify the waveforms before feature extraction.
+        :return: a list of ``Features`` manifests, in the same order as ``samples``.
+        """
+        assert len(samples) == len(offsets) == len(channels)
+        if augment_fn is not None:
+            samples = [augment_fn(s, sampling_rate) for s in samples]
+        all_feats = self.extract_batch(samples=samples, sampling_rate=sampling_rate)
+        return [
+            self.store_and_describe(
+                feats,
+                storage=storage,
+                sampling_rate=sampling_rate,
+                duration=round(s.shape[-1] / sampling_rate, ndigits=8),
+                offset=offset,
+                channel=channel,
+            )
+            for s, feats, offset, channel in zip(samples, all_feats, offsets, channels)
+        ]
+
+    def store_and_describe(
+            self,
+            feats: np.ndarray,
+            storage: FeaturesWriter,
+            sampling_rate: int,
+            duration: Seconds,
+            offset: Seconds = 0,
+            channel: Optional[int] = None,
+    ) -> 'Features':
+        """
+        Store a feature matrix computed by this extractor and return a validated ``Features`` manifest
+        describing it. It is the last step of ``extract_from_samples_and_store``, exposed separately
+        for pipelines that compute and store the features in different places.
+        """
+        from lhotse.qa import validate_features
         storage_key = store_feature_array(feats, storage=storage)
         manifest = Features(
             start=offset,
@@ -352,6 +428,21 @@ class Features:
     ) -> np.ndarray:
         # noinspection PyArgumentList
         storage = get_reader(self.storage_type)(self.storage_path)
+        left_offset_frames, right_offset_frames = self._frame_range(start=start, duration=duration)
+
+        # Load and return the features (subset) from the storage
+        return storage.read(
+            self.storage_key,
+            left_offset_frames=left_offset_frames,
+            right_offset_frames=right_offset_frames
+        )
+
+    def _frame_range(
+            self,
+            start: Optional[Seconds] = None,
+            duration: Optional[Seconds] = None,
+    ) -> Tuple[int, Optional[int]]:
+        """Convert the time range requested in ``load()`` to the range of frames to read from the storage."""
         left_offset_frames, right_offset_frames = 0, None
 
         if start is None:
@@ -368,13 +459,7 @@ class Features:
         if duration is not None:
             right_offset_frames = left_offset_frames + compute_num_frames(duration, frame_shift=self.frame_shift,
                                                                           sampling_rate=self.sampling_rate)
-
-        # Load and return the features (subset) from the storage
-        return storage.read(
-            self.storage_key,
-            left_offset_frames=left_offset_frames,
-            right_offset_frames=right_offset_frames
-        )
+        return left_offset_frames, right_offset_frames
 
     def with_path_prefix(self, path: Pathlike) -> 'Features':
         return fastcopy(self, storage_path=str(Path(path) / self.storage_path))
@@ -645,6 +730,34 @@ class FeatureSetBuilder:
         return results
 
 
+def load_features_many(
+        requests: Sequence[Tuple[Features, Optional[Seconds], Optional[Seconds]]]
+) -> List[np.ndarray]:
+    """
+    Load many feature matrices at once. The requests are grouped by their storage (e.g. an HDF5 file),
+    so that each storage is opened only once and read with ``FeaturesReader.read_many()``
+    (which typically reads the arrays in the order they are stored on disk).
+
+    :param requests: a sequence of ``(features, start, duration)`` tuples,
+        where ``start`` and ``duration`` have the same meaning as in :meth:`Features.load`.
+    :return: a list of feature matrices, in the same order as ``requests``.
+    """
+    groups = defaultdict(list)
+    for idx, (features, start, duration) in enumerate(requests):
+        groups[features.storage_type, features.storage_path].append(idx)
+    results = [None] * len(requests)
+    for (storage_type, storage_path), indices in groups.items():
+        # noinspection PyArgumentList
+        storage = get_reader(storage_type)(storage_path)
+        read_requests = []
+        for idx in indices:
+            features, start, duration = requests[idx]
+            read_requests.append((features.storage_key, *features._frame_range(start=start, duration=duration)))
+        for idx, arr in zip(indices, storage.read_many(read_requests)):
+            results[idx] = arr
+    return results
+
+
 def store_feature_array(
         feats: np.ndarray,
         storage: FeaturesWriter,
@@ -1,8 +1,11 @@
-from typing import List
+from functools import partial
+from typing import Iterable, List, Optional, Tuple
 
 import lilcom
 import numpy as np
 
+from lhotse.utils import is_module_available
+
 
 def lilcom_compress_chunked(
         data: np.ndarray, tick_power: int = -5, do_regression=True, chunk_size: int = 100
@@ -18,3 +21,93 @@ def lilcom_compress_chunked(
             )
         )
     return compressed
+
+
+QUANTIZATION_DTYPES = ('float16', 'int8', 'uint8')
+
+
+def quantize(data: np.ndarray, dtype: str = 'uint8') -> Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]:
+    """
+    Quantize a feature matrix of shape ``(num_frames, num_features)`` to ``dtype``.
+    For the integer dtypes, each feature bin (column) is linearly mapped to the range
+    of the integer type with its own scale and offset, so that ``data ~= q * scale + offset``.
+
+    :return: a tuple of (quantized array, scale, offset); scale and offset are float32 arrays
+        of shape ``(num_features,)``, or ``None`` for ``float16``.
+    """
+    assert dtype in QUANTIZATION_DTYPES, \
+        f'Unsupported quantization dtype: {dtype} (supported: {", ".join(QUANTIZATION_DTYPES)}).'
+    if dtype == 'float16':
+        return data.astype(np.float16), None, None
+    data = data.astype(np.float32, copy=False)
+    info = np.iinfo(dtype)
+    if data.shape[0] == 0:
+        lo = hi = np.zeros(data.shape[1], dtype=np.float32)
+    else:
+        lo, hi = data.min(axis=0), data.max(axis=0)
+    # int8 uses a symmetric range [-127, 127], so that the offset is the middle of the bin's range.
+    qmin = info.min + 1 if info.min < 0 else info.min
+    scale = (hi - lo) / (info.max - qmin)
+    scale[scale == 0] = 1.0
+    offset = lo - qmin * scale
+    q = np.clip(np.rint((data - offset) / scale), qmin, info.max).astype(dtype)
+    return q, scale.astype(np.float32), offset.astype(np.float32)
+
+
+def dequantize(q: np.ndarray, scale: Optional[np.ndarray] = None, offset: Optional[np.ndarray] = None) -> np.ndarray:
+    """Inverse of :func:`quantize` -- returns a float32 array."""
+    if scale is None:
+        return q.astype(np.float32)
+    # A single fused multiply-add over the whole slice (scale and offset are broadcast across frames).
+    out = q.astype(np.float32)
+    out *= scale
+    out += offset
+    return out
+
+
+BLOCK_CODECS = ('zstd', 'lz4')
+
+
+def _check_block_codec(codec: str) -> None:
+    if codec == 'zstd':
+        if not is_module_available('zstandard'):
+            raise ValueError("To use zstd-compressed features, please 'pip install zstandard' first.")
+    elif codec == 'lz4':
+        if not is_module_available('lz4'):
+            raise ValueError("To use lz4-compressed features, please 'pip install lz4' first.")
+    else:
+        raise ValueError(f'Unsupported codec: {codec} (supported: {", ".join(BLOCK_CODECS)}).')
+
+
+def block_compress_chunked(
+        data: np.ndarray, codec: str = 'zstd', level: Optional[int] = None, chunk_size: int = 100
+) -> List[bytes]:
+    """
+    Split a feature matrix into chunks of ``chunk_size`` frames and compress the raw bytes
+    of each chunk with a general-purpose block codec (``zstd`` or ``lz4``).
+    The dtype and the number of features are not stored -- they have to be known upon decompression.
+    """
+    _check_block_codec(codec)
+    data = np.ascontiguousarray(data)
+    if codec == 'zstd':
+        import zstandard
+        compressor = zstandard.ZstdCompressor(level=3 if level is None else level)
+        compress = compressor.compress
+    else:
+        import lz4.frame
+        compress = partial(lz4.frame.compress, compression_level=0 if level is None else level)
+    return [compress(data[begin: begin + chunk_size].tobytes()) for begin in range(0, data.shape[0], chunk_size)]
+
+
+def block_decompress_chunks(chunks: Iterable[bytes], codec: str, dtype: str, num_features: int) -> np.ndarray:
+    """Decompress and concatenate the chunks created by :func:`block_compress_chunked`."""
+    _check_block_codec(codec)
+    if codec == 'zstd':
+        import zstandard
+        decompress = zstandard.ZstdDecompressor().decompress
+    else:
+        import lz4.frame
+        decompress = lz4.frame.decompress
+    # Join the decompressed bytes first, so that a single array is created from them.
+    data = b''.join(decompress(chunk) for chunk in chunks)
+    return np.frombuffer(data, dtype=dtype).reshape(-1, num_features)
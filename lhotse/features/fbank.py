@@ -38,6 +38,7 @@ class Fbank(TorchaudioFeatureExtractor):
     name = 'fbank'
     config_type = FbankConfig
     feature_fn = staticmethod(torchaudio.compliance.kaldi.fbank)
+    mixes_log_energies = True
 
     def feature_dim(self, sampling_rate: int) -> int:
         return self.config.num_mel_bins
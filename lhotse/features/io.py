@@ -1,15 +1,22 @@
+import os
+import threading
 from abc import ABCMeta, abstractmethod
-from functools import lru_cache
+from collections import OrderedDict, defaultdict
 from math import ceil, floor
 from pathlib import Path
-from typing import List, Optional, Type
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type
 
 import lilcom
 import numpy as np
 
+from lhotse.features.kaldi_ark import clear_kaldi_scp_cache, close_ark_files, load_kaldi_scp, read_entry
 from lhotse.utils import Pathlike, is_module_available, SmartOpen
 
 
+# A request to read an array from a storage: ``(key, left_offset_frames, right_offset_frames)``.
+ReadRequest = Tuple[str, int, Optional[int]]
+
+
 class FeaturesWriter(metaclass=ABCMeta):
     """
     ``FeaturesWriter`` defines the interface of how to store numpy arrays in a particular storage backend.
@@ -34,6 +41,10 @@ class FeaturesWriter(metaclass=ABCMeta):
     might need to free a resource after the writing is finalized. By default nothing happens
     in the context manager functions, and this can be modified by the inheriting subclasses.
 
+    The ``flush()`` method should make sure that the arrays written so far are persisted,
+    so that they are readable even when the writer is not closed properly (e.g. the process is killed).
+    By default it does nothing, which is adequate for writers that store each array in a separate file.
+
     Example:
         with MyWriter('some/path') as storage:
             extractor.extract_from_recording_and_store(recording, storage)
@@ -52,6 +63,8 @@ class FeaturesWriter(metaclass=ABCMeta):
     @abstractmethod
     def write(self, key: str, value: np.ndarray) -> str: ...
 
+    def flush(self) -> None: ...
+
     def __enter__(self): return self
 
     def __exit__(self, *args, **kwargs): ...
@@ -79,6 +92,9 @@ class FeaturesReader(metaclass=ABCMeta):
         it is stored in the features manifests (metadata) and used to automatically deduce
         the backend when loading the features.
 
+    Readers may additionally override ``read_many()``, which reads several arrays at once
+    (e.g. in the order in which they are stored, to minimize the seeking and syscalls).
+
     The features writing must be defined separately in a class inheriting from ``FeaturesWriter``.
     """
 
@@ -94,6 +110,34 @@ class FeaturesReader(metaclass=ABCMeta):
             right_offset_frames: Optional[int] = None
     ) -> np.ndarray: ...
 
+    def read_many(self, requests: Sequence[ReadRequest]) -> List[np.ndarray]:
+        """
+        Read several arrays from this storage.
+
+        :param requests: a sequence of ``(key, left_offset_frames, right_offset_frames)`` tuples,
+            with the same meaning as the arguments of ``read()``.
+        :return: a list of arrays, in the same order as ``requests``.
+        """
+        return [self.read(key, left, right) for key, left, right in requests]
+
+
+def read_in_order(
+        reader: FeaturesReader,
+        requests: Sequence[ReadRequest],
+        position: Callable[[str], Any],
+) -> List[np.ndarray]:
+    """
+    Helper used to implement ``FeaturesReader.read_many()``: it reads the arrays in the order
+    given by their ``position`` in the storage (e.g. a byte offset in a file),
+    but returns them in the order of ``requests``.
+    """
+    order = sorted(range(len(requests)), key=lambda idx: position(requests[idx][0]))
+    results = [None] * len(requests)
+    for idx in order:
+        key, left, right = requests[idx]
+        results[idx] = reader.read(key, left, right)
+    return results
+
 
 READER_BACKENDS = {}
 WRITER_BACKENDS = {}
@@ -280,37 +324,196 @@ Non-compressed numpy arrays, stored in HDF5 file.
 """
 
 
-@lru_cache(maxsize=None)
+class Hdf5HandlePool:
+    """
+    A bounded pool of read-only ``h5py.File`` handles used by the HDF5 readers.
+    Opening an HDF5 file is expensive, so the handles are kept open and re-used
+    when the readers are instantiated and destroyed in a loop repeatedly (frequent use-case).
+
+    At most ``max_open`` files are kept open; when the limit is exceeded,
+    the least recently used handle is closed. This matters when a manifest references
+    thousands of HDF5 files (e.g. ``feats-{i}.h5`` shards), which would exhaust the file descriptors otherwise.
+
+    h5py handles cannot be safely used in a forked process (e.g. a DataLoader worker),
+    so the pool detects that it is used in a different process than the one that opened the handles,
+    and discards them (without closing) to re-open the files in the new process.
+
+    The ``rdcc_*`` arguments configure the HDF5 chunk cache of each opened file
+    (see ``h5py.File`` documentation); by default, h5py's defaults are used.
+
+    Use :func:`set_hdf5_handle_pool` to configure the pool, and :func:`get_hdf5_handle_pool`
+    to inspect its statistics.
+    """
+
+    def __init__(
+            self,
+            max_open: int = 128,
+            rdcc_nbytes: Optional[int] = None,
+            rdcc_nslots: Optional[int] = None,
+            rdcc_w0: Optional[float] = None,
+    ) -> None:
+        assert max_open > 0, f"max_open has to be positive (got: {max_open})."
+        self.max_open = max_open
+        self.file_kwargs = {
+            k: v for k, v in
+            [('rdcc_nbytes', rdcc_nbytes), ('rdcc_nslots', rdcc_nslots), ('rdcc_w0', rdcc_w0)]
+            if v is not None
+        }
+        self._reset()
+
+    def _reset(self) -> None:
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._handles: 'OrderedDict[str, Any]' = OrderedDict()
+        self._chunk_sizes: Dict[str, int] = {}
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {'hits': 0, 'misses': 0, 'evictions': 0})
+
+    def _check_pid(self) -> None:
+        if os.getpid() != self._pid:
+            # We're in a forked process: the inherited handles (and the lock) must not be used.
+            self._reset()
+
+    def get(self, storage_path: Pathlike):
+        """Return an open read-only handle for the HDF5 file at ``storage_path``."""
+        self._check_pid()
+        path = str(storage_path)
+        with self._lock:
+            handle = self._handles.get(path)
+            if handle is not None:
+                self._handles.move_to_end(path)
+                self._stats[path]['hits'] += 1
+                return handle
+            import h5py
+            handle = h5py.File(path, 'r', **self.file_kwargs)
+            self._stats[path]['misses'] += 1
+            self._handles[path] = handle
+            while len(self._handles) > self.max_open:
+                evicted_path, evicted = self._handles.popitem(last=False)
+                self._chunk_sizes.pop(evicted_path, None)
+                self._stats[evicted_path]['evictions'] += 1
+                evicted.close()
+            return handle
+
+    def chunk_size(self, storage_path: Pathlike) -> int:
+        """Return the chunk size of a chunked lilcom HDF5 file (it is read only once for each opened file)."""
+        path = str(storage_path)
+        handle = self.get(path)
+        with self._lock:
+            if path not in self._chunk_sizes:
+                self._chunk_sizes[path] = handle[CHUNK_SIZE_KEY][()]  # [()] retrieves a scalar
+            return self._chunk_sizes[path]
+
+    @property
+    def num_open(self) -> int:
+        return len(self._handles)
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """The numbers of hits, misses (i.e. file openings) and evictions for each HDF5 file."""
+        self._check_pid()
+        with self._lock:
+            return {path: dict(counts) for path, counts in self._stats.items()}
+
+    def clear(self) -> None:
+        """Close all the handles in this pool."""
+        self._check_pid()
+        with self._lock:
+            for handle in self._handles.values():
+                handle.close()
+            self._handles.clear()
+            self._chunk_sizes.clear()
+
+
+def set_hdf5_handle_pool(
+        max_open: int = 128,
+        rdcc_nbytes: Optional[int] = None,
+        rdcc_nslots: Optional[int] = None,
+        rdcc_w0: Optional[float] = None,
+) -> Hdf5HandlePool:
+    """
+    Configure the pool of HDF5 file handles used by the readers in this process (see :class:`Hdf5HandlePool`).
+    The handles in the previous pool are closed. Returns the new pool object.
+    """
+    global _HDF5_HANDLE_POOL
+    _HDF5_HANDLE_POOL.clear()
+    _HDF5_HANDLE_POOL = Hdf5HandlePool(
+        max_open=max_open, rdcc_nbytes=rdcc_nbytes, rdcc_nslots=rdcc_nslots, rdcc_w0=rdcc_w0
+    )
+    return _HDF5_HANDLE_POOL
+
+
+def get_hdf5_handle_pool() -> Hdf5HandlePool:
+    """Return the pool of HDF5 file handles used by the readers in this process."""
+    return _HDF5_HANDLE_POOL
+
+
+_HDF5_HANDLE_POOL = Hdf5HandlePool()
+
+
 def lookup_cache_or_open(storage_path: str):
     """
     Helper internal function used in HDF5 readers.
-    It opens the HDF files and keeps their handles open in a global program cache
+    It returns a handle of the HDF file from a global pool of open handles (see :class:`Hdf5HandlePool`)
     to avoid excessive amount of syscalls when the *Reader class is instantiated
     and destroyed in a loop repeatedly (frequent use-case).
 
     The file handles can be freed at any time by calling ``close_cached_file_handles()``.
     """
-    import h5py
-    return h5py.File(storage_path, 'r')
+    return _HDF5_HANDLE_POOL.get(storage_path)
 
 
-@lru_cache(maxsize=None)
 def lookup_chunk_size(h5_file_handle) -> int:
     """
     Helper internal function to retrieve the chunk size from an HDF5 file.
     Helps avoid unnecessary repeated disk reads.
     """
-    return h5_file_handle[CHUNK_SIZE_KEY][()]  # [()] retrieves a scalar
+    return _HDF5_HANDLE_POOL.chunk_size(h5_file_handle.filename)
+
+
+def hdf5_dataset_offset(h5_file_handle, key: str) -> Tuple[bool, int]:
+    """
+    Helper internal function that returns a sort key with the byte offset of a dataset in an HDF5 file.
+    Datasets without a single contiguous storage (e.g. chunked) are sorted after the other ones.
+    """
+    offset = h5_file_handle[key].id.get_offset()
+    return offset is None, offset or 0
 
 
 def close_cached_file_handles() -> None:
-    """Closes the cached file handles in ``lookup_cache_or_open`` (see its docs for more details)."""
-    lookup_cache_or_open.cache_clear()
-    lookup_chunk_size.cache_clear()
+    """
+    Closes the cached file handles in ``lookup_cache_or_open``, the memory-mapped arenas
+    in ``lookup_arena_or_open`` and the Kaldi ark files (see their docs for more details).
+    """
+    _HDF5_HANDLE_POOL.clear()
+    _ARENA_MMAP_POOL.clear()
+    clear_kaldi_scp_cache()
+    close_ark_files()
+
+
+class _PooledHdf5Reader(FeaturesReader):
+    """
+    Base class of the readers of HDF5 files, which take the file handles from the global pool
+    (see :class:`Hdf5HandlePool`) and read the datasets of many requests in the order of their storage.
+    """
+
+    def __init__(self, storage_path: Pathlike, *args, **kwargs):
+        super().__init__()
+        self.storage_path = storage_path
+        lookup_cache_or_open(storage_path)
+
+    @property
+    def hdf(self):
+        # The handle is retrieved from the pool on each access, as it might have been
+        # evicted (and closed) or invalidated after a fork in the meantime.
+        return lookup_cache_or_open(self.storage_path)
+
+    def read_many(self, requests: Sequence[ReadRequest]) -> List[np.ndarray]:
+        # Read the datasets in the order in which they are stored in the file.
+        return read_in_order(self, requests, position=lambda key: hdf5_dataset_offset(self.hdf, key))
 
 
 @register_reader
-class NumpyHdf5Reader(FeaturesReader):
+class NumpyHdf5Reader(_PooledHdf5Reader):
     """
     Reads non-compressed numpy arrays from a HDF5 file with a "flat" layout.
     Each array is stored as a separate HDF ``Dataset`` because their shapes (numbers of frames) may vary.
@@ -319,10 +522,6 @@ class NumpyHdf5Reader(FeaturesReader):
     """
     name = 'numpy_hdf5'
 
-    def __init__(self, storage_path: Pathlike, *args, **kwargs):
-        super().__init__()
-        self.hdf = lookup_cache_or_open(storage_path)
-
     def read(
             self,
             key: str,
@@ -375,6 +574,9 @@ class NumpyHdf5Writer(FeaturesWriter):
         self.hdf.create_dataset(key, data=value)
         return key
 
+    def flush(self) -> None:
+        self.hdf.flush()
+
     def close(self) -> None:
         return self.hdf.close()
 
@@ -391,7 +593,7 @@ Lilcom-compressed numpy arrays, stored in HDF5 file.
 
 
 @register_reader
-class LilcomHdf5Reader(FeaturesReader):
+class LilcomHdf5Reader(_PooledHdf5Reader):
     """
     Reads lilcom-compressed numpy arrays from a HDF5 file with a "flat" layout.
     Each array is stored as a separate HDF ``Dataset`` because their shapes (numbers of frames) may vary.
@@ -400,10 +602,6 @@ class LilcomHdf5Reader(FeaturesReader):
     """
     name = 'lilcom_hdf5'
 
-    def __init__(self, storage_path: Pathlike, *args, **kwargs):
-        super().__init__()
-        self.hdf = lookup_cache_or_open(storage_path)
-
     def read(
             self,
             key: str,
@@ -461,6 +659,9 @@ class LilcomHdf5Writer(FeaturesWriter):
         self.hdf.create_dataset(key, data=np.void(serialized_feats))
         return key
 
+    def flush(self) -> None:
+        self.hdf.flush()
+
     def close(self) -> None:
         return self.hdf.close()
 
@@ -481,7 +682,7 @@ CHUNK_SIZE_KEY = '__LHOTSE_INTERNAL_CHUNK_SIZE__'
 
 
 @register_reader
-class ChunkedLilcomHdf5Reader(FeaturesReader):
+class ChunkedLilcomHdf5Reader(_PooledHdf5Reader):
     """
     Reads lilcom-compressed numpy arrays from a HDF5 file with chunked lilcom storage.
     Each feature matrix is stored in an array of chunks - binary data compressed with lilcom.
@@ -492,10 +693,6 @@ class ChunkedLilcomHdf5Reader(FeaturesReader):
     """
     name = 'chunked_lilcom_hdf5'
 
-    def __init__(self, storage_path: Pathlike, *args, **kwargs):
-        super().__init__()
-        self.hdf = lookup_cache_or_open(storage_path)
-
     def read(
             self,
             key: str,
@@ -570,7 +767,7 @@ class ChunkedLilcomHdf5Writer(FeaturesWriter):
         self.hdf = h5py.File(self.storage_path, mode=mode)
         if CHUNK_SIZE_KEY in self.hdf:
             retrieved_chunk_size = self.hdf[CHUNK_SIZE_KEY][()]
-            assert retrieved_chunk_size == CHUNK_SIZE_KEY, \
+            assert retrieved_chunk_size == self.chunk_size, \
                 f'Error: attempted to write with chunk size {self.chunk_size} to an h5py file that ' \
                 f'was created with chunk size {retrieved_chunk_size}.'
         else:
@@ -594,6 +791,99 @@ class ChunkedLilcomHdf5Writer(FeaturesWriter):
             dset[idx] = np.frombuffer(feat, dtype=np.uint8)
         return key
 
+    def flush(self) -> None:
+        self.hdf.flush()
+
+    def close(self) -> None:
+        return self.hdf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+"""
+Quantized numpy arrays (float16, or int8/uint8 with per-bin scales), stored in HDF5 file.
+"""
+
+
+@register_reader
+class QuantizedHdf5Reader(_PooledHdf5Reader):
+    """
+    Reads quantized numpy arrays from a HDF5 file with a "flat" layout.
+    Only the requested frames are read from the file, and they are de-quantized
+    to float32 with a single vectorized operation.
+
+    ``storage_path`` corresponds to the HDF5 file path;
+    ``storage_key`` for each utterance is the key corresponding to the array (i.e. HDF5 "Group" name).
+    """
+    name = 'quantized_hdf5'
+
+    def read(
+            self,
+            key: str,
+            left_offset_frames: int = 0,
+            right_offset_frames: Optional[int] = None
+    ) -> np.ndarray:
+        from lhotse.features.compression import dequantize
+        dset = self.hdf[key]
+        attrs = dset.attrs
+        if 'scale' in attrs:
+            return dequantize(dset[left_offset_frames: right_offset_frames], attrs['scale'], attrs['offset'])
+        return dequantize(dset[left_offset_frames: right_offset_frames])
+
+
+@register_writer
+class QuantizedHdf5Writer(FeaturesWriter):
+    """
+    Writes quantized numpy arrays to a HDF5 file with a "flat" layout.
+    The arrays are stored either as ``float16``, or as ``int8``/``uint8`` where each feature bin
+    is linearly quantized with its own scale and offset (kept in the attributes of the HDF5 ``Dataset``).
+    Compared to lilcom, it compresses less (2x for ``float16``, 4x for 8-bit types),
+    but decoding is much faster and a slice of frames can be read without decoding the whole matrix.
+
+    ``storage_path`` corresponds to the HDF5 file path;
+    ``storage_key`` for each utterance is the key corresponding to the array (i.e. HDF5 "Group" name).
+    """
+    name = 'quantized_hdf5'
+
+    def __init__(self, storage_path: Pathlike, dtype: str = 'uint8', mode: str = 'w', *args, **kwargs):
+        """
+        :param storage_path: Path under which we'll create the HDF5 file.
+            We will add a ``.h5`` suffix if it is not already in ``storage_path``.
+        :param dtype: The dtype in which the arrays are stored: ``float16``, ``int8`` or ``uint8``.
+        :param mode: Modes supported by h5py:
+            w        Create file, truncate if exists (default)
+            w- or x  Create file, fail if exists
+            a        Read/write if exists, create otherwise
+        """
+        super().__init__()
+        import h5py
+        from lhotse.features.compression import QUANTIZATION_DTYPES
+        assert dtype in QUANTIZATION_DTYPES, \
+            f'Unsupported dtype: {dtype} (supported: {", ".join(QUANTIZATION_DTYPES)}).'
+        self.storage_path_ = Path(storage_path).with_suffix('.h5')
+        self.dtype = dtype
+        self.hdf = h5py.File(self.storage_path, mode=mode)
+
+    @property
+    def storage_path(self) -> str:
+        return str(self.storage_path_)
+
+    def write(self, key: str, value: np.ndarray) -> str:
+        from lhotse.features.compression import quantize
+        q, scale, offset = quantize(value, dtype=self.dtype)
+        dset = self.hdf.create_dataset(key, data=q)
+        if scale is not None:
+            dset.attrs['scale'] = scale
+            dset.attrs['offset'] = offset
+        return key
+
+    def flush(self) -> None:
+        self.hdf.flush()
+
     def close(self) -> None:
         return self.hdf.close()
 
@@ -604,6 +894,395 @@ class ChunkedLilcomHdf5Writer(FeaturesWriter):
         self.close()
 
 
+"""
+Numpy arrays compressed with a general-purpose block codec (zstd or lz4), stored in HDF5 file
+in chunks of frames (like the chunked lilcom storage).
+"""
+
+CODEC_KEY = '__LHOTSE_INTERNAL_CODEC__'
+
+
+@register_reader
+class ChunkedCompressedHdf5Reader(_PooledHdf5Reader):
+    """
+    Reads zstd- or lz4-compressed numpy arrays from a HDF5 file with chunked storage.
+    Each feature matrix is stored in an array of chunks - the raw bytes of ``chunk_size`` frames
+    compressed with the codec recorded in the file.
+    Upon reading, we check how many chunks need to be retrieved to avoid excessive I/O and decoding.
+
+    ``storage_path`` corresponds to the HDF5 file path;
+    ``storage_key`` for each utterance is the key corresponding to the array (i.e. HDF5 "Group" name).
+
+    .. caution::
+        Requires ``zstandard`` or ``lz4`` to be installed, depending on the codec.
+    """
+    name = 'chunked_compressed_hdf5'
+
+    def __init__(self, storage_path: Pathlike, *args, **kwargs):
+        super().__init__(storage_path)
+        self.codec = self.hdf.attrs[CODEC_KEY]
+
+    def read(
+            self,
+            key: str,
+            left_offset_frames: int = 0,
+            right_offset_frames: Optional[int] = None
+    ) -> np.ndarray:
+        from lhotse.features.compression import block_decompress_chunks
+        chunk_size = lookup_chunk_size(self.hdf)
+        left_chunk_idx = left_offset_frames // chunk_size
+        right_chunk_idx = ceil(right_offset_frames / chunk_size) if right_offset_frames is not None else None
+        dset = self.hdf[key]
+        arr = block_decompress_chunks(
+            (data.tobytes() for data in dset[left_chunk_idx: right_chunk_idx]),
+            codec=self.codec,
+            dtype=dset.attrs['dtype'],
+            num_features=int(dset.attrs['num_features']),
+        )
+        # The decoded data starts at the beginning of the first chunk that was read.
+        shift_frames = chunk_size * left_chunk_idx
+        right_offset_shift = right_offset_frames - shift_frames if right_offset_frames is not None else None
+        # The decoded array is a read-only view of the decompressed bytes, in the storage dtype (possibly float16);
+        # like the other readers, return a (writable) float32 array.
+        return arr[left_offset_frames - shift_frames: right_offset_shift].astype(np.float32)
+
+
+@register_writer
+class ChunkedCompressedHdf5Writer(FeaturesWriter):
+    """
+    Writes zstd- or lz4-compressed numpy arrays to a HDF5 file with chunked storage.
+    Each feature matrix is stored in an array of chunks - the raw bytes of ``chunk_size`` frames
+    compressed with a general-purpose block codec. The compression is lossless
+    (with respect to ``dtype``), and decoding is considerably faster than lilcom.
+
+    ``storage_path`` corresponds to the HDF5 file path;
+    ``storage_key`` for each utterance is the key corresponding to the array (i.e. HDF5 "Group" name).
+
+    .. caution::
+        Requires ``zstandard`` or ``lz4`` to be installed, depending on the codec.
+    """
+    name = 'chunked_compressed_hdf5'
+
+    def __init__(
+            self,
+            storage_path: Pathlike,
+            codec: str = 'zstd',
+            level: Optional[int] = None,
+            dtype: str = 'float32',
+            chunk_size: int = 100,
+            mode: str = 'w',
+            *args,
+            **kwargs
+    ):
+        """
+        :param storage_path: Path under which we'll create the HDF5 file.
+            We will add a ``.h5`` suffix if it is not already in ``storage_path``.
+        :param codec: The compression codec: ``zstd`` or ``lz4``.
+        :param level: The compression level (codec-specific; by default, 3 for zstd and 0 for lz4).
+        :param dtype: The dtype in which the arrays are stored: ``float32`` or ``float16``.
+        :param chunk_size: How many frames to store per chunk.
+            Too low a number will require many reads for long feature matrices
+            (and worse compression ratio), too high a number will require to read more redundant data.
+        :param mode: Modes supported by h5py:
+            w        Create file, truncate if exists (default)
+            w- or x  Create file, fail if exists
+            a        Read/write if exists, create otherwise
+        """
+        super().__init__()
+        import h5py
+        from lhotse.features.compression import _check_block_codec
+        _check_block_codec(codec)
+        assert dtype in ('float32', 'float16'), f'Unsupported dtype: {dtype} (supported: float32, float16).'
+        self.storage_path_ = Path(storage_path).with_suffix('.h5')
+        self.codec = codec
+        self.level = level
+        self.dtype = dtype
+        self.chunk_size = chunk_size
+        self.hdf = h5py.File(self.storage_path, mode=mode)
+        if CHUNK_SIZE_KEY in self.hdf:
+            retrieved_chunk_size = self.hdf[CHUNK_SIZE_KEY][()]
+            retrieved_codec = self.hdf.attrs[CODEC_KEY]
+            assert retrieved_chunk_size == self.chunk_size and retrieved_codec == self.codec, \
+                f'Error: attempted to write with chunk size {self.chunk_size} and codec {self.codec} to an ' \
+                f'h5py file that was created with chunk size {retrieved_chunk_size} and codec {retrieved_codec}.'
+        else:
+            self.hdf.create_dataset(CHUNK_SIZE_KEY, data=self.chunk_size)
+            self.hdf.attrs[CODEC_KEY] = self.codec
+
+    @property
+    def storage_path(self) -> str:
+        return str(self.storage_path_)
+
+    def write(self, key: str, value: np.ndarray) -> str:
+        import h5py
+        from lhotse.features.compression import block_compress_chunked
+        value = np.asarray(value, dtype=self.dtype)
+        serialized_feats = block_compress_chunked(
+            value, codec=self.codec, level=self.level, chunk_size=self.chunk_size
+        )
+        dset = self.hdf.create_dataset(
+            key, dtype=h5py.vlen_dtype(np.dtype('uint8')), shape=(len(serialized_feats),)
+        )
+        dset.attrs['dtype'] = self.dtype
+        dset.attrs['num_features'] = value.shape[1]
+        for idx, feat in enumerate(serialized_feats):
+            dset[idx] = np.frombuffer(feat, dtype=np.uint8)
+        return key
+
+    def flush(self) -> None:
+        self.hdf.flush()
+
+    def close(self) -> None:
+        return self.hdf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+"""
+Raw numpy arrays appended to a few large flat files ("arenas"), read with memory mapping.
+"""
+
+# The arrays in an arena file are aligned to this many bytes.
+ARENA_ALIGNMENT = 64
+# When an arena file reaches this size, the writer continues in a new file.
+ARENA_MAX_FILE_SIZE = 4 * 1024 ** 3
+_ARENA_FILENAME_PATTERN = 'arena-{:05d}.bin'
+
+
+class ArenaMmapPool:
+    """
+    A bounded pool of the memory maps of the arena files read by :class:`NumpyMmapArenaReader`.
+    Mapping a file costs a few system calls, so the maps are kept and re-used across the reads.
+
+    At most ``max_open`` files are kept mapped; when the limit is exceeded, the least recently used map is
+    released (the memory is unmapped once no array refers to it anymore).
+    As with :class:`Hdf5HandlePool`, the pool detects that it is used in a different (e.g. forked)
+    process than the one that created the maps, and maps the files again in the new process.
+
+    Use :func:`set_arena_mmap_pool` to configure the pool, and :func:`get_arena_mmap_pool` to inspect it.
+    """
+
+    def __init__(self, max_open: int = 128) -> None:
+        assert max_open > 0, f"max_open has to be positive (got: {max_open})."
+        self.max_open = max_open
+        self._reset()
+
+    def _reset(self) -> None:
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._mmaps: 'OrderedDict[str, np.memmap]' = OrderedDict()
+
+    def get(self, path: str, min_size: int = 0) -> np.memmap:
+        """
+        Return the memory map of the arena file at ``path``. The file is mapped again when the map is smaller
+        than ``min_size`` (i.e. the arena has grown since it was mapped).
+        """
+        if os.getpid() != self._pid:
+            self._reset()
+        with self._lock:
+            mm = self._mmaps.get(path)
+            if mm is None or len(mm) < min_size:
+                mm = np.memmap(path, dtype=np.uint8, mode='r')
+                self._mmaps[path] = mm
+            self._mmaps.move_to_end(path)
+            while len(self._mmaps) > self.max_open:
+                self._mmaps.popitem(last=False)
+            return mm
+
+    @property
+    def num_open(self) -> int:
+        return len(self._mmaps)
+
+    def clear(self) -> None:
+        """Release all the memory maps in this pool."""
+        with self._lock:
+            self._mmaps.clear()
+
+
+def set_arena_mmap_pool(max_open: int = 128) -> ArenaMmapPool:
+    """
+    Configure the pool of arena file memory maps used by the readers in this process (see :class:`ArenaMmapPool`).
+    Returns the new pool object.
+    """
+    global _ARENA_MMAP_POOL
+    _ARENA_MMAP_POOL.clear()
+    _ARENA_MMAP_POOL = ArenaMmapPool(max_open=max_open)
+    return _ARENA_MMAP_POOL
+
+
+def get_arena_mmap_pool() -> ArenaMmapPool:
+    """Return the pool of arena file memory maps used by the readers in this process."""
+    return _ARENA_MMAP_POOL
+
+
+_ARENA_MMAP_POOL = ArenaMmapPool()
+
+
+def lookup_arena_or_open(path: str, min_size: int = 0) -> np.memmap:
+    """
+    Helper internal function used in the arena reader.
+    It returns the memory map of an arena file from a global pool (see :class:`ArenaMmapPool`),
+    so that reading a feature matrix costs no system calls at all.
+    An arena is re-mapped when it is smaller than ``min_size`` (i.e. it has grown since it was mapped).
+
+    The mappings can be freed at any time by calling ``close_cached_file_handles()``.
+    """
+    return _ARENA_MMAP_POOL.get(path, min_size=min_size)
+
+
+def parse_arena_key(key: str) -> Tuple[str, int, Tuple[int, int], np.dtype]:
+    """
+    Parse the ``storage_key`` created by :class:`NumpyMmapArenaWriter`,
+    e.g. ``"arena-00000.bin:1048576:1604:80:float32"``.
+
+    :return: a tuple of (arena file name, byte offset, array shape, array dtype).
+    """
+    filename, offset, num_frames, num_features, dtype = key.split(':')
+    return filename, int(offset), (int(num_frames), int(num_features)), np.dtype(dtype)
+
+
+@register_reader
+class NumpyMmapArenaReader(FeaturesReader):
+    """
+    Reads non-compressed numpy arrays from the arena files created by :class:`NumpyMmapArenaWriter`.
+    ``storage_path`` corresponds to the directory with the arena files;
+    ``storage_key`` for each utterance encodes the arena file name, the byte offset, the shape and the dtype
+    of the array, so that no index lookup is needed to read it.
+
+    The arena files are memory-mapped (see :class:`ArenaMmapPool`) and only the requested frames
+    are ever read from the disk. Arrays stored as float32 are returned as read-only, zero-copy views
+    of the memory map (e.g. :func:`~lhotse.dataset.collation.collate_features` copies them straight
+    into the batch); arrays stored as float16 are converted to (writable) float32 copies.
+    """
+    name = 'numpy_mmap_arena'
+
+    def __init__(self, storage_path: Pathlike, *args, **kwargs):
+        super().__init__()
+        self.storage_path = Path(storage_path)
+
+    def read(
+            self,
+            key: str,
+            left_offset_frames: int = 0,
+            right_offset_frames: Optional[int] = None
+    ) -> np.ndarray:
+        filename, offset, (num_frames, num_features), dtype = parse_arena_key(key)
+        begin, end, _ = slice(left_offset_frames, right_offset_frames).indices(num_frames)
+        num_selected = max(0, end - begin)
+        frame_bytes = num_features * dtype.itemsize
+        arena = lookup_arena_or_open(
+            str(self.storage_path / filename), min_size=offset + num_frames * frame_bytes
+        )
+        view = np.ndarray(
+            shape=(num_selected, num_features),
+            dtype=dtype,
+            buffer=arena,
+            offset=offset + begin * frame_bytes,
+        )
+        if view.dtype == np.float32:
+            return view
+        return view.astype(np.float32)
+
+    def read_many(self, requests: Sequence[ReadRequest]) -> List[np.ndarray]:
+        # Read the arrays in the order in which they are stored in the arena files.
+        return read_in_order(self, requests, position=lambda key: parse_arena_key(key)[:2])
+
+
+@register_writer
+class NumpyMmapArenaWriter(FeaturesWriter):
+    """
+    Writes non-compressed numpy arrays by appending them to a few large files ("arenas") in a directory.
+    ``storage_path`` corresponds to the directory path;
+    ``storage_key`` for each utterance encodes the arena file name, the byte offset, the shape and the dtype
+    of the array (e.g. ``"arena-00000.bin:1048576:1604:80:float32"``) - so the storage keys in the
+    feature manifests are the index of the arenas.
+
+    It is the fastest backend to read from (see :class:`NumpyMmapArenaReader`),
+    at the cost of no compression (except for the optional ``float16`` storage).
+    """
+    name = 'numpy_mmap_arena'
+
+    def __init__(
+            self,
+            storage_path: Pathlike,
+            dtype: str = 'float32',
+            max_file_size: int = ARENA_MAX_FILE_SIZE,
+            mode: str = 'w',
+            *args,
+            **kwargs
+    ):
+        """
+        :param storage_path: Path to the directory where we'll create the arena files.
+        :param dtype: The dtype in which the arrays are stored: ``float32`` or ``float16``.
+        :param max_file_size: When an arena file reaches this size (in bytes), the next arrays
+            are written to a new one.
+        :param mode: Modes similar to h5py:
+            w        Create the arenas, remove the existing ones (default)
+            a        Append to the existing arenas, create them otherwise
+        """
+        super().__init__()
+        self.dtype = np.dtype(dtype)
+        assert self.dtype in (np.float32, np.float16), \
+            f'Unsupported dtype for the arena storage: {dtype} (supported: float32, float16).'
+        assert mode in ('w', 'a'), f'Unsupported mode: {mode} (supported: "w", "a").'
+        self.storage_path_ = Path(storage_path)
+        self.storage_path_.mkdir(parents=True, exist_ok=True)
+        self.max_file_size = max_file_size
+        existing = sorted(self.storage_path_.glob('arena-*.bin'))
+        if mode == 'w':
+            for path in existing:
+                path.unlink()
+            self.file_idx = 0
+        else:
+            self.file_idx = len(existing) - 1 if existing else 0
+        self.file = None
+
+    @property
+    def storage_path(self) -> str:
+        return str(self.storage_path_)
+
+    def _current_filename(self) -> str:
+        return _ARENA_FILENAME_PATTERN.format(self.file_idx)
+
+    def write(self, key: str, value: np.ndarray) -> str:
+        data = np.ascontiguousarray(value, dtype=self.dtype)
+        assert data.ndim == 2, f'Expected a 2D feature matrix, got an array with shape {data.shape}.'
+        if self.file is None:
+            self.file = open(self.storage_path_ / self._current_filename(), 'ab')
+        offset = self.file.tell()
+        if offset > 0 and offset + data.nbytes > self.max_file_size:
+            self.file.close()
+            self.file_idx += 1
+            self.file = open(self.storage_path_ / self._current_filename(), 'ab')
+            offset = self.file.tell()
+        padding = -offset % ARENA_ALIGNMENT
+        if padding:
+            self.file.write(bytes(padding))
+            offset += padding
+        self.file.write(data.data)
+        num_frames, num_features = data.shape
+        return f'{self._current_filename()}:{offset}:{num_frames}:{num_features}:{self.dtype.name}'
+
+    def flush(self) -> None:
+        if self.file is not None:
+            self.file.flush()
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
 """
 Lilcom-compressed URL writers
 """
@@ -699,12 +1378,16 @@ Kaldi-compatible feature reader
 @register_reader
 class KaldiReader(FeaturesReader):
     """
-    Reads Kaldi's "feats.scp" file using kaldiio.
+    Reads Kaldi's "feats.scp" file.
     ``storage_path`` corresponds to the path to ``feats.scp``.
     ``storage_key`` corresponds to the utterance-id in Kaldi.
 
+    Binary ark files are read natively (see :mod:`lhotse.features.kaldi_ark`): only the requested
+    rows of a matrix are read and decoded. Other scp entries (e.g. commands) are read with kaldiio.
+
     .. caution::
-        Requires ``kaldiio`` to be installed (``pip install kaldiio``).
+        Reading scp entries that are not binary ark locations requires ``kaldiio``
+        to be installed (``pip install kaldiio``).
     """
     name = 'kaldiio'
 
@@ -714,12 +1397,9 @@ class KaldiReader(FeaturesReader):
             *args,
             **kwargs
     ):
-        if not is_module_available('kaldiio'):
-            raise ValueError("To read Kaldi feats.scp, please 'pip install kaldiio' first.")
-        import kaldiio
         super().__init__()
         self.storage_path = storage_path
-        self.storage = kaldiio.load_scp(str(self.storage_path))
+        self.entries = load_kaldi_scp(str(self.storage_path))
 
     def read(
             self,
@@ -727,5 +1407,21 @@ class KaldiReader(FeaturesReader):
             left_offset_frames: int = 0,
             right_offset_frames: Optional[int] = None
     ) -> np.ndarray:
-        arr = self.storage[key]
+        entry = self.entries[key]
+        if entry.offset is not None:
+            return read_entry(entry, left_offset_frames, right_offset_frames)
+        if not is_module_available('kaldiio'):
+            raise ValueError(f"To read Kaldi scp entry '{entry.spec}', please 'pip install kaldiio' first.")
+        import kaldiio
+        arr = kaldiio.load_mat(entry.spec)
         return arr[left_offset_frames: right_offset_frames]
+
+    def read_many(self, requests: Sequence[ReadRequest]) -> List[np.ndarray]:
+        # Read the matrices in the order in which they are stored in the ark files.
+        def position(key: str) -> Tuple[str, int]:
+            entry = self.entries.get(key)
+            if entry is None or entry.offset is None:
+                return '', 0
+            return entry.path, entry.offset
+
+        return read_in_order(self, requests, position=position)
@@ -1,11 +1,11 @@
 from dataclasses import asdict, dataclass
-from typing import Optional
+from typing import List, Optional
 
 import numpy as np
 import torch
 
 from lhotse.features.base import FeatureExtractor, register_extractor
-from lhotse.features.kaldi.layers import Wav2LogFilterBank, Wav2MFCC
+from lhotse.features.kaldi.layers import Wav2FFT, Wav2LogFilterBank, Wav2MFCC
 from lhotse.utils import EPSILON, Seconds
 
 
@@ -34,6 +34,7 @@ class KaldiFbankConfig:
 class KaldiFbank(FeatureExtractor):
     name = "kaldi-fbank"
     config_type = KaldiFbankConfig
+    mixes_log_energies = True
 
     def __init__(self, config: Optional[KaldiFbankConfig] = None):
         super().__init__(config=config)
@@ -52,6 +53,12 @@ class KaldiFbank(FeatureExtractor):
                                                            f"sampling_rate={sampling_rate} was passed to extract()."
         return self.extractor(torch.from_numpy(samples))[0].numpy()
 
+    def extract_batch(self, samples: List[np.ndarray], sampling_rate: int) -> List[np.ndarray]:
+        assert sampling_rate == self.config.sampling_rate, f"KaldiFbank was instantiated for sampling_rate " \
+                                                           f"{self.config.sampling_rate}, but " \
+                                                           f"sampling_rate={sampling_rate} was passed to extract_batch()."
+        return _extract_batch(self.extractor, samples)
+
     @staticmethod
     def mix(
             features_a: np.ndarray, features_b: np.ndarray, energy_scaling_factor_b: float
@@ -113,3 +120,43 @@ class KaldiMfcc(FeatureExtractor):
                                                            f"{self.config.sampling_rate}, but " \
                                                            f"sampling_rate={sampling_rate} was passed to extract()."
         return self.extractor(torch.from_numpy(samples))[0].numpy()
+
+    def extract_batch(self, samples: List[np.ndarray], sampling_rate: int) -> List[np.ndarray]:
+        assert sampling_rate == self.config.sampling_rate, f"KaldiMfcc was instantiated for sampling_rate " \
+                                                           f"{self.config.sampling_rate}, but " \
+                                                           f"sampling_rate={sampling_rate} was passed to extract_batch()."
+        return _extract_batch(self.extractor, samples)
+
+
+def _extract_batch(extractor: Wav2FFT, samples: List[np.ndarray]) -> List[np.ndarray]:
+    """
+    Run ``extractor`` once on a zero-padded batch of single-channel waveforms and split the output
+    back into per-waveform feature matrices with the same number of frames as ``extract`` would return.
+
+    When all waveforms have the same length, the result is identical to calling ``extract`` on each of them.
+    Otherwise, the DC offset of each waveform is removed before padding, so that the padding does not
+    affect it; only the last frame (or two) of the shorter waveforms, whose windows extend into the padding,
+    may differ slightly from the non-batched extraction.
+    """
+    if not samples:
+        return []
+    waves = []
+    for s in samples:
+        assert s.ndim == 1 or s.shape[0] == 1, \
+            f"Batched extraction supports only single-channel audio (got array of shape {s.shape})."
+        waves.append(torch.from_numpy(s.reshape(-1)))
+    lengths = [w.shape[0] for w in waves]
+    if len(set(lengths)) == 1:
+        batch = torch.stack(waves)
+    else:
+        if extractor.remove_dc_offset:
+            waves = [w - w.mean() for w in waves]
+        batch = torch.nn.utils.rnn.pad_sequence(waves, batch_first=True)
+    feats = extractor(batch)
+    shift = extractor.wav2win._shift
+    length = extractor.wav2win._length
+    if extractor.wav2win.snip_edges:
+        num_frames = [1 + (n - length) // shift if n >= length else 0 for n in lengths]
+    else:
+        num_frames = [(n + shift // 2) // shift for n in lengths]
+    return [feats[i, :nf].numpy() for i, nf in enumerate(num_frames)]
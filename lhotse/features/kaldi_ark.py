@@ -0,0 +1,261 @@
+"""
+Native reader of Kaldi's binary feature archives (``.ark`` files indexed with ``.scp`` files).
+
+Unlike reading the archives with ``kaldiio``, we parse only the matrix header at the offset
+given by the scp file to learn the matrix shape, and read only the requested rows of the data.
+Supported matrix types are the uncompressed float and double matrices (``FM`` and ``DM``),
+and the compressed matrices (``CM``, ``CM2`` and ``CM3``).
+Text-mode archives and scp entries with commands (``... |``) are not supported.
+
+The ark files are kept open in a small global cache of file descriptors. They are read with
+``os.pread`` (when available), which does not use the shared file position,
+so the cached descriptors remain usable after a fork (e.g. in DataLoader workers).
+"""
+import os
+import struct
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+# The maximum number of ark files kept open at once.
+MAX_OPEN_ARK_FILES = 64
+# The maximum number of parsed scp files kept in memory at once.
+MAX_CACHED_SCP_FILES = 16
+
+_ARK_FILES: 'OrderedDict[str, int]' = OrderedDict()
+_ARK_FILES_LOCK = threading.Lock()
+_ARK_FILES_PID = os.getpid()
+
+# Kaldi matrix type token -> numpy dtype of the data (for the compressed types: of the stored integers).
+_MATRIX_DTYPES = {
+    'FM': np.dtype('<f4'),
+    'DM': np.dtype('<f8'),
+    'CM': np.dtype('uint8'),
+    'CM2': np.dtype('<u2'),
+    'CM3': np.dtype('uint8'),
+}
+# Enough bytes to parse the header of any supported matrix type.
+_MAX_HEADER_SIZE = 32
+
+
+class KaldiScpEntry(NamedTuple):
+    """
+    A parsed entry of a Kaldi scp file, e.g. ``feats.ark:1234`` or ``feats.ark:1234[10:19]``.
+    ``offset`` is ``None`` when the entry cannot be read natively (e.g. it is a command).
+    ``rows`` is the inclusive row range selected in the scp entry (if any).
+    """
+    spec: str
+    path: str
+    offset: Optional[int]
+    rows: Optional[Tuple[int, int]] = None
+
+
+class KaldiMatrixHeader(NamedTuple):
+    path: str
+    type: str
+    num_rows: int
+    num_cols: int
+    data_offset: int
+    min_value: float = 0.0
+    range: float = 0.0
+
+
+def parse_scp_entry(spec: str) -> KaldiScpEntry:
+    """Parse the right-hand side of a line in a Kaldi scp file."""
+    spec = spec.strip()
+    rows = None
+    location = spec
+    if spec.endswith(']') and '[' in spec:
+        location, _, range_spec = spec[:-1].rpartition('[')
+        parts = range_spec.split(',')
+        if len(parts) == 1 and ':' in parts[0]:
+            begin, end = parts[0].split(':')
+            rows = (int(begin), int(end))
+        else:
+            # Column ranges are not supported natively.
+            return KaldiScpEntry(spec=spec, path=spec, offset=None)
+    path, sep, offset = location.rpartition(':')
+    if not sep or not offset.isdigit() or spec.endswith('|'):
+        return KaldiScpEntry(spec=spec, path=spec, offset=None)
+    return KaldiScpEntry(spec=spec, path=path, offset=int(offset), rows=rows)
+
+
+def load_kaldi_scp(scp_path: str) -> Dict[str, KaldiScpEntry]:
+    """
+    Read a Kaldi scp file (e.g. ``feats.scp``) and return a mapping from the utterance IDs
+    to their parsed entries. The result is cached (for up to :data:`MAX_CACHED_SCP_FILES` files);
+    like :class:`~lhotse.serialization.JsonlIndex`, the cached entries are discarded
+    when the size or the modification time of the scp file changes.
+    Use :func:`clear_kaldi_scp_cache` (or :func:`lhotse.features.io.close_cached_file_handles`)
+    to release the cached entries.
+    """
+    stat = os.stat(scp_path)
+    return _load_kaldi_scp(scp_path, stat.st_size, stat.st_mtime_ns)
+
+
+def clear_kaldi_scp_cache() -> None:
+    """Release the scp files cached by :func:`load_kaldi_scp`."""
+    _load_kaldi_scp.cache_clear()
+
+
+# noinspection PyUnusedLocal
+@lru_cache(maxsize=MAX_CACHED_SCP_FILES)
+def _load_kaldi_scp(scp_path: str, size: int, mtime_ns: int) -> Dict[str, KaldiScpEntry]:
+    # ``size`` and ``mtime_ns`` are only used as a part of the cache key.
+    entries = {}
+    with open(scp_path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            key, spec = line.split(maxsplit=1)
+            entries[key] = parse_scp_entry(spec)
+    return entries
+
+
+def _ark_fd(path: str) -> int:
+    global _ARK_FILES_LOCK, _ARK_FILES_PID
+    if _ARK_FILES_PID != os.getpid():
+        # We're in a forked process: the lock might have been held by another thread during the fork.
+        _ARK_FILES_LOCK = threading.Lock()
+        if not hasattr(os, 'pread'):
+            # Without pread, the descriptors inherited from the parent share the file position with it.
+            _ARK_FILES.clear()
+        _ARK_FILES_PID = os.getpid()
+    with _ARK_FILES_LOCK:
+        fd = _ARK_FILES.get(path)
+        if fd is not None:
+            _ARK_FILES.move_to_end(path)
+            return fd
+        fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        _ARK_FILES[path] = fd
+        while len(_ARK_FILES) > MAX_OPEN_ARK_FILES:
+            _, evicted = _ARK_FILES.popitem(last=False)
+            os.close(evicted)
+        return fd
+
+
+def read_at(path: str, offset: int, size: int) -> bytes:
+    """Read ``size`` bytes at ``offset`` from the file at ``path``, using a cached file descriptor."""
+    fd = _ark_fd(path)
+    if hasattr(os, 'pread'):
+        return os.pread(fd, size, offset)
+    with _ARK_FILES_LOCK:
+        os.lseek(fd, offset, os.SEEK_SET)
+        return os.read(fd, size)
+
+
+def close_ark_files() -> None:
+    """Close the ark files kept open by this module."""
+    with _ARK_FILES_LOCK:
+        for fd in _ARK_FILES.values():
+            os.close(fd)
+        _ARK_FILES.clear()
+
+
+def read_matrix_header(path: str, offset: int) -> KaldiMatrixHeader:
+    """
+    Parse the header of a binary Kaldi matrix stored at ``offset`` in the ark file at ``path``
+    (i.e. the location from an scp file), without reading the matrix data.
+    """
+    buf = read_at(path, offset, _MAX_HEADER_SIZE)
+    if buf[:2] != b'\0B':
+        raise ValueError(f'Only binary Kaldi archives are supported (at {path}:{offset}).')
+    token_end = buf.find(b' ', 2)
+    matrix_type = buf[2:token_end].decode('ascii', errors='replace')
+    pos = token_end + 1
+    if matrix_type in ('FM', 'DM'):
+        # Kaldi writes each integer preceded with a byte holding its size.
+        assert buf[pos] == 4 and buf[pos + 5] == 4, f'Malformed Kaldi matrix header at {path}:{offset}.'
+        num_rows, = struct.unpack('<i', buf[pos + 1: pos + 5])
+        num_cols, = struct.unpack('<i', buf[pos + 6: pos + 10])
+        return KaldiMatrixHeader(
+            path=path, type=matrix_type, num_rows=num_rows, num_cols=num_cols, data_offset=offset + pos + 10
+        )
+    if matrix_type in ('CM', 'CM2', 'CM3'):
+        min_value, value_range, num_rows, num_cols = struct.unpack('<ffii', buf[pos: pos + 16])
+        return KaldiMatrixHeader(
+            path=path, type=matrix_type, num_rows=num_rows, num_cols=num_cols, data_offset=offset + pos + 16,
+            min_value=min_value, range=value_range
+        )
+    raise ValueError(f'Unsupported Kaldi matrix type "{matrix_type}" at {path}:{offset}.')
+
+
+def read_matrix(header: KaldiMatrixHeader, begin: int = 0, end: Optional[int] = None) -> np.ndarray:
+    """
+    Read the rows ``[begin, end)`` of the Kaldi matrix described by ``header``.
+    Only the selected rows are read from the file (except for the ``CM`` format,
+    whose one-byte data is stored column by column), and only they are decoded.
+
+    :return: a float32 numpy array of shape ``(end - begin, num_cols)``.
+    """
+    begin, end, _ = slice(begin, end).indices(header.num_rows)
+    num_selected = max(0, end - begin)
+    rows, cols = header.num_rows, header.num_cols
+    dtype = _MATRIX_DTYPES[header.type]
+    if header.type == 'CM':
+        # Per-column headers (4 x uint16 percentiles), followed by the data of each column.
+        col_headers = np.frombuffer(read_at(header.path, header.data_offset, cols * 8), dtype='<u2')
+        data = read_at(header.path, header.data_offset + cols * 8, rows * cols)
+        data = np.frombuffer(data, dtype=dtype).reshape(cols, rows)[:, begin: end].T
+        return _decode_column_headers_format(header, col_headers.reshape(cols, 4), data)
+    row_bytes = cols * dtype.itemsize
+    data = read_at(header.path, header.data_offset + begin * row_bytes, num_selected * row_bytes)
+    data = np.frombuffer(data, dtype=dtype).reshape(num_selected, cols)
+    if header.type in ('FM', 'DM'):
+        return data.astype(np.float32)
+    # CM2 and CM3 are linearly quantized with a global range.
+    increment = header.range / (65535.0 if header.type == 'CM2' else 255.0)
+    out = data.astype(np.float32)
+    out *= increment
+    out += header.min_value
+    return out
+
+
+def _decode_column_headers_format(
+        header: KaldiMatrixHeader, col_headers: np.ndarray, data: np.ndarray
+) -> np.ndarray:
+    # The same as CharToFloat() in Kaldi's compressed-matrix.cc: each byte is linearly interpolated
+    # between the 0th, 25th, 75th and 100th percentile of its column.
+    percentiles = header.min_value + header.range * (col_headers.astype(np.float32) / 65535.0)
+    p0, p25, p75, p100 = (percentiles[:, idx] for idx in range(4))
+    values = data.astype(np.float32)
+    return np.where(
+        values <= 64,
+        p0 + (p25 - p0) * values / 64.0,
+        np.where(
+            values <= 192,
+            p25 + (p75 - p25) * (values - 64) / 128.0,
+            p75 + (p100 - p75) * (values - 192) / 63.0,
+        )
+    ).astype(np.float32)
+
+
+def read_entry(entry: KaldiScpEntry, begin: int = 0, end: Optional[int] = None) -> np.ndarray:
+    """
+    Read the rows ``[begin, end)`` of the matrix referred to by a Kaldi scp entry
+    (the rows are relative to the row range of the entry, if it specifies one).
+    """
+    if entry.offset is None:
+        raise ValueError(f'Cannot read a Kaldi scp entry natively: "{entry.spec}"')
+    header = read_matrix_header(entry.path, entry.offset)
+    if entry.rows is not None:
+        first, last = entry.rows
+        begin, end, _ = slice(begin, end).indices(last - first + 1)
+        begin, end = first + begin, first + end
+    return read_matrix(header, begin, end)
+
+
+def matrix_shape(entry: KaldiScpEntry) -> Tuple[int, int]:
+    """Return the shape of the matrix referred to by a Kaldi scp entry, reading only its header."""
+    if entry.offset is None:
+        raise ValueError(f'Cannot read a Kaldi scp entry natively: "{entry.spec}"')
+    header = read_matrix_header(entry.path, entry.offset)
+    if entry.rows is not None:
+        first, last = entry.rows
+        return last - first + 1, header.num_cols
+    return header.num_rows, header.num_cols
+
@@ -133,6 +133,7 @@ class LibrosaFbank(FeatureExtractor):
     """
     name = "librosa-fbank"
     config_type = LibrosaFbankConfig
+    mixes_log_energies = True
 
     @property
     def frame_shift(self) -> Seconds:
@@ -1,9 +1,9 @@
-from typing import Optional
+from typing import List, Optional, Tuple
 
 import numpy as np
 
 from lhotse.features.base import FeatureExtractor
-from lhotse.utils import Decibels, NonPositiveEnergyError, Seconds, compute_num_frames
+from lhotse.utils import Decibels, EPSILON, NonPositiveEnergyError, Seconds, compute_num_frames, ifnone
 
 
 class FeatureMixer:
@@ -21,6 +21,12 @@ class FeatureMixer:
 
     It relies on the ``FeatureExtractor`` to have defined ``mix`` and ``compute_energy`` methods,
     so that the ``FeatureMixer`` knows how to scale and add two feature matrices together.
+
+    For the extractors of log-energy features (with ``mixes_log_energies = True``, e.g. ``Fbank``),
+    the tracks are accumulated in place in the energy domain into a single buffer (allocated once
+    when the final number of frames is known up front, see ``num_frames``), and the log is taken once
+    for the whole mix. For the other extractors, the tracks are folded pairwise with ``mix``.
+    In both cases, the individual padded tracks are only materialized when ``unmixed_feats`` is requested.
     """
 
     def __init__(
@@ -28,7 +34,8 @@ class FeatureMixer:
             feature_extractor: FeatureExtractor,
             base_feats: np.ndarray,
             frame_shift: Seconds,
-            padding_value: float = -1000.0
+            padding_value: float = -1000.0,
+            num_frames: Optional[int] = None,
     ):
         """
         :param feature_extractor: The ``FeatureExtractor`` instance that specifies how to mix the features.
@@ -38,10 +45,12 @@ class FeatureMixer:
         :param padding_value: The value used to pad the shorter features during the mix.
             This value is adequate only for log space features. For non-log space features,
             e.g. energies, use either 0 or a small positive value like 1e-5.
+        :param num_frames: The expected number of frames of the mix, used to preallocate the mix buffer
+            (e.g. the ``num_frames`` of a ``MixedCut``). The mix is still extended if the tracks turn out longer.
         """
         self.feature_extractor = feature_extractor
-        self.tracks = [base_feats]
-        self.gains = []
+        # (start frame, gain, features) of each track added to the mix.
+        self.tracks: List[Tuple[int, float, np.ndarray]] = [(0, 1.0, base_feats)]
         # Keep a pre-computed energy value of the features that we initialize the Mixer with;
         # it is required to compute gain ratios that satisfy SNR during the mix.
         self.frame_shift = frame_shift
@@ -49,11 +58,21 @@ class FeatureMixer:
         assert self.reference_energy > 0.0, \
             f"To perform mix, energy must be non-zero and non-negative (got {self.reference_energy})"
         self.padding_value = padding_value
-        self.dtype = self.tracks[0].dtype
+        self.dtype = base_feats.dtype
+        self._num_frames = base_feats.shape[0]
+        self._energies = None
+        if feature_extractor.mixes_log_energies:
+            # The exponentiated features could overflow in half precision.
+            self._energies = np.zeros(
+                (max(self._num_frames, ifnone(num_frames, 0)), self.num_features),
+                dtype=np.promote_types(self.dtype, np.float32)
+            )
+            self._scratch = np.empty((0, self.num_features), self._energies.dtype)
+            self._accumulate_energies(base_feats, start=0, gain=1.0)
 
     @property
     def num_features(self):
-        return self.tracks[0].shape[1]
+        return self.tracks[0][2].shape[1]
 
     @property
     def unmixed_feats(self) -> np.ndarray:
@@ -61,7 +80,10 @@ class FeatureMixer:
         Return a numpy ndarray with the shape (num_tracks, num_frames, num_features), where each track's
         feature matrix is padded and scaled adequately to the offsets and SNR used in ``add_to_mix`` call.
         """
-        return np.stack(self.tracks)
+        unmixed = np.full((len(self.tracks), self._num_frames, self.num_features), self.padding_value, self.dtype)
+        for idx, (start, _, feats) in enumerate(self.tracks):
+            unmixed[idx, start: start + feats.shape[0]] = feats
+        return unmixed
 
     @property
     def mixed_feats(self) -> np.ndarray:
@@ -69,8 +91,17 @@ class FeatureMixer:
         Return a numpy ndarray with the shape (num_frames, num_features) - a mono mixed feature matrix
         of the tracks supplied with ``add_to_mix`` calls.
         """
-        result = self.tracks[0]
-        for feats_to_add, gain in zip(self.tracks[1:], self.gains):
+        if len(self.tracks) == 1:
+            return self.tracks[0][2]
+        if self._energies is not None:
+            # log(sum_i(gain_i * exp(feats_i))) for all the tracks at once;
+            # the frames where all the tracks are padding end up with log(EPSILON), as with pairwise mixing.
+            result = np.maximum(self._energies[:self._num_frames], EPSILON)
+            np.log(result, out=result)
+            return result.astype(self.dtype, copy=False)
+        padded = self.unmixed_feats
+        result = padded[0]
+        for feats_to_add, (_, gain, _) in zip(padded[1:], self.tracks[1:]):
             result = self.feature_extractor.mix(
                 features_a=result,
                 features_b=feats_to_add,
@@ -95,51 +126,8 @@ class FeatureMixer:
         the start with low energy values.
         """
         assert offset >= 0.0, "Negative offset in mixing is not supported."
-
-        reference_feats = self.tracks[0]
         num_frames_offset = compute_num_frames(duration=offset, frame_shift=self.frame_shift,
                                                sampling_rate=sampling_rate)
-        current_num_frames = reference_feats.shape[0]
-        incoming_num_frames = feats.shape[0] + num_frames_offset
-        mix_num_frames = max(current_num_frames, incoming_num_frames)
-
-        feats_to_add = feats
-
-        # When the existing frames are less than what we anticipate after the mix,
-        # we need to pad after the end of the existing features mixed so far.
-        if current_num_frames < mix_num_frames:
-            for idx in range(len(self.tracks)):
-                padded_track = np.vstack([
-                    self.tracks[idx],
-                    self.padding_value * np.ones(
-                        (mix_num_frames - current_num_frames, self.num_features),
-                        dtype=self.dtype
-                    )
-                ])
-                self.tracks[idx] = padded_track
-
-        # When there is an offset, we need to pad before the start of the features we're adding.
-        if offset > 0:
-            feats_to_add = np.vstack([
-                self.padding_value * np.ones(
-                    (num_frames_offset, self.num_features),
-                    dtype=self.dtype
-                ),
-                feats_to_add
-            ])
-
-        # When the features we're mixing in are shorter that the anticipated mix length,
-        # we need to pad after their end.
-        # Note: we're doing that inefficiently, as we potentially re-allocate numpy arrays twice,
-        # during this padding and the offset padding before. If that's a bottleneck, we'll optimize.
-        if incoming_num_frames < mix_num_frames:
-            feats_to_add = np.vstack([
-                feats_to_add,
-                self.padding_value * np.ones(
-                    (mix_num_frames - incoming_num_frames, self.num_features),
-                    dtype=self.dtype
-                )
-            ])
 
         # When SNR is requested, find what gain is needed to satisfy the SNR
         gain = 1.0
@@ -153,5 +141,21 @@ class FeatureMixer:
             target_energy = self.reference_energy * (10.0 ** (-snr / 10))
             gain = target_energy / added_feats_energy
 
-        self.tracks.append(feats_to_add)
-        self.gains.append(gain)
+        self.tracks.append((num_frames_offset, gain, feats))
+        self._num_frames = max(self._num_frames, num_frames_offset + feats.shape[0])
+        if self._energies is not None:
+            self._accumulate_energies(feats, start=num_frames_offset, gain=gain)
+
+    def _accumulate_energies(self, feats: np.ndarray, start: int, gain: float) -> None:
+        end = start + feats.shape[0]
+        if end > self._energies.shape[0]:
+            # The tracks are longer than anticipated: grow the buffer geometrically.
+            grown = np.zeros((max(end, self._energies.shape[0] * 3 // 2), self.num_features), self._energies.dtype)
+            grown[:self._energies.shape[0]] = self._energies
+            self._energies = grown
+        if self._scratch.shape[0] < feats.shape[0]:
+            self._scratch = np.empty((feats.shape[0], self.num_features), self._energies.dtype)
+        energies = np.exp(feats, out=self._scratch[:feats.shape[0]], casting='unsafe')
+        if gain != 1.0:
+            energies *= gain
+        self._energies[start: end] += energies
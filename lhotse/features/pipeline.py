@@ -0,0 +1,406 @@
+"""
+A staged pipeline for feature extraction that overlaps audio reading, feature computation and storage writes.
+
+The pipeline consists of three stages connected by bounded queues::
+
+    cuts -> [reader threads] -> read queue -> [extractor processes] -> write queue -> [writer thread] -> cuts
+
+* the reader threads load the audio of the cuts (which is mostly I/O, so threads are sufficient);
+* the extractor processes compute the features (when ``num_workers=0``, they are computed in a thread instead);
+* a single writer thread stores the feature matrices, so that the storage (e.g. an HDF5 file)
+  is only ever written to from one thread.
+
+The queues are bounded, so that a slow stage applies back-pressure to the faster ones instead of
+accumulating the audio in memory. After each run, the throughput of each stage and the depth of each queue
+are available in :attr:`FeatureExtractionPipeline.stats` -- e.g. a full write queue and idle readers
+indicate that the storage is the bottleneck.
+
+Example:
+
+    >>> pipeline = FeatureExtractionPipeline(num_readers=8, num_workers=4)
+    >>> cuts = cuts.compute_and_store_features(KaldiFbank(), 'feats.h5', storage_type=LilcomHdf5Writer,
+    ...                                        pipeline=pipeline)
+    >>> print(pipeline.stats)
+"""
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from tqdm.auto import tqdm
+
+from lhotse.augmentation import AugmentFn
+from lhotse.features.base import FeatureExtractor
+from lhotse.features.io import FeaturesWriter
+from lhotse.utils import Seconds, fastcopy
+
+# Used to signal the end of the input between the stages.
+_END = object()
+# How often the blocked threads check whether the pipeline was stopped due to an error.
+_POLL_INTERVAL = 0.1
+
+
+@dataclass
+class StageStats:
+    """Counters describing the work done by one stage of a :class:`FeatureExtractionPipeline`."""
+    name: str
+    num_workers: int
+    items: int = 0
+    busy_seconds: float = 0.0
+    audio_seconds: float = 0.0
+    wall_seconds: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Items processed per second of the pipeline's run time."""
+        return self.items / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+    @property
+    def realtime_factor(self) -> float:
+        """Seconds of audio processed per second of the pipeline's run time."""
+        return self.audio_seconds / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+    @property
+    def utilization(self) -> float:
+        """The fraction of time the workers of this stage were busy (as opposed to waiting on the queues)."""
+        total = self.wall_seconds * self.num_workers
+        return self.busy_seconds / total if total > 0 else 0.0
+
+
+@dataclass
+class QueueStats:
+    """The depth of a queue between two stages, sampled each time an item is taken out of it."""
+    name: str
+    maxsize: int
+    samples: int = 0
+    total_depth: int = 0
+    max_depth: int = 0
+
+    @property
+    def mean_depth(self) -> float:
+        return self.total_depth / self.samples if self.samples > 0 else 0.0
+
+    def record(self, depth: int) -> None:
+        self.samples += 1
+        self.total_depth += depth
+        self.max_depth = max(self.max_depth, depth)
+
+
+@dataclass
+class PipelineStats:
+    stages: Dict[str, StageStats] = field(default_factory=dict)
+    queues: Dict[str, QueueStats] = field(default_factory=dict)
+    wall_seconds: float = 0.0
+
+    def __str__(self) -> str:
+        lines = [f'Feature extraction pipeline finished in {self.wall_seconds:.2f}s.']
+        for s in self.stages.values():
+            lines.append(
+                f'Stage {s.name} ({s.num_workers} workers): {s.items} items, {s.throughput:.2f} items/s, '
+                f'{s.realtime_factor:.2f}x realtime, {100 * s.utilization:.1f}% utilization.'
+            )
+        for q in self.queues.values():
+            lines.append(
+                f'Queue {q.name} (max size {q.maxsize}): mean depth {q.mean_depth:.2f}, max depth {q.max_depth}.'
+            )
+        return '\n'.join(lines)
+
+
+class FeatureExtractionPipeline:
+    """
+    Extracts and stores the features of cuts with separate reader, extractor and writer stages
+    running concurrently (see the module docstring for details).
+
+    ``MonoCut`` instances and ``MixedCut`` instances mixed eagerly go through all the stages.
+    Other cuts (``PaddingCut`` and lazily mixed ``MixedCut``) are passed through to the writer thread,
+    which calls their ``compute_and_store_features`` method.
+
+    :param num_readers: the number of threads loading the audio.
+    :param num_workers: the number of processes computing the features;
+        when 0, the features are computed in a single thread of the current process.
+    :param queue_size: the maximum number of items waiting between two stages.
+    """
+
+    def __init__(self, num_readers: int = 4, num_workers: int = 1, queue_size: int = 32) -> None:
+        assert num_readers > 0, f"num_readers has to be positive (got: {num_readers})."
+        assert num_workers >= 0, f"num_workers cannot be negative (got: {num_workers})."
+        assert queue_size > 0, f"queue_size has to be positive (got: {queue_size})."
+        self.num_readers = num_readers
+        self.num_workers = num_workers
+        self.queue_size = queue_size
+        self.stats: Optional[PipelineStats] = None
+
+    def run(
+            self,
+            cuts: Iterable[Any],
+            extractor: FeatureExtractor,
+            storage: FeaturesWriter,
+            augment_fn: Optional[AugmentFn] = None,
+            mix_eagerly: bool = True,
+            progress_bar: bool = False,
+    ) -> List[Any]:
+        """
+        Extract and store the features of ``cuts``.
+
+        :return: a list of cuts with ``Features`` manifests attached, in the same order as ``cuts``.
+        """
+        run = _PipelineRun(self, extractor, storage, augment_fn, mix_eagerly, progress_bar)
+        try:
+            results = run.execute(cuts)
+        finally:
+            self.stats = run.stats
+        logging.info(str(self.stats))
+        return results
+
+
+class _PipelineRun:
+    """The state of a single :meth:`FeatureExtractionPipeline.run` call."""
+
+    def __init__(
+            self,
+            pipeline: FeatureExtractionPipeline,
+            extractor: FeatureExtractor,
+            storage: FeaturesWriter,
+            augment_fn: Optional[AugmentFn],
+            mix_eagerly: bool,
+            progress_bar: bool,
+    ) -> None:
+        self.pipeline = pipeline
+        self.extractor = extractor
+        self.storage = storage
+        self.augment_fn = augment_fn
+        self.mix_eagerly = mix_eagerly
+        self.progress_bar = progress_bar
+        size = pipeline.queue_size
+        self.input_queue = queue.Queue(maxsize=size)
+        self.read_queue = queue.Queue(maxsize=size)
+        self.write_queue = queue.Queue(maxsize=size)
+        self.stats = PipelineStats(
+            stages={
+                'read': StageStats('read', pipeline.num_readers),
+                'extract': StageStats('extract', max(1, pipeline.num_workers)),
+                'write': StageStats('write', 1),
+            },
+            queues={
+                'read': QueueStats('read', size),
+                'write': QueueStats('write', size),
+            },
+        )
+        self.lock = threading.Lock()
+        self.stop = threading.Event()
+        self.error: Optional[BaseException] = None
+        self.results: Dict[int, Any] = {}
+
+    def execute(self, cuts: Iterable[Any]) -> List[Any]:
+        begin = time.perf_counter()
+        executor = None
+        if self.pipeline.num_workers > 0:
+            # The "spawn" context is used because the pool's processes are started
+            # while the reader threads are already running.
+            executor = ProcessPoolExecutor(
+                self.pipeline.num_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.extractor, self.augment_fn),
+            )
+        threads = [threading.Thread(target=self._guard(self._feed), args=(cuts,), daemon=True)]
+        threads += [
+            threading.Thread(target=self._guard(self._read), daemon=True)
+            for _ in range(self.pipeline.num_readers)
+        ]
+        threads.append(threading.Thread(target=self._guard(self._dispatch), args=(executor,), daemon=True))
+        threads.append(threading.Thread(target=self._guard(self._write), daemon=True))
+        try:
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True)
+            self.stats.wall_seconds = time.perf_counter() - begin
+            for s in self.stats.stages.values():
+                s.wall_seconds = self.stats.wall_seconds
+        if self.error is not None:
+            raise self.error
+        return [self.results[idx] for idx in range(len(self.results))]
+
+    def _guard(self, fn):
+        def wrapped(*args):
+            try:
+                fn(*args)
+            except BaseException as e:
+                with self.lock:
+                    if self.error is None:
+                        self.error = e
+                self.stop.set()
+
+        return wrapped
+
+    def _put(self, q: queue.Queue, item: Any) -> None:
+        while not self.stop.is_set():
+            try:
+                q.put(item, timeout=_POLL_INTERVAL)
+                return
+            except queue.Full:
+                pass
+
+    def _get(self, q: queue.Queue, q_stats: Optional[QueueStats] = None) -> Any:
+        while not self.stop.is_set():
+            try:
+                item = q.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            if q_stats is not None:
+                with self.lock:
+                    q_stats.record(q.qsize())
+            return item
+        return _END
+
+    def _is_pipelined(self, cut: Any) -> bool:
+        from lhotse.cut import MixedCut, MonoCut
+        return isinstance(cut, MonoCut) or (isinstance(cut, MixedCut) and self.mix_eagerly)
+
+    def _feed(self, cuts: Iterable[Any]) -> None:
+        for idx, cut in enumerate(cuts):
+            if self.stop.is_set():
+                return
+            self._put(self.input_queue, (idx, cut))
+        for _ in range(self.pipeline.num_readers):
+            self._put(self.input_queue, _END)
+
+    def _read(self) -> None:
+        stage = self.stats.stages['read']
+        while True:
+            item = self._get(self.input_queue)
+            if item is _END:
+                self._put(self.read_queue, _END)
+                return
+            idx, cut = item
+            samples = None
+            if self._is_pipelined(cut):
+                begin = time.perf_counter()
+                samples = cut.load_audio()
+                with self.lock:
+                    stage.items += 1
+                    stage.busy_seconds += time.perf_counter() - begin
+                    stage.audio_seconds += cut.duration
+            self._put(self.read_queue, (idx, cut, samples))
+
+    def _dispatch(self, executor: Optional[ProcessPoolExecutor]) -> None:
+        stage = self.stats.stages['extract']
+        remaining_readers = self.pipeline.num_readers
+        while remaining_readers > 0:
+            item = self._get(self.read_queue, self.stats.queues['read'])
+            if item is _END:
+                if self.stop.is_set():
+                    return
+                remaining_readers -= 1
+                continue
+            idx, cut, samples = item
+            future = None
+            if samples is not None:
+                if executor is not None:
+                    future = executor.submit(_extract, samples, cut.sampling_rate)
+                else:
+                    future = Future()
+                    future.set_result(_extract(samples, cut.sampling_rate, self.extractor, self.augment_fn))
+                    with self.lock:
+                        stage.busy_seconds += future.result()[2]
+            self._put(self.write_queue, (idx, cut, future))
+        self._put(self.write_queue, _END)
+
+    def _write(self) -> None:
+        extract_stage = self.stats.stages['extract']
+        stage = self.stats.stages['write']
+        progress = tqdm(desc='Extracting and storing features', disable=not self.progress_bar)
+        try:
+            while True:
+                item = self._get(self.write_queue, self.stats.queues['write'])
+                if item is _END:
+                    return
+                idx, cut, future = item
+                if future is None:
+                    # Cuts not supported by the pipeline are processed here in the usual way.
+                    begin = time.perf_counter()
+                    self.results[idx] = cut.compute_and_store_features(
+                        extractor=self.extractor,
+                        storage=self.storage,
+                        augment_fn=self.augment_fn,
+                        mix_eagerly=self.mix_eagerly,
+                    )
+                else:
+                    feats, duration, compute_seconds = future.result()
+                    begin = time.perf_counter()
+                    self.results[idx] = self._attach(cut, feats, duration)
+                    with self.lock:
+                        extract_stage.items += 1
+                        extract_stage.audio_seconds += cut.duration
+                        if self.pipeline.num_workers > 0:
+                            extract_stage.busy_seconds += compute_seconds
+                with self.lock:
+                    stage.items += 1
+                    stage.busy_seconds += time.perf_counter() - begin
+                    stage.audio_seconds += cut.duration
+                progress.update(1)
+        finally:
+            progress.close()
+
+    def _attach(self, cut: Any, feats: np.ndarray, duration: Seconds) -> Any:
+        from lhotse.cut import MonoCut
+        mixed = not isinstance(cut, MonoCut)
+        features = self.extractor.store_and_describe(
+            feats,
+            storage=self.storage,
+            sampling_rate=cut.sampling_rate,
+            duration=duration,
+            offset=0 if mixed else cut.start,
+            channel=0 if mixed else cut.channel,
+        )
+        if mixed:
+            # The same result as MixedCut.compute_and_store_features(mix_eagerly=True).
+            return MonoCut(
+                id=cut.id,
+                start=0,
+                duration=cut.duration,
+                channel=0,
+                supervisions=cut.supervisions,
+                features=features,
+                recording=None
+            )
+        return fastcopy(cut, features=features)
+
+
+# The feature extractor and augmentation function, set once in each extractor process.
+_WORKER_STATE: Tuple[Optional[FeatureExtractor], Optional[AugmentFn]] = (None, None)
+
+
+def _init_worker(extractor: FeatureExtractor, augment_fn: Optional[AugmentFn]) -> None:
+    global _WORKER_STATE
+    _WORKER_STATE = (extractor, augment_fn)
+
+
+def _extract(
+        samples: np.ndarray,
+        sampling_rate: int,
+        extractor: Optional[FeatureExtractor] = None,
+        augment_fn: Optional[AugmentFn] = None,
+) -> Tuple[np.ndarray, Seconds, float]:
+    """
+    Compute the features of ``samples`` and return them together with the duration of the (possibly augmented)
+    audio and the time it took to compute them.
+    When ``extractor`` is not given, it uses the one set by ``_init_worker`` in this process.
+    """
+    if extractor is None:
+        extractor, augment_fn = _WORKER_STATE
+    begin = time.perf_counter()
+    if augment_fn is not None:
+        samples = augment_fn(samples, sampling_rate)
+    duration = round(samples.shape[1] / sampling_rate, ndigits=8)
+    feats = extractor.extract(samples=samples, sampling_rate=sampling_rate)
+    return feats, duration, time.perf_counter() - begin
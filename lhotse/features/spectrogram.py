@@ -30,6 +30,7 @@ class Spectrogram(TorchaudioFeatureExtractor):
     name = 'spectrogram'
     config_type = SpectrogramConfig
     feature_fn = staticmethod(torchaudio.compliance.kaldi.spectrogram)
+    mixes_log_energies = True
 
     def feature_dim(self, sampling_rate: int) -> int:
         from torchaudio.compliance.kaldi import _next_power_of_2
@@ -50,7 +50,10 @@ def load_kaldi_data_dir(
     For this to work, at least the wav.scp file must exist.
     SupervisionSet is created only when a segments file exists.
     All the other files (text, utt2spk, etc.) are optional, and some of them might not be handled yet.
-    In particular, feats.scp files are ignored.
+    FeatureSet is created only when a feats.scp file exists and ``frame_shift`` is specified;
+    the shapes of the feature matrices are read from their headers in the ark files.
+    When feats.scp has entries that are not binary ark locations (e.g. commands),
+    ``kaldiio`` is needed to read them; without it, the FeatureSet is omitted with a warning.
     """
     path = Path(path)
     assert path.is_dir()
@@ -108,34 +111,52 @@ def load_kaldi_data_dir(
 
     feature_set = None
     feats_scp = path / 'feats.scp'
-    if feats_scp.exists() and is_module_available('kaldiio'):
-        if frame_shift is not None:
-            import kaldiio
+    if feats_scp.exists():
+        from lhotse.features.kaldi_ark import load_kaldi_scp
+        feats_entries = load_kaldi_scp(str(feats_scp))
+        if frame_shift is None:
+            warnings.warn(f"Failed to import Kaldi 'feats.scp' to Lhotse: "
+                          f"frame_shift must be not None. "
+                          f"Feature import omitted.")
+        elif not is_module_available('kaldiio') and any(e.offset is None for e in feats_entries.values()):
+            warnings.warn(f"Failed to import Kaldi 'feats.scp' to Lhotse: "
+                          f"it has entries that are not binary ark locations (e.g. commands), "
+                          f"which require 'pip install kaldiio'. "
+                          f"Feature import omitted.")
+        else:
             from lhotse.features.io import KaldiReader
             feature_set = FeatureSet.from_features(
                 Features(
                     type='kaldiio',
-                    num_frames=mat.shape[0],
-                    num_features=mat.shape[1],
+                    num_frames=num_frames,
+                    num_features=num_features,
                     frame_shift=frame_shift,
                     sampling_rate=sampling_rate,
                     start=0,
-                    duration=mat.shape[0] * frame_shift,
+                    duration=num_frames * frame_shift,
                     storage_type=KaldiReader.name,
                     storage_path=str(feats_scp),
                     storage_key=utt_id,
                     recording_id=supervision_set[utt_id].recording_id if supervision_set is not None else utt_id,
                     channels=0
-                ) for utt_id, mat in kaldiio.load_scp_sequential(str(feats_scp))
+                )
+                for utt_id, entry in feats_entries.items()
+                # Only the matrix headers are read to determine the shapes.
+                for num_frames, num_features in [_kaldi_matrix_shape(entry)]
             )
-        else:
-            warnings.warn(f"Failed to import Kaldi 'feats.scp' to Lhotse: "
-                          f"frame_shift must be not None. "
-                          f"Feature import omitted.")
 
     return recording_set, supervision_set, feature_set
 
 
+def _kaldi_matrix_shape(entry) -> Tuple[int, int]:
+    from lhotse.features.kaldi_ark import matrix_shape
+    if entry.offset is not None:
+        return matrix_shape(entry)
+    # The entry is not a location in a binary ark file (e.g. a command): we have to load the matrix.
+    import kaldiio
+    return kaldiio.load_mat(entry.spec).shape
+
+
 def export_to_kaldi(
         recordings: RecordingSet,
         supervisions: SupervisionSet,
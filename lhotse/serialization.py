@@ -1,13 +1,18 @@
 import gzip
 import itertools
 import json
+import os
+import struct
 import warnings
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Any, Dict, Generator, Iterable, Optional, Type, Union
+from typing import Any, Dict, Generator, Iterable, List, Optional, Tuple, Type, Union
 
 import yaml
 
-from lhotse.utils import Pathlike
+from lhotse.utils import Pathlike, is_module_available, map_read_ahead
 
 # TODO: figure out how to use some sort of typing stubs
 #  so that linters/static checkers don't complain
@@ -72,18 +77,125 @@ class JsonMixin:
         return cls.from_dicts(data)
 
 
-def save_to_jsonl(data: Iterable[Dict[str, Any]], path: Pathlike) -> None:
-    """Save the data to a JSON file. Will use GZip to compress it if the path ends with a ``.gz`` extension."""
+# The approximate size (in bytes of uncompressed JSONL) of the chunks processed by
+# each worker when reading manifests in parallel; and the number of items per chunk when writing.
+JSONL_READ_CHUNK_SIZE = 16 * 1024 * 1024
+JSONL_WRITE_CHUNK_SIZE = 20000
+
+
+def _json_loads_fn():
+    # orjson is an optional dependency that is several times faster than the standard json module.
+    # It rejects the NaN and Infinity values that ``json.dumps`` writes, so such lines are parsed with json.
+    if is_module_available('orjson'):
+        import orjson
+
+        def loads(line):
+            try:
+                return orjson.loads(line)
+            except orjson.JSONDecodeError:
+                return json.loads(line)
+
+        return loads
+    return json.loads
+
+
+def save_to_jsonl(
+        data: Iterable[Dict[str, Any]],
+        path: Pathlike,
+        index: bool = False,
+        num_jobs: int = 1
+) -> None:
+    """
+    Save the data to a JSON file. Will use GZip to compress it if the path ends with a ``.gz`` extension.
+
+    :param data: an iterable of dicts to be stored, one per line.
+    :param path: the output path.
+    :param index: when ``True``, we will also write a binary offset index next to the JSONL file
+        (see :class:`JsonlIndex`), which enables random access by item ID in lazily opened manifests.
+        Not supported for the manifests whose items have no IDs (``FeatureSet``).
+    :param num_jobs: when larger than 1, the items are serialized (and compressed) in chunks
+        by a pool of ``num_jobs`` worker processes. Compressed chunks are written as separate
+        gzip members, which are transparently read back as a single stream.
+    """
+    if num_jobs > 1:
+        return _save_to_jsonl_parallel(data, path, index=index, num_jobs=num_jobs)
     compressed = str(path).endswith('.gz')
     opener = gzip.open if compressed else open
     mode = 'wt' if compressed else 'w'
+    ids, offsets = [], []
+    offset = 0
     with opener(path, mode) as f:
         for item in data:
-            print(json.dumps(item), file=f)
+            line = json.dumps(item) + '\n'
+            f.write(line)
+            if index:
+                ids.append(_index_id(item))
+                offsets.append(offset)
+                # The offsets are expressed in bytes of the (decompressed) stream.
+                offset += len(line.encode('utf-8'))
+    if index:
+        JsonlIndex(ids=ids, offsets=offsets).save(path)
+
+
+def _save_to_jsonl_parallel(
+        data: Iterable[Dict[str, Any]],
+        path: Pathlike,
+        index: bool,
+        num_jobs: int
+) -> None:
+    compressed = str(path).endswith('.gz')
+    chunks = grouper(JSONL_WRITE_CHUNK_SIZE, data)
+    ids, offsets = [], []
+    offset = 0
+    with ProcessPoolExecutor(num_jobs) as ex, open(path, 'wb') as f:
+        # Note: the chunks are written in order, and only a few of them are in flight at once.
+        for payload, chunk_ids, line_sizes in map_read_ahead(
+                ex, partial(_serialize_jsonl_chunk, compressed=compressed, index=index), chunks,
+                read_ahead=2 * num_jobs
+        ):
+            f.write(payload)
+            if index:
+                ids.extend(chunk_ids)
+                for size in line_sizes:
+                    offsets.append(offset)
+                    offset += size
+    if index:
+        JsonlIndex(ids=ids, offsets=offsets).save(path)
+
+
+def _serialize_jsonl_chunk(
+        items: Iterable[Dict[str, Any]],
+        compressed: bool,
+        index: bool = False,
+) -> Tuple[bytes, List[str], List[int]]:
+    lines = [(json.dumps(item) + '\n').encode('utf-8') for item in items]
+    payload = b''.join(lines)
+    if compressed:
+        payload = gzip.compress(payload)
+    ids = [_index_id(item) for item in items] if index else []
+    return payload, ids, [len(line) for line in lines]
+
+
+def _index_id(item: Dict[str, Any]) -> str:
+    try:
+        return item['id']
+    except KeyError:
+        raise ValueError(
+            "Can't create an offset index (index=True) for a manifest whose items have no IDs (e.g. FeatureSet)."
+        )
 
 
-def load_jsonl(path: Pathlike) -> Generator[Dict[str, Any], None, None]:
-    """Load a JSON file. Also supports compressed JSON with a ``.gz`` extension."""
+def load_jsonl(path: Pathlike, num_jobs: int = 1) -> Generator[Dict[str, Any], None, None]:
+    """
+    Load a JSON file. Also supports compressed JSON with a ``.gz`` extension.
+
+    :param path: the path to a JSONL file.
+    :param num_jobs: when larger than 1, the (decompressed) file is split into chunks of lines
+        that are parsed concurrently by ``num_jobs`` worker processes (see :func:`load_jsonl_parallel`).
+    """
+    if num_jobs > 1:
+        yield from load_jsonl_parallel(path, num_jobs=num_jobs)
+        return
     opener = gzip.open if str(path).endswith('.gz') else open
     with opener(path) as f:
         for line in f:
@@ -92,6 +204,57 @@ def load_jsonl(path: Pathlike) -> Generator[Dict[str, Any], None, None]:
             yield ret
 
 
+def load_jsonl_parallel(
+        path: Pathlike,
+        num_jobs: int,
+        deserialize: bool = False,
+        chunk_size: int = JSONL_READ_CHUNK_SIZE,
+) -> Generator[Any, None, None]:
+    """
+    Load a JSONL file using a pool of worker processes.
+    The main process reads (and decompresses, for ``.gz`` files) the data in blocks of ``chunk_size``
+    bytes that are aligned to line boundaries; the workers parse the lines (with ``orjson``, when it is
+    installed) and optionally convert them to Lhotse objects with :func:`deserialize_item`.
+    The items are yielded in the same order as they are stored in the file; at most ``2 * num_jobs`` chunks
+    are held in memory at once.
+
+    :param path: the path to a JSONL file.
+    :param num_jobs: the number of worker processes.
+    :param deserialize: when ``True``, yield Lhotse objects (e.g. ``MonoCut``) instead of dicts.
+    :param chunk_size: the approximate number of bytes of JSONL parsed by a worker at once.
+    """
+    with ProcessPoolExecutor(num_jobs) as ex:
+        # Only a few chunks are read ahead of the consumer, to limit the memory usage.
+        for items in map_read_ahead(
+                ex,
+                partial(_parse_jsonl_chunk, deserialize=deserialize),
+                _read_line_aligned_chunks(path, chunk_size),
+                read_ahead=2 * num_jobs,
+        ):
+            yield from items
+
+
+def _read_line_aligned_chunks(path: Pathlike, chunk_size: int) -> Generator[bytes, None, None]:
+    opener = gzip.open if str(path).endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            if not chunk.endswith(b'\n'):
+                # Complete the last line so that no line is split between two chunks.
+                chunk += f.readline()
+            yield chunk
+
+
+def _parse_jsonl_chunk(chunk: bytes, deserialize: bool) -> List[Any]:
+    loads = _json_loads_fn()
+    items = [loads(line) for line in chunk.splitlines() if line.strip()]
+    if deserialize:
+        items = [deserialize_item(item) for item in items]
+    return items
+
+
 class SequentialJsonlWriter:
     """
     SequentialJsonlWriter allows to store the manifests one by one,
@@ -159,6 +322,10 @@ class SequentialJsonlWriter:
     def contains(self, item: Union[str, Any]) -> bool:
         return item in self
 
+    def flush(self) -> None:
+        """Flush the items written so far to the file, so that they are not lost if the process dies."""
+        self.file.flush()
+
     def write(self, manifest) -> None:
         """
         Serializes a manifest item (e.g. :class:`~lhotse.audio.Recording`,
@@ -176,8 +343,8 @@ class SequentialJsonlWriter:
 
 
 class JsonlMixin:
-    def to_jsonl(self, path: Pathlike) -> None:
-        save_to_jsonl(self.to_dicts(), path)
+    def to_jsonl(self, path: Pathlike, index: bool = False, num_jobs: int = 1) -> None:
+        save_to_jsonl(self.to_dicts(), path, index=index, num_jobs=num_jobs)
 
     @classmethod
     def from_jsonl(cls, path: Pathlike) -> Manifest:
@@ -227,14 +394,54 @@ class LazyMixin:
     def from_jsonl_lazy(cls, path: Pathlike) -> Manifest:
         """
         Read a JSONL manifest in a lazy manner, which opens the file but does not
-        read it immediately. It is only suitable for sequential reads and iteration.
+        read it immediately. It is best suited for sequential reads and iteration;
+        random access by item ID is supported through an offset index (see :class:`JsonlIndex`).
 
         .. warning:: Opening the manifest in this way might cause some methods that
-            rely on random access to fail.
+            rely on random access by position to fail or be slow.
         """
         return cls(LazyJsonlIterator(path))
 
 
+class ColumnarMixin:
+    def to_columnar(self, path: Pathlike) -> None:
+        """
+        Store the manifest in a columnar, memory-mapped format (a directory).
+        See :mod:`lhotse.columnar` for details.
+        """
+        from lhotse.columnar import write_columnar
+        write_columnar(self, path)
+
+    @classmethod
+    def from_columnar(cls, path: Pathlike) -> Manifest:
+        """
+        Open a manifest stored in the columnar format (see :meth:`to_columnar`).
+        The underlying arrays are memory-mapped, and the manifest items
+        are only created when they are accessed.
+        """
+        from lhotse.columnar import ColumnarManifest
+        return cls(ColumnarManifest(path))
+
+
+class ShardedMixin:
+    def to_shards(self, path: Pathlike, shard_size: int = 10000, compressed: bool = True) -> None:
+        """
+        Store the manifest as a directory of JSONL shards with a shard index.
+        See :mod:`lhotse.sharding` for details.
+        """
+        from lhotse.sharding import write_sharded
+        write_sharded(self, path, shard_size=shard_size, compressed=compressed)
+
+    @classmethod
+    def from_shards(cls, path: Pathlike) -> Manifest:
+        """
+        Open a sharded manifest (see :meth:`to_shards`) lazily.
+        The shards are read one at a time, when the manifest is iterated.
+        """
+        from lhotse.sharding import ShardedJsonlIterator
+        return cls(ShardedJsonlIterator(path))
+
+
 def grouper(n, iterable):
     """https://stackoverflow.com/questions/8991506/iterate-an-iterator-by-chunks-of-n-in-python"""
     it = iter(iterable)
@@ -245,16 +452,66 @@ def grouper(n, iterable):
         yield chunk
 
 
+def drop_incomplete_last_line(path: Path) -> None:
+    """
+    Remove the last line of a JSONL file if it was not completely written (e.g. the process was killed),
+    so that the file can be read and appended to.
+    """
+    if not path.is_file():
+        return
+    block_size = 64 * 1024
+    with open(path, 'rb+') as f:
+        end = f.seek(0, os.SEEK_END)
+        if end == 0:
+            return
+        f.seek(end - 1)
+        if f.read(1) == b'\n':
+            return
+        # Scan backwards in blocks for the last newline, without reading the whole file.
+        pos = end
+        while pos > 0:
+            start = max(0, pos - block_size)
+            f.seek(start)
+            newline = f.read(pos - start).rfind(b'\n')
+            if newline != -1:
+                f.truncate(start + newline + 1)
+                return
+            pos = start
+        f.truncate(0)
+
+
 def extension_contains(ext: str, path: Path) -> bool:
     return any(ext == sfx for sfx in path.suffixes)
 
 
-def load_manifest(path: Pathlike, manifest_cls: Optional[Type] = None) -> Manifest:
-    """Generic utility for reading an arbitrary manifest."""
+def load_manifest(path: Pathlike, manifest_cls: Optional[Type] = None, num_jobs: int = 1) -> Manifest:
+    """
+    Generic utility for reading an arbitrary manifest.
+
+    :param path: the path to a manifest file (JSON, JSONL, YAML, optionally gzipped) or a columnar/sharded manifest directory.
+    :param manifest_cls: optional manifest class (e.g. ``CutSet``); when not provided, it is inferred from the data.
+    :param num_jobs: the number of worker processes used to parse JSONL manifests.
+        Other formats are always read in the main process.
+    """
     from lhotse import CutSet, FeatureSet, RecordingSet, SupervisionSet
     # Determine the serialization format and read the raw data.
     path = Path(path)
+    if path.is_dir():
+        from lhotse.columnar import ColumnarManifest, is_columnar_manifest
+        from lhotse.sharding import ShardedJsonlIterator, is_sharded_manifest
+        if is_sharded_manifest(path):
+            storage = ShardedJsonlIterator(path)
+        else:
+            assert is_columnar_manifest(path), f'Not a columnar or sharded manifest directory: {path}'
+            storage = ColumnarManifest(path)
+        if manifest_cls is None:
+            manifest_cls = {
+                cls.__name__: cls for cls in [RecordingSet, SupervisionSet, CutSet]
+            }[storage.manifest_type]
+        return manifest_cls(storage)
     assert path.is_file(), f'No such path: {path}'
+    if extension_contains('.jsonl', path) and num_jobs > 1:
+        return _manifest_from_items(load_jsonl_parallel(path, num_jobs=num_jobs, deserialize=True), manifest_cls)
     if extension_contains('.jsonl', path):
         raw_data = load_jsonl(path)
         if manifest_cls is None:
@@ -288,10 +545,39 @@ def load_manifest(path: Pathlike, manifest_cls: Optional[Type] = None) -> Manife
     return data_set
 
 
-def store_manifest(manifest: Manifest, path: Pathlike) -> None:
+def _manifest_from_items(items: Iterable[Any], manifest_cls: Optional[Type] = None) -> Manifest:
+    from lhotse import CutSet, FeatureSet, Features, Recording, RecordingSet, SupervisionSegment, SupervisionSet
+    from lhotse.cut import Cut
+    items = list(items)
+    if manifest_cls is None:
+        # Infer the manifest type from the type of the items;
+        # an empty manifest defaults to a CutSet.
+        manifest_cls = CutSet
+        if items:
+            for item_type, cls in [
+                (Recording, RecordingSet),
+                (SupervisionSegment, SupervisionSet),
+                (Features, FeatureSet),
+                (Cut, CutSet),
+            ]:
+                if isinstance(items[0], item_type):
+                    manifest_cls = cls
+                    break
+            else:
+                raise ValueError(f'Unknown type of manifest items: {type(items[0])}')
+    constructors = {
+        RecordingSet: RecordingSet.from_recordings,
+        SupervisionSet: SupervisionSet.from_segments,
+        FeatureSet: FeatureSet.from_features,
+        CutSet: CutSet.from_cuts,
+    }
+    return constructors[manifest_cls](items)
+
+
+def store_manifest(manifest: Manifest, path: Pathlike, num_jobs: int = 1) -> None:
     path = Path(path)
     if extension_contains('.jsonl', path):
-        manifest.to_jsonl(path)
+        manifest.to_jsonl(path, num_jobs=num_jobs)
     elif extension_contains('.json', path):
         manifest.to_json(path)
     elif extension_contains('.yaml', path):
@@ -300,13 +586,110 @@ def store_manifest(manifest: Manifest, path: Pathlike) -> None:
         raise ValueError(f"Unknown serialization format for: {path}")
 
 
-class Serializable(JsonMixin, JsonlMixin, LazyMixin, YamlMixin):
+class Serializable(JsonMixin, JsonlMixin, LazyMixin, YamlMixin, ColumnarMixin, ShardedMixin):
     @classmethod
-    def from_file(cls, path: Pathlike) -> Manifest:
-        return load_manifest(path, manifest_cls=cls)
+    def from_file(cls, path: Pathlike, lazy: bool = False, num_jobs: int = 1) -> Manifest:
+        """
+        Read a manifest from a file (JSON, JSONL, YAML, with optional gzip compression).
 
-    def to_file(self, path: Pathlike) -> None:
-        store_manifest(self, path)
+        :param path: the path to the manifest.
+        :param lazy: when ``True``, a JSONL manifest will be opened lazily
+            (see :meth:`~lhotse.serialization.LazyMixin.from_jsonl_lazy`).
+        :param num_jobs: the number of worker processes used to parse a JSONL manifest.
+        """
+        if lazy:
+            return cls.from_jsonl_lazy(path)
+        return load_manifest(path, manifest_cls=cls, num_jobs=num_jobs)
+
+    def to_file(self, path: Pathlike, num_jobs: int = 1) -> None:
+        store_manifest(self, path, num_jobs=num_jobs)
+
+
+class JsonlIndex:
+    """
+    JsonlIndex maps the item IDs in a JSONL manifest to the byte offsets of the lines
+    that store them. It is persisted in a binary file next to the manifest
+    (e.g. ``cuts.jsonl`` -> ``cuts.jsonl.lidx``), so that it is computed only once.
+
+    For gzip-compressed manifests, the offsets refer to the decompressed stream.
+    Note that random access reads in compressed files require decompressing the data
+    that precedes the requested item, so they are much slower than for uncompressed files.
+
+    The binary layout is: a magic string, a header with the format version, the number of items,
+    the size and the modification time of the manifest (used to detect stale indexes),
+    followed by an array of uint64 offsets and the newline-separated, UTF-8 encoded IDs.
+    """
+    MAGIC = b'LHOTSEIDX'
+    VERSION = 1
+    _HEADER = struct.Struct('<IQQQ')
+
+    def __init__(self, ids: List[str], offsets: List[int]) -> None:
+        assert len(ids) == len(offsets)
+        self.ids = ids
+        self.offsets = offsets
+        self._positions = None
+
+    @staticmethod
+    def path_for(manifest_path: Pathlike) -> Path:
+        return Path(str(manifest_path) + '.lidx')
+
+    @staticmethod
+    def build(manifest_path: Pathlike) -> 'JsonlIndex':
+        """Scan the JSONL manifest and create its index."""
+        opener = gzip.open if str(manifest_path).endswith('.gz') else open
+        ids, offsets = [], []
+        offset = 0
+        with opener(manifest_path, 'rb') as f:
+            for line in f:
+                ids.append(json.loads(line)['id'])
+                offsets.append(offset)
+                offset += len(line)
+        return JsonlIndex(ids=ids, offsets=offsets)
+
+    def save(self, manifest_path: Pathlike) -> None:
+        stat = Path(manifest_path).stat()
+        with open(JsonlIndex.path_for(manifest_path), 'wb') as f:
+            f.write(JsonlIndex.MAGIC)
+            f.write(JsonlIndex._HEADER.pack(JsonlIndex.VERSION, len(self.ids), stat.st_size, stat.st_mtime_ns))
+            array('Q', self.offsets).tofile(f)
+            f.write('\n'.join(self.ids).encode('utf-8'))
+
+    @staticmethod
+    def load(manifest_path: Pathlike) -> Optional['JsonlIndex']:
+        """
+        Load the index of the JSONL manifest from disk.
+        Returns ``None`` when the index does not exist or is out-of-date with the manifest.
+        """
+        index_path = JsonlIndex.path_for(manifest_path)
+        if not index_path.is_file():
+            return None
+        stat = Path(manifest_path).stat()
+        with open(index_path, 'rb') as f:
+            if f.read(len(JsonlIndex.MAGIC)) != JsonlIndex.MAGIC:
+                return None
+            version, num_items, size, mtime_ns = JsonlIndex._HEADER.unpack(f.read(JsonlIndex._HEADER.size))
+            if version != JsonlIndex.VERSION or size != stat.st_size or mtime_ns != stat.st_mtime_ns:
+                return None
+            offsets = array('Q')
+            offsets.fromfile(f, num_items)
+            ids = f.read().decode('utf-8').split('\n') if num_items > 0 else []
+        return JsonlIndex(ids=ids, offsets=offsets)
+
+    def offset_of(self, item_id: str) -> int:
+        """Return the byte offset of the line holding the item ``item_id``; raise ``KeyError`` if missing."""
+        if self._positions is None:
+            self._positions = {item_id: pos for pos, item_id in enumerate(self.ids)}
+        return self.offsets[self._positions[item_id]]
+
+    def __contains__(self, item_id: str) -> bool:
+        try:
+            self.offset_of(item_id)
+            return True
+        except KeyError:
+            return False
+
+    def __len__(self) -> int:
+        return len(self.ids)
 
 
 class LazyJsonlIterator:
@@ -316,17 +699,61 @@ class LazyJsonlIterator:
 
     This class is designed to be a partial "drop-in" replacement for ordinary dicts
     to support lazy loading of RecordingSet, SupervisionSet and CutSet.
-    Since it does not support random access reads, some methods of these classes
-    might not work properly.
+
+    Random access by item ID (``manifest[item_id]``, ``item_id in manifest``), ``len()``,
+    and ``keys()`` are served by a :class:`JsonlIndex` that is stored next to the JSONL file.
+    The index is created when the manifest is saved with ``to_jsonl(path, index=True)``,
+    or otherwise built with a single scan of the file the first time it is needed
+    (and then saved to disk for later re-use, when possible), unless an ``index`` is provided.
+
+    The files opened for iteration and random access are closed with :meth:`close`
+    (or when it is used as a context manager).
     """
-    def __init__(self, path: Pathlike) -> None:
+    def __init__(self, path: Pathlike, index: Optional[JsonlIndex] = None) -> None:
         self.path = Path(path)
         assert extension_contains('.jsonl', self.path)
+        self._index = index
+        self._file = None
+        self._reader = None
+
+    @property
+    def index(self) -> JsonlIndex:
+        if self._index is None:
+            self._index = JsonlIndex.load(self.path)
+            if self._index is None:
+                self._index = JsonlIndex.build(self.path)
+                try:
+                    self._index.save(self.path)
+                except OSError:
+                    # E.g. the manifest is in a read-only directory: we'll keep the index in memory.
+                    pass
+        return self._index
+
+    @property
+    def has_index(self) -> bool:
+        """Is the offset index already available (in memory or on disk) without scanning the manifest."""
+        if self._index is None:
+            self._index = JsonlIndex.load(self.path)
+        return self._index is not None
 
     def _reset(self) -> None:
         opener = gzip.open if str(self.path).endswith('.gz') else open
         self._file = opener(self.path)
 
+    def close(self) -> None:
+        """Close the files opened for iteration and random access (they are re-opened when needed)."""
+        for f in (self._file, self._reader):
+            if f is not None:
+                f.close()
+        self._file = None
+        self._reader = None
+
+    def __enter__(self) -> 'LazyJsonlIterator':
+        return self
+
+    def __exit__(self, *args, **kwargs) -> None:
+        self.close()
+
     def __getstate__(self):
         """
         Store the state for pickling -- we'll only store the path, and re-initialize
@@ -339,6 +766,9 @@ class LazyJsonlIterator:
     def __setstate__(self, state: Dict):
         """Restore the state when unpickled -- open the jsonl file again."""
         self.__dict__.update(state)
+        self._index = None
+        self._file = None
+        self._reader = None
 
     def __iter__(self):
         self._reset()
@@ -354,12 +784,27 @@ class LazyJsonlIterator:
         yield from self
 
     def keys(self):
-        return (item.id for item in self)
+        return iter(self.index.ids)
 
     def items(self):
         return ((item.id, item) for item in self)
 
+    def __getitem__(self, item_id: str) -> Any:
+        offset = self.index.offset_of(item_id)
+        if self._reader is None:
+            # Keep a separate handle open for random access reads, so that they
+            # don't interfere with iteration and don't re-open the file on each access.
+            opener = gzip.open if str(self.path).endswith('.gz') else open
+            self._reader = opener(self.path, 'rb')
+        self._reader.seek(offset)
+        return deserialize_item(json.loads(self._reader.readline()))
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self.index
+
     def __len__(self) -> int:
+        if self.has_index:
+            return len(self.index)
         return count_newlines_fast(self.path)
 
 
@@ -0,0 +1,226 @@
+"""
+Sharded manifests for large-scale and multi-node training.
+
+A sharded manifest is a directory with several JSONL shards and an index file
+that lists them together with the number of items and the total duration in each shard::
+
+    manifest_dir/
+        index.json              # format version, manifest type, list of shards
+        shard-00000.jsonl.gz
+        shard-00001.jsonl.gz
+        ...
+
+The index allows to know the size of the manifest and to assign the shards to
+distributed nodes (and dataloader workers) without opening any of the shards,
+so that each node only reads its own files.
+
+Example:
+
+    >>> cuts = CutSet.from_file('cuts.jsonl.gz')
+    >>> cuts.to_shards('cuts_sharded', shard_size=10000)
+    >>> cuts = CutSet.from_shards('cuts_sharded')
+    >>> my_cuts = CutSet(cuts.cuts.select_shards(rank=0, world_size=8))
+"""
+import json
+import random
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from lhotse.serialization import JsonlIndex, LazyJsonlIterator, grouper, save_to_jsonl
+from lhotse.utils import Pathlike
+
+SHARDED_FORMAT_VERSION = 1
+SHARD_INDEX_FILENAME = 'index.json'
+
+
+def is_sharded_manifest(path: Pathlike) -> bool:
+    """Check whether ``path`` points to a directory with a sharded manifest."""
+    return (Path(path) / SHARD_INDEX_FILENAME).is_file()
+
+
+def write_sharded(
+        manifest: Iterable[Any],
+        path: Pathlike,
+        shard_size: int = 10000,
+        compressed: bool = True,
+) -> None:
+    """
+    Store the items of a manifest (e.g. a :class:`~lhotse.cut.CutSet`) as a sharded manifest.
+    The items are consumed in a single pass, so ``manifest`` can be a lazily opened manifest.
+
+    :param manifest: a ``CutSet``, ``RecordingSet`` or ``SupervisionSet``.
+    :param path: the output directory (it will be created if it does not exist).
+    :param shard_size: the number of items in each shard (the last one might be smaller).
+    :param compressed: should the shards be gzip-compressed.
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    suffix = '.jsonl.gz' if compressed else '.jsonl'
+    shards = []
+    for idx, items in enumerate(grouper(shard_size, manifest)):
+        name = f'shard-{idx:05d}{suffix}'
+        save_to_jsonl((item.to_dict() for item in items), path / name)
+        shards.append({
+            'path': name,
+            'num_items': len(items),
+            'duration': sum(getattr(item, 'duration', 0.0) or 0.0 for item in items),
+        })
+    with open(path / SHARD_INDEX_FILENAME, 'w') as f:
+        json.dump({
+            'version': SHARDED_FORMAT_VERSION,
+            'manifest_type': type(manifest).__name__,
+            'shards': shards,
+        }, f, indent=2)
+
+
+class ShardedJsonlIterator:
+    """
+    ShardedJsonlIterator provides the ability to read Lhotse objects from a sharded manifest
+    on-the-fly (see :func:`write_sharded`), one shard at a time.
+    Like :class:`~lhotse.serialization.LazyJsonlIterator`, it is designed to be a partial "drop-in"
+    replacement for ordinary dicts to support lazy loading of RecordingSet, SupervisionSet and CutSet.
+
+    It may represent only a subset of the shards (see :meth:`select_shards`),
+    which is how the shards are assigned to distributed nodes and dataloader workers.
+    When ``split_by_worker`` is set, the shards are additionally split between the dataloader
+    workers at iteration time (useful when the manifest is iterated inside an ``IterableDataset``).
+
+    Only the path and the selection of shards are pickled, so it can be cheaply sent to DataLoader workers.
+    """
+
+    def __init__(
+            self,
+            path: Pathlike,
+            shards: Optional[List[Dict[str, Any]]] = None,
+            split_by_worker: bool = False,
+    ) -> None:
+        self.path = Path(path)
+        assert is_sharded_manifest(self.path), f"Not a sharded manifest: {self.path}"
+        if shards is None:
+            shards = self.index['shards']
+        self.shards = shards
+        self.split_by_worker = split_by_worker
+        # Random access by item ID: the shard that holds each item, and a reader for each shard.
+        self._shard_of_item: Optional[Dict[str, str]] = None
+        self._readers: Dict[str, LazyJsonlIterator] = {}
+
+    def __getstate__(self):
+        return {'path': self.path, 'shards': self.shards, 'split_by_worker': self.split_by_worker}
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._shard_of_item = None
+        self._readers = {}
+
+    @property
+    def index(self) -> Dict[str, Any]:
+        with open(self.path / SHARD_INDEX_FILENAME) as f:
+            return json.load(f)
+
+    @property
+    def manifest_type(self) -> str:
+        return self.index['manifest_type']
+
+    @property
+    def num_shards(self) -> int:
+        return len(self.shards)
+
+    @property
+    def total_duration(self) -> float:
+        """Total duration of the items in the selected shards, read from the shard index."""
+        return sum(shard['duration'] for shard in self.shards)
+
+    def select_shards(
+            self,
+            rank: int = 0,
+            world_size: int = 1,
+            worker_id: int = 0,
+            num_workers: int = 1,
+            split_by_worker: bool = False,
+    ) -> 'ShardedJsonlIterator':
+        """
+        Return a new ``ShardedJsonlIterator`` with the shards assigned to a given distributed node
+        (``rank`` out of ``world_size``) and dataloader worker (``worker_id`` out of ``num_workers``).
+        The shards are assigned in a round-robin manner.
+
+        :param split_by_worker: when ``True``, the shards assigned to this node will be further split
+            between the dataloader workers at iteration time (``worker_id`` and ``num_workers``
+            are then detected automatically and should not be specified).
+        """
+        assert 0 <= rank < world_size
+        assert 0 <= worker_id < num_workers
+        assert not (split_by_worker and num_workers > 1), \
+            "Either specify the worker explicitly, or set split_by_worker=True."
+        num_parts = world_size * num_workers
+        part = rank * num_workers + worker_id
+        return ShardedJsonlIterator(self.path, shards=self.shards[part::num_parts], split_by_worker=split_by_worker)
+
+    def shuffle_shards(self, rng: random.Random) -> 'ShardedJsonlIterator':
+        """Return a new ``ShardedJsonlIterator`` with the order of the shards shuffled."""
+        shards = list(self.shards)
+        rng.shuffle(shards)
+        return ShardedJsonlIterator(self.path, shards=shards, split_by_worker=self.split_by_worker)
+
+    def _shards_to_read(self) -> List[Dict[str, Any]]:
+        if not self.split_by_worker:
+            return self.shards
+        from torch.utils.data import get_worker_info
+        info = get_worker_info()
+        if info is None:
+            return self.shards
+        return self.shards[info.id::info.num_workers]
+
+    def _open_shard(self, shard: Dict[str, Any]) -> LazyJsonlIterator:
+        return LazyJsonlIterator(self.path / shard['path'])
+
+    def __iter__(self) -> Iterator[Any]:
+        for shard in self._shards_to_read():
+            yield from self._open_shard(shard)
+
+    def values(self) -> Iterator[Any]:
+        yield from self
+
+    def keys(self) -> Iterator[str]:
+        return (item.id for item in self)
+
+    def items(self) -> Iterator:
+        return ((item.id, item) for item in self)
+
+    def _build_item_map(self) -> Dict[str, str]:
+        """
+        Map the IDs of the items to the shards that hold them. The offset indexes of the shards are used
+        when they exist (see ``save_to_jsonl(index=True)``); otherwise the shards are scanned once,
+        and the indexes are kept in memory (the shard directory is not modified).
+        """
+        if self._shard_of_item is None:
+            self._shard_of_item = {}
+            for shard in self.shards:
+                shard_path = self.path / shard['path']
+                index = JsonlIndex.load(shard_path)
+                if index is None:
+                    index = JsonlIndex.build(shard_path)
+                self._readers[shard['path']] = LazyJsonlIterator(shard_path, index=index)
+                self._shard_of_item.update(dict.fromkeys(index.ids, shard['path']))
+        return self._shard_of_item
+
+    def close(self) -> None:
+        """Close the files opened for random access."""
+        for reader in self._readers.values():
+            reader.close()
+
+    def __getitem__(self, item_id: str) -> Any:
+        shard = self._build_item_map().get(item_id)
+        if shard is None:
+            raise KeyError(item_id)
+        return self._readers[shard][item_id]
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._build_item_map()
+
+    def __len__(self) -> int:
+        return sum(shard['num_items'] for shard in self._shards_to_read())
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, ShardedJsonlIterator):
+            return self.path == other.path and self.shards == other.shards
+        return dict(self.items()) == other
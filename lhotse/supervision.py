@@ -361,7 +361,8 @@ class SupervisionSet(Serializable, Sequence[SupervisionSegment]):
         Indicates whether this manifest was opened in lazy (read-on-the-fly) mode or not.
         """
         from lhotse.serialization import LazyJsonlIterator
-        return isinstance(self.segments, LazyJsonlIterator)
+        from lhotse.sharding import ShardedJsonlIterator
+        return isinstance(self.segments, (LazyJsonlIterator, ShardedJsonlIterator))
 
     @property
     def ids(self) -> Iterable[str]:
@@ -1,7 +1,12 @@
+import io
 import math
 import random
+import re
+import urllib.request
 import uuid
 import logging
+from collections import OrderedDict, deque
+from concurrent.futures import Executor
 from contextlib import AbstractContextManager, contextmanager
 from dataclasses import asdict, dataclass
 from decimal import Decimal, ROUND_HALF_DOWN, ROUND_HALF_UP
@@ -97,6 +102,110 @@ class SmartOpen:
         return cls.smart_open(uri, mode=mode, compression=compression, transport_params=transport_params, **kwargs)
 
 
+class HttpRangeReader(io.RawIOBase):
+    """
+    A read-only, seekable file-like object for HTTP(S) resources that fetches the data
+    in blocks with HTTP range requests (``Range: bytes=start-end``).
+    The most recently used blocks are kept in memory, so that the small, nearby reads issued by
+    audio decoders (e.g. soundfile) do not result in separate requests.
+
+    It allows to read a chunk of a long recording stored on a web server without downloading
+    the whole file. The total number of bytes downloaded is available as ``bytes_transferred``.
+
+    Raises an ``OSError`` when the server does not support range requests.
+
+    Example::
+
+        >>> import soundfile as sf
+        >>> with HttpRangeReader('https://example.com/recording.wav') as f:
+        ...     with sf.SoundFile(f) as audio:
+        ...         audio.seek(16000 * 3600)
+        ...         samples = audio.read(16000 * 5)
+    """
+
+    def __init__(
+            self,
+            url: str,
+            block_size: int = 256 * 1024,
+            max_cached_blocks: int = 32,
+            timeout: float = 30.0,
+    ) -> None:
+        super().__init__()
+        self.url = url
+        self.block_size = block_size
+        self.max_cached_blocks = max_cached_blocks
+        self.timeout = timeout
+        self.bytes_transferred = 0
+        self._blocks: 'OrderedDict[int, bytes]' = OrderedDict()
+        self._pos = 0
+        # The first request tells us both whether the server supports range requests,
+        # and the size of the resource (from the Content-Range header).
+        first_block, self.size = self._request(0, block_size - 1)
+        self._store_block(0, first_block)
+
+    def _request(self, start: int, end: int) -> Tuple[bytes, int]:
+        request = urllib.request.Request(self.url, headers={'Range': f'bytes={start}-{end}'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            if response.status != 206:
+                raise OSError(f'The server does not support HTTP range requests for: {self.url}')
+            data = response.read()
+            content_range = response.headers.get('Content-Range', '')
+        self.bytes_transferred += len(data)
+        match = re.match(r'bytes \d+-\d+/(\d+)', content_range)
+        if match is None:
+            raise OSError(f'Invalid Content-Range header ("{content_range}") in response for: {self.url}')
+        return data, int(match.group(1))
+
+    def _store_block(self, idx: int, data: bytes) -> None:
+        self._blocks[idx] = data
+        while len(self._blocks) > self.max_cached_blocks:
+            self._blocks.popitem(last=False)
+
+    def _get_block(self, idx: int) -> bytes:
+        if idx in self._blocks:
+            self._blocks.move_to_end(idx)
+            return self._blocks[idx]
+        start = idx * self.block_size
+        data, _ = self._request(start, min(start + self.block_size, self.size) - 1)
+        self._store_block(idx, data)
+        return data
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self.size + offset
+        else:
+            raise ValueError(f'Invalid whence value: {whence}')
+        if pos < 0:
+            raise ValueError(f'Negative seek position: {pos}')
+        self._pos = pos
+        return self._pos
+
+    def readinto(self, buffer) -> int:
+        view = memoryview(buffer).cast('B')
+        num_read = 0
+        while num_read < len(view) and self._pos < self.size:
+            idx, block_offset = divmod(self._pos, self.block_size)
+            block = self._get_block(idx)
+            chunk = block[block_offset:block_offset + len(view) - num_read]
+            view[num_read:num_read + len(chunk)] = chunk
+            num_read += len(chunk)
+            self._pos += len(chunk)
+        return num_read
+
+
 def fix_random_seed(random_seed: int):
     """
     Set the same random seed for the libraries and modules that Lhotse interacts with.
@@ -477,6 +586,21 @@ def supervision_to_samples(
     return start_sample, num_samples
 
 
+def map_read_ahead(executor: Executor, fn: Callable, items: Iterable, read_ahead: int) -> Iterable:
+    """
+    Like ``executor.map(fn, items)``, but with at most ``read_ahead`` tasks submitted ahead of the consumer,
+    so that neither ``items`` nor the results are materialized all at once.
+    The results are yielded in the order of ``items``.
+    """
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(fn, item))
+        if len(pending) > read_ahead:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
 def is_none_or_gt(value, threshold) -> bool:
     return value is None or value > threshold
 
@@ -1,5 +1,7 @@
 import math
+from fractions import Fraction
 
+import numpy as np
 import pytest
 import torch
 from hypothesis import given, settings
@@ -7,7 +9,10 @@ from hypothesis import strategies as st
 
 torchaudio = pytest.importorskip('torchaudio', minversion='0.6')
 
-from lhotse.augmentation import SoxEffectTransform, pitch, reverb, speed, Speed
+from lhotse.augmentation import SoxEffectTransform, pitch, reverb, speed, Speed, resample_polyphase, \
+    resample_polyphase_batch, set_resampling_backend, speed_perturb_batch
+from lhotse.augmentation.resample import get_resampling_kernel
+from lhotse.augmentation.torchaudio import ResamplingChain, fuse_resampling_transforms
 from lhotse import AudioTransform, MonoCut, Recording, Resample, Seconds
 
 SAMPLING_RATE = 16000
@@ -65,6 +70,68 @@ def test_resample(audio, sampling_rate):
     assert perturbed.shape == (1, sampling_rate)
 
 
+@pytest.fixture
+def sox_backend():
+    set_resampling_backend('sox')
+    yield
+    set_resampling_backend('polyphase')
+
+
+def sines(sampling_rate: int, duration: float = 1.0) -> np.ndarray:
+    t = np.arange(int(duration * sampling_rate)) / sampling_rate
+    return (0.3 * np.sin(2 * math.pi * 440 * t) + 0.2 * np.sin(2 * math.pi * 1234 * t)).astype(np.float32)[None]
+
+
+@pytest.mark.parametrize('sampling_rate', [8000, 22050, 44100])
+def test_resample_polyphase_matches_sox(sampling_rate):
+    audio = sines(16000)
+    polyphase = Resample(16000, sampling_rate)(audio)
+    set_resampling_backend('sox')
+    try:
+        sox = Resample(16000, sampling_rate)(audio)
+    finally:
+        set_resampling_backend('polyphase')
+    assert polyphase.shape == sox.shape
+    # Compare away from the edges, where the filters' transients differ.
+    margin = sampling_rate // 100
+    np.testing.assert_allclose(polyphase[:, margin:-margin], sox[:, margin:-margin], atol=1e-2)
+
+
+@pytest.mark.parametrize('factor', [0.9, 1.1])
+def test_speed_polyphase_matches_sox(factor, sox_backend):
+    audio = sines(16000)
+    sox = Speed(factor)(audio, 16000)
+    set_resampling_backend('polyphase')
+    polyphase = Speed(factor)(audio, 16000)
+    assert abs(polyphase.shape[1] - sox.shape[1]) <= 1
+    num_samples = min(polyphase.shape[1], sox.shape[1]) - 160
+    np.testing.assert_allclose(polyphase[:, 160:num_samples], sox[:, 160:num_samples], atol=1e-2)
+
+
+def test_resampling_kernel_is_cached():
+    assert get_resampling_kernel(10, 11) is get_resampling_kernel(10, 11)
+
+
+def test_fuse_resampling_transforms():
+    transforms = [Speed(1.1), Resample(16000, 22050), Speed(0.9)]
+    fused = fuse_resampling_transforms(transforms)
+    assert len(fused) == 1 and isinstance(fused[0], ResamplingChain)
+    assert fused[0].resampling_ratio == Fraction(22050, 16000)
+    audio = sines(16000)
+    assert fused[0](audio, 22050).shape == (1, 22050)
+
+
+def test_resample_polyphase_batch():
+    audios = [sines(16000, 1.0), sines(16000, 0.37)[0], np.vstack([sines(16000, 0.5)] * 2)]
+    batch = resample_polyphase_batch(audios, Fraction(10, 11))
+    for audio, resampled in zip(audios, batch):
+        np.testing.assert_allclose(resampled, resample_polyphase(audio, Fraction(10, 11)), atol=1e-6)
+    assert [r.shape for r in batch] == [(1, 14545), (5382,), (2, 7273)]
+    perturbed = speed_perturb_batch(audios, [1.1, 0.9, 1.1])
+    np.testing.assert_allclose(perturbed[0], batch[0], atol=1e-6)
+    assert perturbed[1].shape == (6578,)
+
+
 @settings(deadline=None, print_blob=True, max_examples=200)
 @given(
     # Target sampling rates
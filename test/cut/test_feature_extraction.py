@@ -7,12 +7,15 @@ from functools import partial
 from tempfile import TemporaryDirectory
 from unittest.mock import Mock
 
+import numpy as np
 import pytest
 
 from lhotse import MonoCut, CutSet, Fbank, LilcomHdf5Writer, Recording
 from lhotse.audio import AudioSource
 from lhotse.cut import MixedCut
 from lhotse.features.io import LilcomFilesWriter
+from lhotse.features.pipeline import FeatureExtractionPipeline
+from lhotse.utils import fastcopy
 
 
 @pytest.fixture
@@ -141,3 +144,202 @@ def test_extract_and_store_features_from_cut_set(cut_set, executor, num_jobs, st
         arr = cuts[1].load_features()
         assert arr.shape[0] == 100
         assert arr.shape[1] == extractor.feature_dim(cuts[0].sampling_rate)
+
+
+@pytest.mark.parametrize('mix_eagerly', [False, True])
+def test_extract_and_store_features_from_cut_set_batched(cut, mix_eagerly):
+    cut_set = CutSet.from_cuts([
+        cut,
+        cut.truncate(duration=0.5, preserve_id=False),
+        cut.append(cut).pad(3.0),
+        cut.truncate(offset=0.25, duration=0.7, preserve_id=False),
+    ])
+    extractor = Fbank()
+    with TemporaryDirectory() as tmpdir:
+        cut_set_with_feats = cut_set.compute_and_store_features(
+            extractor=extractor,
+            storage_path=tmpdir,
+            mix_eagerly=mix_eagerly,
+            batch_duration=1.5,
+        )
+        # The order of cuts is retained
+        assert list(cut_set_with_feats.ids) == list(cut_set.ids)
+        for orig_cut, feat_cut in zip(cut_set, cut_set_with_feats):
+            assert feat_cut.has_features
+            arr = feat_cut.load_features()
+            assert arr.shape[0] == feat_cut.num_frames
+            assert arr.shape[1] == extractor.feature_dim(cut.sampling_rate)
+        assert [c.num_frames for c in cut_set_with_feats] == [100, 50, 300, 70]
+
+
+@pytest.mark.parametrize('num_workers', [0, 1])
+@pytest.mark.parametrize('mix_eagerly', [False, True])
+def test_extract_and_store_features_from_cut_set_pipelined(cut_set, num_workers, mix_eagerly):
+    extractor = Fbank()
+    pipeline = FeatureExtractionPipeline(num_readers=2, num_workers=num_workers, queue_size=1)
+    with TemporaryDirectory() as tmpdir:
+        cut_set_with_feats = cut_set.compute_and_store_features(
+            extractor=extractor,
+            storage_path=f'{tmpdir}/feats.h5',
+            storage_type=LilcomHdf5Writer,
+            mix_eagerly=mix_eagerly,
+            pipeline=pipeline,
+        )
+        # The order of cuts is retained
+        assert list(cut_set_with_feats.ids) == list(cut_set.ids)
+        for orig_cut, feat_cut in zip(cut_set, cut_set_with_feats):
+            assert feat_cut.has_features
+            should_have_recording = not (mix_eagerly and isinstance(orig_cut, MixedCut))
+            assert feat_cut.has_recording == should_have_recording
+        assert [c.load_features().shape[0] for c in cut_set_with_feats] == [100, 300]
+
+    stats = pipeline.stats
+    # The MonoCut always goes through the pipeline, while the MixedCut only when it's mixed eagerly.
+    num_pipelined = 2 if mix_eagerly else 1
+    assert stats.stages['read'].items == num_pipelined
+    assert stats.stages['extract'].items == num_pipelined
+    assert stats.stages['write'].items == 2
+    assert stats.queues['write'].max_depth <= 1
+    assert stats.wall_seconds > 0
+
+
+def test_extract_and_store_features_pipeline_propagates_errors(cut):
+    broken_cut = fastcopy(cut, id='broken', recording=fastcopy(
+        cut.recording, sources=[AudioSource(type='file', channels=[0, 1], source='nonexistent.wav')]
+    ))
+    with TemporaryDirectory() as tmpdir, pytest.raises(Exception):
+        CutSet.from_cuts([cut, broken_cut]).compute_and_store_features(
+            extractor=Fbank(),
+            storage_path=tmpdir,
+            pipeline=FeatureExtractionPipeline(num_workers=0),
+        )
+
+
+@pytest.mark.parametrize(
+    ['executor', 'num_jobs'],
+    [
+        (None, 1),
+        (ThreadPoolExecutor, 2),
+    ]
+)
+@pytest.mark.parametrize('storage_type', [LilcomFilesWriter, LilcomHdf5Writer])
+def test_extract_and_store_features_resumable(cut, executor, num_jobs, storage_type):
+    cut_set = CutSet.from_cuts(fastcopy(cut, id=f'cut-{idx}') for idx in range(5))
+    extractor = Fbank()
+    with TemporaryDirectory() as tmpdir:
+        storage_path = f'{tmpdir}/feats'
+
+        def run(cuts):
+            return cuts.compute_and_store_features(
+                extractor=extractor,
+                storage_path=storage_path,
+                num_jobs=num_jobs,
+                executor=executor() if executor else None,
+                storage_type=storage_type,
+                resume=True,
+            )
+
+        # The first run is "interrupted" after 3 cuts.
+        partial_cuts = run(cut_set.subset(first=3))
+        assert len(CutSet.from_extraction_progress(storage_path)) == 3
+
+        # The second run processes only the remaining cuts and returns all of them.
+        full_cuts = run(cut_set)
+        assert list(full_cuts.ids) == list(cut_set.ids)
+        for c in partial_cuts:
+            # The features were not re-computed.
+            assert full_cuts[c.id].features == c.features
+        for c in full_cuts:
+            arr = c.load_features()
+            assert arr.shape[0] == 100
+
+        # The third run has nothing to do.
+        assert run(cut_set) == full_cuts
+        assert CutSet.from_extraction_progress(storage_path) == full_cuts
+
+
+def test_extract_and_store_features_resumable_drops_incomplete_progress(cut):
+    cut_set = CutSet.from_cuts(fastcopy(cut, id=f'cut-{idx}') for idx in range(3))
+    with TemporaryDirectory() as tmpdir:
+        storage_path = f'{tmpdir}/feats'
+        cut_set.subset(first=2).compute_and_store_features(Fbank(), storage_path, resume=True)
+        # Simulate the process being killed in the middle of writing a progress manifest entry.
+        with open(f'{storage_path}.progress.jsonl', 'a') as f:
+            f.write('{"id": "cut-2", "start": 0')
+        cuts = cut_set.compute_and_store_features(Fbank(), storage_path, resume=True)
+        assert list(cuts.ids) == ['cut-0', 'cut-1', 'cut-2']
+        assert cuts['cut-2'].load_features().shape[0] == 100
+
+
+@pytest.mark.parametrize('storage_type', ['numpy_hdf5', 'numpy_mmap_arena'])
+@pytest.mark.parametrize('executor', [None, ThreadPoolExecutor])
+def test_repack_features(cut, storage_type, executor):
+    cut_set = CutSet.from_cuts([
+        cut,
+        cut.truncate(duration=0.5, preserve_id=False),
+        cut.append(cut.truncate(offset=0.25, duration=0.5, preserve_id=False)),
+    ])
+    with TemporaryDirectory() as tmpdir:
+        cut_set = cut_set.compute_and_store_features(
+            extractor=Fbank(),
+            storage_path=f'{tmpdir}/source',
+            storage_type=LilcomFilesWriter,
+        )
+        order = list(reversed(list(cut_set.ids)))
+        with no_executor() if executor is None else executor(2) as ex:
+            repacked = cut_set.repack_features(
+                storage_type=storage_type,
+                storage_path=f'{tmpdir}/target',
+                order=order,
+                executor=ex,
+                batch_size=2,
+            )
+        # The order of cuts is retained, and the features are identical.
+        assert list(repacked.ids) == list(cut_set.ids)
+        for orig_cut, new_cut in zip(cut_set, repacked):
+            np.testing.assert_equal(new_cut.load_features(), orig_cut.load_features())
+        # The tracks of the MixedCut share the storage with the other cuts,
+        # and each source matrix is written once.
+        new_features = [repacked[0].features, repacked[1].features] + [t.cut.features for t in repacked[2].tracks]
+        assert all(f.storage_type == storage_type for f in new_features)
+        assert len({f.storage_key for f in new_features}) == len({
+            f.storage_key for f in
+            [cut_set[0].features, cut_set[1].features] + [t.cut.features for t in cut_set[2].tracks]
+        })
+
+
+@pytest.mark.parametrize(
+    ['share_features', 'expected_num_matrices'],
+    [('spans', 3), ('recording', 2)]
+)
+@pytest.mark.parametrize(
+    ['executor', 'num_jobs'],
+    [(None, 1), (ThreadPoolExecutor, 2)]
+)
+def test_extract_and_store_shared_features(recording, share_features, expected_num_matrices, executor, num_jobs):
+    cut_set = CutSet.from_cuts([
+        MonoCut(id='cut1', start=0.0, duration=0.5, channel=0, recording=recording),
+        MonoCut(id='cut2', start=0.9, duration=0.1, channel=0, recording=recording),
+        MonoCut(id='cut3', start=0.3, duration=0.5, channel=0, recording=recording),
+        MonoCut(id='cut4', start=0.2, duration=0.6, channel=1, recording=recording),
+    ])
+    with TemporaryDirectory() as tmpdir, no_executor() if executor is None else executor(num_jobs) as ex:
+        cut_set_with_feats = cut_set.compute_and_store_features(
+            extractor=Fbank(),
+            storage_path=tmpdir,
+            num_jobs=num_jobs,
+            executor=ex,
+            share_features=share_features,
+        )
+        # The order of cuts is retained
+        assert list(cut_set_with_feats.ids) == list(cut_set.ids)
+        assert len({(c.features.storage_path, c.features.storage_key) for c in cut_set_with_feats}) \
+               == expected_num_matrices
+        # The cuts of a shared matrix read only their frames.
+        shared = cut_set_with_feats['cut1'].features
+        assert shared == cut_set_with_feats['cut3'].features
+        full = shared.load()
+        for cut in cut_set_with_feats:
+            arr = cut.load_features()
+            assert arr.shape[0] == cut.num_frames
+        np.testing.assert_equal(cut_set_with_feats['cut3'].load_features(), full[30:80])
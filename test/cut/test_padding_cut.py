@@ -46,6 +46,12 @@ def test_load_audio(padding_cut):
     np.testing.assert_equal(samples, 0.0)
 
 
+def test_load_audio_dtype_is_keyword_only(padding_cut):
+    # Positional arguments (e.g. MixedCut's ``mixed`` flag) are ignored, as before.
+    assert padding_cut.load_audio(False).dtype == np.float32
+    assert padding_cut.load_audio(dtype='int16').dtype == np.int16
+
+
 @pytest.mark.parametrize(
     ['offset', 'duration', 'expected_duration', 'expected_num_frames', 'expected_num_samples'],
     [
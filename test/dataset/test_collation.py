@@ -1,8 +1,10 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 
 import torch
 
-from lhotse.dataset.collation import TokenCollater, collate_audio, collate_features
+from lhotse.dataset.collation import TokenCollater, audio_to_float, collate_audio, collate_features
 from lhotse import CutSet
 from lhotse.testing.dummies import dummy_cut, dummy_supervision
 
@@ -52,6 +54,16 @@ def test_collate_audio_padding():
     assert max(audio_lens).item() == correct_pad
 
 
+def test_collate_audio_int16():
+    cuts = CutSet.from_json('test/fixtures/ljspeech/cuts.json')
+    audio, audio_lens = collate_audio(cuts)
+    int_audio, int_audio_lens = collate_audio(cuts, dtype='int16')
+    assert int_audio.dtype == torch.int16
+    torch.testing.assert_allclose(int_audio_lens, audio_lens)
+    torch.testing.assert_allclose(audio_to_float(int_audio), audio)
+    assert audio_to_float(audio) is audio
+
+
 def test_collate_feature_padding():
     cuts = CutSet.from_json('test/fixtures/ljspeech/cuts.json')
     assert len(set(cut.num_frames for cut in cuts)) > 1
@@ -61,3 +73,14 @@ def test_collate_feature_padding():
 
     assert features.shape[1] == correct_pad
     assert max(features_lens).item() == correct_pad
+
+
+@pytest.mark.parametrize('pad_direction', ['right', 'left', 'both'])
+def test_collate_features_batched_read_matches_per_cut_read(pad_direction):
+    cuts = CutSet.from_json('test/fixtures/ljspeech/cuts.json')
+    features, features_lens = collate_features(cuts, pad_direction=pad_direction)
+    # Reading with an executor goes through cut.load_features() for each cut.
+    with ThreadPoolExecutor(1) as executor:
+        expected, expected_lens = collate_features(cuts, pad_direction=pad_direction, executor=executor)
+    torch.testing.assert_allclose(features, expected)
+    assert torch.equal(features_lens, expected_lens)
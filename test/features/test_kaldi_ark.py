@@ -0,0 +1,171 @@
+import os
+import struct
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import pytest
+
+from lhotse.features.io import KaldiReader, close_cached_file_handles
+from lhotse.features.kaldi_ark import load_kaldi_scp, matrix_shape, parse_scp_entry
+from lhotse.kaldi import load_kaldi_data_dir
+from lhotse.utils import is_module_available
+
+
+def kaldi_int(value: int) -> bytes:
+    return b'\x04' + struct.pack('<i', value)
+
+
+def encode_float_matrix(arr: np.ndarray) -> bytes:
+    token = b'FM ' if arr.dtype == np.float32 else b'DM '
+    return token + kaldi_int(arr.shape[0]) + kaldi_int(arr.shape[1]) + arr.astype(arr.dtype.newbyteorder('<')).tobytes()
+
+
+def encode_global_compressed_matrix(data: np.ndarray, min_value: float, value_range: float) -> bytes:
+    token = b'CM2 ' if data.dtype == np.uint16 else b'CM3 '
+    header = struct.pack('<ffii', min_value, value_range, *data.shape)
+    return token + header + data.astype(data.dtype.newbyteorder('<')).tobytes()
+
+
+def encode_column_compressed_matrix(
+        col_headers: np.ndarray, data: np.ndarray, min_value: float, value_range: float
+) -> bytes:
+    header = struct.pack('<ffii', min_value, value_range, *data.shape)
+    # Per-column headers, then the bytes of each column.
+    return b'CM ' + header + col_headers.astype('<u2').tobytes() + data.T.astype(np.uint8).tobytes()
+
+
+def decode_column_compressed_matrix(col_headers, data, min_value, value_range):
+    # A straightforward (element by element) implementation of Kaldi's CharToFloat().
+    out = np.zeros(data.shape, dtype=np.float32)
+    for col in range(data.shape[1]):
+        p0, p25, p75, p100 = [min_value + value_range * h / 65535.0 for h in col_headers[col]]
+        for row in range(data.shape[0]):
+            v = int(data[row, col])
+            if v <= 64:
+                out[row, col] = p0 + (p25 - p0) * v / 64.0
+            elif v <= 192:
+                out[row, col] = p25 + (p75 - p25) * (v - 64) / 128.0
+            else:
+                out[row, col] = p75 + (p100 - p75) * (v - 192) / 63.0
+    return out
+
+
+def write_ark_and_scp(directory: Path, matrices) -> Path:
+    ark_path = directory / 'feats.ark'
+    scp_path = directory / 'feats.scp'
+    with open(ark_path, 'wb') as ark, open(scp_path, 'w') as scp:
+        for key, data in matrices:
+            ark.write(f'{key} '.encode())
+            print(f'{key} {ark_path}:{ark.tell()}', file=scp)
+            ark.write(b'\0B' + data)
+    return scp_path
+
+
+@pytest.fixture
+def kaldi_matrices():
+    rng = np.random.RandomState(0)
+    float_mat = rng.rand(37, 13).astype(np.float32)
+    double_mat = rng.rand(20, 5)
+    cm2 = rng.randint(0, 65536, size=(25, 6)).astype(np.uint16)
+    cm3 = rng.randint(0, 256, size=(25, 6)).astype(np.uint8)
+    col_headers = np.sort(rng.randint(0, 65536, size=(4, 4)), axis=1).astype(np.uint16)
+    cm = rng.randint(0, 256, size=(11, 4)).astype(np.uint8)
+    encoded = [
+        ('float', encode_float_matrix(float_mat)),
+        ('double', encode_float_matrix(double_mat)),
+        ('cm2', encode_global_compressed_matrix(cm2, -3.0, 10.0)),
+        ('cm3', encode_global_compressed_matrix(cm3, -1.0, 4.0)),
+        ('cm', encode_column_compressed_matrix(col_headers, cm, -20.0, 50.0)),
+    ]
+    expected = {
+        'float': float_mat,
+        'double': double_mat.astype(np.float32),
+        'cm2': -3.0 + cm2.astype(np.float32) * (10.0 / 65535),
+        'cm3': -1.0 + cm3.astype(np.float32) * (4.0 / 255),
+        'cm': decode_column_compressed_matrix(col_headers, cm, -20.0, 50.0),
+    }
+    with TemporaryDirectory() as d:
+        yield write_ark_and_scp(Path(d), encoded), expected
+        close_cached_file_handles()
+
+
+def test_parse_scp_entry():
+    assert parse_scp_entry('a/feats.ark:123') == ('a/feats.ark:123', 'a/feats.ark', 123, None)
+    assert parse_scp_entry('feats.ark:123[4:9]').rows == (4, 9)
+    assert parse_scp_entry('copy-feats ark:feats.ark ark:- |').offset is None
+    assert parse_scp_entry('feats.ark:123[4:9,0:2]').offset is None
+
+
+def test_kaldi_reader_native(kaldi_matrices):
+    scp_path, expected = kaldi_matrices
+    reader = KaldiReader(scp_path)
+    entries = load_kaldi_scp(str(scp_path))
+    for key, arr in expected.items():
+        assert matrix_shape(entries[key]) == arr.shape
+        np.testing.assert_allclose(reader.read(key), arr, rtol=1e-5, atol=1e-5)
+        np.testing.assert_allclose(reader.read(key, 3, 8), arr[3:8], rtol=1e-5, atol=1e-5)
+        np.testing.assert_allclose(reader.read(key, 5), arr[5:], rtol=1e-5, atol=1e-5)
+    requests = [('cm', 1, 4), ('float', 0, None), ('cm2', 10, 12)]
+    for (key, left, right), arr in zip(requests, reader.read_many(requests)):
+        np.testing.assert_allclose(arr, expected[key][left:right], rtol=1e-5, atol=1e-5)
+
+
+def test_kaldi_reader_scp_row_range(kaldi_matrices):
+    scp_path, expected = kaldi_matrices
+    entry = load_kaldi_scp(str(scp_path))['float']
+    with open(scp_path, 'a') as f:
+        print(f'float-range {entry.spec}[10:19]', file=f)
+    # The modified scp file is read again.
+    reader = KaldiReader(scp_path)
+    np.testing.assert_allclose(reader.read('float-range'), expected['float'][10:20])
+    np.testing.assert_allclose(reader.read('float-range', 2, 4), expected['float'][12:14])
+
+
+def test_load_kaldi_scp_cache_is_invalidated_when_the_file_changes(tmp_path):
+    scp_path = tmp_path / 'feats.scp'
+    scp_path.write_text('utt1 feats.ark:10\n')
+    assert load_kaldi_scp(str(scp_path))['utt1'].offset == 10
+    assert load_kaldi_scp(str(scp_path)) is load_kaldi_scp(str(scp_path))
+    # The file is regenerated with a different offset, but the same size.
+    scp_path.write_text('utt1 feats.ark:20\n')
+    os.utime(scp_path, ns=(0, scp_path.stat().st_mtime_ns + 1))
+    assert load_kaldi_scp(str(scp_path))['utt1'].offset == 20
+
+
+@pytest.mark.skipif(not is_module_available('kaldiio'), reason='Requires kaldiio.')
+def test_kaldi_reader_native_matches_kaldiio(kaldi_matrices):
+    import kaldiio
+    scp_path, expected = kaldi_matrices
+    reader = KaldiReader(scp_path)
+    for key, mat in kaldiio.load_scp(str(scp_path)).items():
+        np.testing.assert_allclose(reader.read(key), mat, rtol=1e-5, atol=1e-5)
+
+
+def test_load_kaldi_data_dir_with_features(kaldi_matrices):
+    scp_path, expected = kaldi_matrices
+    with open(scp_path.parent / 'wav.scp', 'w') as f:
+        for key in expected:
+            print(f'{key} test/fixtures/mono_c0.wav', file=f)
+    recordings, supervisions, features = load_kaldi_data_dir(scp_path.parent, sampling_rate=8000, frame_shift=0.01)
+    assert len(features) == len(expected)
+    for feats in features:
+        arr = expected[feats.storage_key]
+        assert (feats.num_frames, feats.num_features) == arr.shape
+        np.testing.assert_allclose(feats.load(), arr, rtol=1e-5, atol=1e-5)
+
+
+@pytest.mark.skipif(is_module_available('kaldiio'), reason='Checks the behaviour without kaldiio.')
+def test_load_kaldi_data_dir_skips_command_features_without_kaldiio(kaldi_matrices):
+    scp_path, expected = kaldi_matrices
+    with open(scp_path, 'a') as f:
+        print('piped copy-feats ark:foo.ark ark:- |', file=f)
+    with open(scp_path.parent / 'wav.scp', 'w') as f:
+        for key in list(expected) + ['piped']:
+            print(f'{key} test/fixtures/mono_c0.wav', file=f)
+    with pytest.warns(UserWarning):
+        recordings, supervisions, features = load_kaldi_data_dir(
+            scp_path.parent, sampling_rate=8000, frame_shift=0.01
+        )
+    assert len(recordings) == len(expected) + 1
+    assert features is None
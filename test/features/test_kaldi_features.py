@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 import torch
 
@@ -63,3 +64,27 @@ def test_kaldi_mfcc_extractor(recording):
     mfcc = KaldiMfcc()
     feats = mfcc.extract(recording.load_audio(), recording.sampling_rate)
     assert feats.shape == (1604, 13)
+
+
+@pytest.mark.parametrize('extractor_type', [KaldiFbank, KaldiMfcc])
+def test_kaldi_extractor_batch(recording, extractor_type):
+    extractor = extractor_type()
+    audio = recording.load_audio()
+    batch = [audio, audio[:, :16000], audio[:, 8000:40123]]
+    batch_feats = extractor.extract_batch(batch, recording.sampling_rate)
+    assert len(batch_feats) == 3
+    for samples, feats in zip(batch, batch_feats):
+        ref = extractor.extract(samples, recording.sampling_rate)
+        assert feats.shape == ref.shape
+        # Only the last frames of the shorter recordings see the padding.
+        np.testing.assert_allclose(feats[:-2], ref[:-2], rtol=1e-4, atol=1e-4)
+
+
+@pytest.mark.parametrize('extractor_type', [KaldiFbank, KaldiMfcc])
+def test_kaldi_extractor_batch_same_lengths_is_exact(recording, extractor_type):
+    extractor = extractor_type()
+    audio = recording.load_audio()
+    batch = [audio[:, :16000], audio[:, 16000:32000]]
+    batch_feats = extractor.extract_batch(batch, recording.sampling_rate)
+    for samples, feats in zip(batch, batch_feats):
+        np.testing.assert_allclose(feats, extractor.extract(samples, recording.sampling_rate), rtol=1e-5, atol=1e-5)
@@ -1,7 +1,15 @@
+import os
+import re
+import threading
+import wave
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+from socketserver import ThreadingMixIn
+
+import numpy as np
 import pytest
 
 from lhotse.audio import AudioSource
-from lhotse.utils import is_module_available
+from lhotse.utils import HttpRangeReader, is_module_available
 
 
 @pytest.mark.skipif(
@@ -15,3 +23,83 @@ def test_audio_url_downloading():
         source='https://github.com/lhotse-speech/lhotse/blob/master/test/fixtures/mono_c0.wav?raw=true'
     )
     audio_source.load_audio()
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class RangeRequestHandler(SimpleHTTPRequestHandler):
+    """Serves files from a directory with HTTP range requests support, and counts the bytes sent."""
+    bytes_sent = 0
+    root = None
+
+    def translate_path(self, path):
+        # SimpleHTTPRequestHandler(directory=...) is not available in Python 3.6.
+        return os.path.join(self.root, path.split('?', 1)[0].lstrip('/'))
+
+    def do_GET(self):
+        path = self.translate_path(self.path)
+        with open(path, 'rb') as f:
+            data = f.read()
+        match = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+        if match is None:
+            self.send_response(200)
+            body = data
+        else:
+            start = int(match.group(1))
+            end = min(int(match.group(2) or len(data) - 1), len(data) - 1)
+            body = data[start:end + 1]
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(data)}')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        type(self).bytes_sent += len(body)
+
+    def log_message(self, *args, **kwargs):
+        pass
+
+
+@pytest.fixture
+def http_server(tmp_path):
+    # 60 seconds of random 16kHz audio
+    sampling_rate = 16000
+    samples = (np.random.rand(60 * sampling_rate) * 2000 - 1000).astype(np.int16)
+    with wave.open(str(tmp_path / 'audio.wav'), 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sampling_rate)
+        f.writeframes(samples.tobytes())
+    RangeRequestHandler.bytes_sent = 0
+    RangeRequestHandler.root = str(tmp_path)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), RangeRequestHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/audio.wav', samples / 32768.0
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_range_reader(http_server):
+    url, _ = http_server
+    with HttpRangeReader(url, block_size=1000) as f:
+        assert f.size == 44 + 60 * 16000 * 2
+        f.seek(5500)
+        data = f.read(2000)
+        assert len(data) == 2000
+        assert f.tell() == 7500
+        f.seek(-10, 2)
+        assert len(f.read()) == 10
+        # Only the blocks containing the requested data were downloaded.
+        assert f.bytes_transferred == 1000 + 3000 + 44
+
+
+@pytest.mark.skipif(not is_module_available('soundfile'), reason='Requires soundfile.')
+def test_audio_url_chunk_reads_only_the_required_bytes(http_server):
+    url, expected = http_server
+    source = AudioSource(type='url', channels=[0], source=url)
+    samples = source.load_audio(offset=30.0, duration=1.0)
+    np.testing.assert_allclose(samples, expected[30 * 16000:31 * 16000], atol=1e-4)
+    file_size = 44 + 60 * 16000 * 2
+    assert RangeRequestHandler.bytes_sent < 0.05 * file_size
@@ -0,0 +1,128 @@
+import pickle
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from lhotse import CutSet, MonoCut, RecordingSet, SupervisionSet, load_manifest
+from lhotse.cut import MixedCut
+from lhotse.columnar import ColumnarManifest
+from lhotse.testing.dummies import DummyManifest, dummy_cut
+from lhotse.utils import fastcopy
+
+
+@pytest.fixture
+def cuts():
+    return CutSet.from_cuts(
+        fastcopy(dummy_cut(idx), duration=float(idx % 7 + 1)) for idx in range(20)
+    )
+
+
+@pytest.fixture
+def columnar_cuts(cuts):
+    with TemporaryDirectory() as d:
+        cuts.to_columnar(d)
+        yield CutSet.from_columnar(d)
+
+
+@pytest.mark.parametrize('manifest_type', [RecordingSet, SupervisionSet, CutSet])
+def test_columnar_serialization_roundtrip(manifest_type):
+    manifest = DummyManifest(manifest_type, begin_id=0, end_id=10)
+    with TemporaryDirectory() as d:
+        manifest.to_columnar(d)
+        restored = manifest_type.from_columnar(d)
+        assert len(restored) == len(manifest)
+        assert list(restored.ids) == list(manifest.ids)
+        assert list(restored) == list(manifest)
+        # load_manifest recognizes the columnar directory and the manifest type.
+        loaded = load_manifest(d)
+        assert isinstance(loaded, manifest_type)
+        assert list(loaded) == list(manifest)
+
+
+def test_columnar_cut_set_random_access(cuts, columnar_cuts):
+    assert columnar_cuts.is_columnar
+    assert 'dummy-cut-0005' in columnar_cuts
+    assert 'nonexistent-cut' not in columnar_cuts
+    assert columnar_cuts['dummy-cut-0005'] == cuts['dummy-cut-0005']
+    assert columnar_cuts[3] == cuts[3]
+    with pytest.raises(KeyError):
+        columnar_cuts['nonexistent-cut']
+
+
+def test_columnar_random_access_does_not_allocate_rows(cuts, columnar_cuts, monkeypatch):
+    def no_rows(self):
+        raise AssertionError('Random access should not materialize the row numbers of the whole manifest.')
+
+    monkeypatch.setattr(ColumnarManifest, 'rows', property(no_rows))
+    assert columnar_cuts['dummy-cut-0005'] == cuts['dummy-cut-0005']
+    assert columnar_cuts[3] == cuts[3]
+    assert columnar_cuts[-1] == cuts['dummy-cut-0019']
+    assert columnar_cuts.cuts.row_view(7).id == 'dummy-cut-0007'
+    with pytest.raises(IndexError):
+        columnar_cuts.cuts.item_at(len(cuts))
+
+
+def test_columnar_cut_set_sort_by_duration(cuts, columnar_cuts):
+    for ascending in [True, False]:
+        sorted_columnar = columnar_cuts.sort_by_duration(ascending=ascending)
+        assert sorted_columnar.is_columnar
+        assert list(sorted_columnar.ids) == list(cuts.sort_by_duration(ascending=ascending).ids)
+
+
+def test_columnar_cut_set_filter(cuts, columnar_cuts):
+    filtered = columnar_cuts.filter(lambda c: c.duration > 3 and c.end < 6)
+    assert filtered.is_columnar
+    assert list(filtered.ids) == list(cuts.filter(lambda c: c.duration > 3 and c.end < 6).ids)
+
+
+def test_columnar_cut_set_filter_isinstance(cuts):
+    mixed = [a.mix(b) for a, b in zip(cuts.subset(first=5), cuts.subset(last=5))]
+    mixed_and_mono = CutSet.from_cuts(mixed + list(cuts.subset(first=3)))
+    with TemporaryDirectory() as d:
+        mixed_and_mono.to_columnar(d)
+        columnar = CutSet.from_columnar(d)
+        mono = columnar.filter(lambda c: isinstance(c, MonoCut))
+        assert list(mono.ids) == list(cuts.subset(first=3).ids)
+        assert len(columnar.filter(lambda c: isinstance(c, MixedCut))) == len(mixed)
+        assert len(columnar.filter(lambda c: c.__class__ is MonoCut)) == 3
+
+
+def test_columnar_cut_set_feature_references(cuts):
+    with TemporaryDirectory() as d:
+        cuts.to_columnar(d)
+        columnar = CutSet.from_columnar(d)
+        expected = [c.features.storage_path if c.has_features else '' for c in cuts]
+        assert [p.decode('utf-8') for p in columnar.cuts.column('features_storage_path')] == expected
+        assert len(columnar.filter(lambda c: c.has_features)) == len(cuts.filter(lambda c: c.has_features))
+
+
+def test_columnar_cut_set_filter_non_column_attribute(cuts, columnar_cuts):
+    filtered = columnar_cuts.filter(lambda c: len(c.supervisions) == 0)
+    assert len(filtered) == 0
+
+
+def test_columnar_cut_set_subset(cuts, columnar_cuts):
+    assert list(columnar_cuts.subset(first=5).ids) == list(cuts.subset(first=5).ids)
+    assert list(columnar_cuts.subset(last=5).ids) == list(cuts.subset(last=5).ids)
+    ids = ['dummy-cut-0007', 'dummy-cut-0002']
+    subset = columnar_cuts.subset(cut_ids=ids)
+    assert subset.is_columnar
+    assert list(subset.ids) == ids
+    # Lookups in a subset only see the selected cuts.
+    assert 'dummy-cut-0007' in subset
+    assert 'dummy-cut-0001' not in subset
+
+
+def test_columnar_cut_set_split(cuts, columnar_cuts):
+    splits = columnar_cuts.split(num_splits=3)
+    expected = cuts.split(num_splits=3)
+    assert [list(s.ids) for s in splits] == [list(s.ids) for s in expected]
+    assert all(s.is_columnar for s in splits)
+
+
+def test_columnar_cut_set_pickling(columnar_cuts):
+    subset = columnar_cuts.sort_by_duration().subset(first=10)
+    restored = pickle.loads(pickle.dumps(subset))
+    assert isinstance(restored.cuts, ColumnarManifest)
+    assert list(restored.ids) == list(subset.ids)
+    assert list(restored) == list(subset)
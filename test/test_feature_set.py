@@ -10,10 +10,12 @@ from pytest import mark, raises
 from lhotse.audio import RecordingSet
 from lhotse.features import (Fbank, FeatureExtractor, FeatureMixer, FeatureSet, FeatureSetBuilder, Features, Mfcc,
                              Spectrogram, create_default_feature_extractor)
-from lhotse.features.io import ChunkedLilcomHdf5Writer, LilcomFilesWriter, LilcomHdf5Writer, NumpyFilesWriter, \
-    NumpyHdf5Writer
+from lhotse.features.base import load_features_many
+from lhotse.features.io import ChunkedCompressedHdf5Writer, ChunkedLilcomHdf5Writer, LilcomFilesWriter, LilcomHdf5Writer, NumpyFilesWriter, \
+    NumpyHdf5Reader, NumpyHdf5Writer, NumpyMmapArenaReader, NumpyMmapArenaWriter, QuantizedHdf5Writer, \
+    close_cached_file_handles, get_hdf5_handle_pool, get_reader, set_arena_mmap_pool, set_hdf5_handle_pool
 from lhotse.testing.dummies import DummyManifest
-from lhotse.utils import Seconds, time_diff_to_num_frames
+from lhotse.utils import Seconds, is_module_available, time_diff_to_num_frames
 from lhotse.utils import nullcontext as does_not_raise
 
 other_params = {}
@@ -117,7 +119,8 @@ def test_compute_global_stats():
         LilcomHdf5Writer(NamedTemporaryFile().name),
         ChunkedLilcomHdf5Writer(NamedTemporaryFile().name),
         NumpyFilesWriter(TemporaryDirectory().name),
-        NumpyHdf5Writer(NamedTemporaryFile().name)
+        NumpyHdf5Writer(NamedTemporaryFile().name),
+        NumpyMmapArenaWriter(TemporaryDirectory().name),
     ]
 )
 def test_feature_set_builder(storage):
@@ -167,6 +170,65 @@ def test_feature_set_builder(storage):
         assert features.duration == 1.0
 
 
+@pytest.mark.parametrize('dtype', ['float32', 'float16'])
+def test_numpy_mmap_arena_storage(dtype):
+    arrays = [np.random.rand(num_frames, 40).astype(np.float32) for num_frames in (10, 1, 57, 300)]
+    with TemporaryDirectory() as d:
+        # A small max_file_size forces the arrays to span multiple arena files.
+        with NumpyMmapArenaWriter(d, dtype=dtype, max_file_size=10000) as writer:
+            keys = [writer.write(f'key-{idx}', arr) for idx, arr in enumerate(arrays)]
+        assert len({key.split(':')[0] for key in keys}) > 1
+        reader = NumpyMmapArenaReader(d)
+        decimal = 6 if dtype == 'float32' else 3
+        for key, arr in zip(keys, arrays):
+            offset = int(key.split(':')[1])
+            assert offset % 64 == 0
+            read = reader.read(key)
+            # Like the other readers, it returns float32 arrays regardless of the storage dtype;
+            # float32 arrays are zero-copy (read-only) views of the memory-mapped files.
+            assert read.dtype == np.float32
+            assert read.flags.writeable == (dtype == 'float16')
+            np.testing.assert_almost_equal(read, arr, decimal=decimal)
+            np.testing.assert_almost_equal(
+                reader.read(key, left_offset_frames=1, right_offset_frames=5), arr[1:5], decimal=decimal
+            )
+            np.testing.assert_almost_equal(reader.read(key, left_offset_frames=3), arr[3:], decimal=decimal)
+        close_cached_file_handles()
+
+
+def test_numpy_mmap_arena_storage_append_mode():
+    first, second = np.random.rand(10, 8).astype(np.float32), np.random.rand(20, 8).astype(np.float32)
+    with TemporaryDirectory() as d:
+        with NumpyMmapArenaWriter(d) as writer:
+            first_key = writer.write('first', first)
+        reader = NumpyMmapArenaReader(d)
+        np.testing.assert_equal(reader.read(first_key), first)
+        with NumpyMmapArenaWriter(d, mode='a') as writer:
+            second_key = writer.write('second', second)
+        # The arena has grown after it was memory-mapped - the reader notices it.
+        np.testing.assert_equal(reader.read(first_key), first)
+        np.testing.assert_equal(reader.read(second_key), second)
+        close_cached_file_handles()
+
+
+def test_arena_mmap_pool_is_bounded():
+    arr = np.random.rand(10, 8).astype(np.float32)
+    pool = set_arena_mmap_pool(max_open=2)
+    try:
+        with TemporaryDirectory() as d:
+            keys = []
+            for idx in range(3):
+                with NumpyMmapArenaWriter(f'{d}/{idx}') as writer:
+                    keys.append((f'{d}/{idx}', writer.write('key', arr)))
+            for path, key in keys:
+                np.testing.assert_equal(NumpyMmapArenaReader(path).read(key), arr)
+            assert pool.num_open == 2
+            # The released map is transparently re-created.
+            np.testing.assert_equal(NumpyMmapArenaReader(keys[0][0]).read(keys[0][1]), arr)
+    finally:
+        set_arena_mmap_pool()
+
+
 @mark.parametrize(
     ['time_diff', 'frame_length', 'frame_shift', 'expected_num_frames'],
     [
@@ -227,6 +289,33 @@ def test_mixer(feature_extractor, decimal, exception_expectation):
         assert mixer.unmixed_feats.shape == (2, 100, feature_extractor.feature_dim(sampling_rate=sr))
 
 
+class PairwiseFbank(Fbank):
+    mixes_log_energies = False
+
+
+@pytest.mark.parametrize('num_frames', [None, 150, 400])
+def test_mixer_log_energies_matches_pairwise_mix(num_frames):
+    rng = np.random.RandomState(0)
+    base = rng.uniform(-10, 5, size=(100, 23)).astype(np.float32)
+    tracks = [
+        (rng.uniform(-10, 5, size=(rng.randint(10, 80), 23)).astype(np.float32), rng.uniform(0, 2), rng.uniform(0, 20))
+        for _ in range(10)
+    ]
+    mixers = [
+        FeatureMixer(feature_extractor=extractor, base_feats=base, frame_shift=0.01, num_frames=num_frames)
+        for extractor in (Fbank(), PairwiseFbank())
+    ]
+    for mixer in mixers:
+        for feats, offset, snr in tracks:
+            mixer.add_to_mix(feats, sampling_rate=16000, snr=snr, offset=offset)
+    fast, pairwise = mixers
+    np.testing.assert_allclose(fast.mixed_feats, pairwise.mixed_feats, rtol=1e-4, atol=1e-4)
+    np.testing.assert_array_equal(fast.unmixed_feats, pairwise.unmixed_feats)
+    assert fast.mixed_feats.dtype == np.float32
+    assert fast.unmixed_feats.shape[0] == 11
+    assert fast.mixed_feats.shape == fast.unmixed_feats.shape[1:]
+
+
 def test_feature_set_prefix_path():
     features = FeatureSet.from_features([
         Features(
@@ -244,3 +333,146 @@ def test_feature_set_prefix_path():
     ])
     for feat in features.with_path_prefix('/data'):
         assert feat.storage_path == '/data/feats'
+
+
+@pytest.mark.parametrize(
+    'storage_fn', [
+        lambda d: LilcomFilesWriter(d),
+        lambda d: LilcomHdf5Writer(f'{d}/feats.h5'),
+        lambda d: ChunkedLilcomHdf5Writer(f'{d}/feats.h5'),
+        lambda d: NumpyFilesWriter(d),
+        lambda d: NumpyHdf5Writer(f'{d}/feats.h5'),
+        lambda d: NumpyMmapArenaWriter(d),
+        lambda d: QuantizedHdf5Writer(f'{d}/feats.h5'),
+    ]
+)
+def test_features_reader_read_many(storage_fn):
+    arrays = [np.random.rand(num_frames, 8).astype(np.float32) for num_frames in (150, 20, 310, 1)]
+    with TemporaryDirectory() as d:
+        with storage_fn(d) as writer:
+            keys = [writer.write(f'key-{idx}', arr) for idx, arr in enumerate(arrays)]
+            storage_path = writer.storage_path
+        reader = get_reader(writer.name)(storage_path)
+        requests = [(keys[2], 5, 210), (keys[0], 0, None), (keys[3], 0, None), (keys[1], 10, 15), (keys[2], 0, 3)]
+        results = reader.read_many(requests)
+        assert len(results) == len(requests)
+        for (key, left, right), arr in zip(requests, results):
+            np.testing.assert_almost_equal(arr, reader.read(key, left, right))
+        close_cached_file_handles()
+
+
+@pytest.mark.parametrize(
+    ['dtype', 'decimal'], [('float16', 2), ('int8', 1), ('uint8', 1)]
+)
+def test_quantized_hdf5_storage(dtype, decimal):
+    arr = np.random.rand(250, 40).astype(np.float32) * np.arange(1, 41) - 10
+    with TemporaryDirectory() as d:
+        with QuantizedHdf5Writer(f'{d}/feats.h5', dtype=dtype) as writer:
+            key = writer.write('key', arr)
+        reader = get_reader(writer.name)(writer.storage_path)
+        read = reader.read(key)
+        assert read.dtype == np.float32
+        # The quantization error is bounded by half of each bin's quantization step.
+        step = np.ptp(arr, axis=0) / 254
+        if dtype != 'float16':
+            assert (np.abs(read - arr) <= step / 2 + 1e-5).all()
+        np.testing.assert_almost_equal(read / np.abs(arr).max(axis=0), arr / np.abs(arr).max(axis=0), decimal=decimal)
+        np.testing.assert_equal(reader.read(key, left_offset_frames=17, right_offset_frames=33), read[17:33])
+        close_cached_file_handles()
+
+
+@pytest.mark.parametrize(
+    'codec', [
+        pytest.param(
+            'zstd',
+            marks=pytest.mark.skipif(not is_module_available('zstandard'), reason='Requires zstandard.')
+        ),
+        pytest.param(
+            'lz4',
+            marks=pytest.mark.skipif(not is_module_available('lz4'), reason='Requires lz4.')
+        ),
+    ]
+)
+@pytest.mark.parametrize('dtype', ['float32', 'float16'])
+def test_chunked_compressed_hdf5_storage(codec, dtype):
+    arr = np.random.rand(250, 40).astype(np.float32)
+    with TemporaryDirectory() as d:
+        with ChunkedCompressedHdf5Writer(f'{d}/feats.h5', codec=codec, dtype=dtype, chunk_size=32) as writer:
+            key = writer.write('key', arr)
+        reader = get_reader(writer.name)(writer.storage_path)
+        # The compression is lossless with respect to the storage dtype.
+        expected = arr.astype(dtype).astype(np.float32)
+        feats = reader.read(key)
+        assert feats.dtype == np.float32
+        assert feats.flags.writeable
+        np.testing.assert_equal(feats, expected)
+        for left, right in [(0, 32), (17, 33), (64, 250), (200, None), (31, 32)]:
+            np.testing.assert_equal(reader.read(key, left, right), expected[left:right])
+        close_cached_file_handles()
+
+
+@pytest.fixture
+def hdf5_handle_pool():
+    pool = set_hdf5_handle_pool(max_open=2, rdcc_nbytes=4 * 1024 * 1024)
+    yield pool
+    set_hdf5_handle_pool()
+
+
+def test_hdf5_handle_pool_evicts_least_recently_used(hdf5_handle_pool):
+    arr = np.random.rand(10, 8).astype(np.float32)
+    with TemporaryDirectory() as d:
+        paths = [f'{d}/feats-{idx}.h5' for idx in range(3)]
+        for path in paths:
+            with NumpyHdf5Writer(path) as writer:
+                writer.write('key', arr)
+        readers = [NumpyHdf5Reader(path) for path in paths]
+        assert hdf5_handle_pool.num_open == 2
+        # The evicted handle is transparently re-opened.
+        np.testing.assert_equal(readers[0].read('key'), arr)
+        np.testing.assert_equal(readers[0].read('key'), arr)
+        assert hdf5_handle_pool.num_open == 2
+        stats = hdf5_handle_pool.stats
+        assert stats[paths[0]] == {'hits': 1, 'misses': 2, 'evictions': 1}
+        assert stats[paths[1]] == {'hits': 0, 'misses': 1, 'evictions': 1}
+        assert stats[paths[2]] == {'hits': 0, 'misses': 1, 'evictions': 0}
+        close_cached_file_handles()
+        assert hdf5_handle_pool.num_open == 0
+
+
+def test_hdf5_handle_pool_reopens_handles_after_fork(hdf5_handle_pool, monkeypatch):
+    arr = np.random.rand(10, 8).astype(np.float32)
+    with TemporaryDirectory() as d:
+        with NumpyHdf5Writer(f'{d}/feats.h5') as writer:
+            writer.write('key', arr)
+        reader = NumpyHdf5Reader(f'{d}/feats.h5')
+        parent_handle = reader.hdf
+        # Pretend that we are in a forked process.
+        monkeypatch.setattr('os.getpid', lambda: -1)
+        np.testing.assert_equal(reader.read('key'), arr)
+        assert reader.hdf is not parent_handle
+        assert get_hdf5_handle_pool().stats[f'{d}/feats.h5']['misses'] == 1
+        close_cached_file_handles()
+        monkeypatch.undo()
+        parent_handle.close()
+
+
+def test_load_features_many_groups_by_storage():
+    arrays = [np.random.rand(100, 8).astype(np.float32) for _ in range(4)]
+    with TemporaryDirectory() as d1, TemporaryDirectory() as d2:
+        features = []
+        for d, arrs in [(d1, arrays[:2]), (d2, arrays[2:])]:
+            with NumpyHdf5Writer(f'{d}/feats.h5') as writer:
+                for arr in arrs:
+                    features.append(Features(
+                        type='fbank', num_frames=100, num_features=8, frame_shift=0.01, sampling_rate=16000,
+                        start=0.0, duration=1.0, storage_type=writer.name, storage_path=writer.storage_path,
+                        storage_key=writer.write(str(len(features)), arr)
+                    ))
+        # Interleave the storages and request different time spans.
+        requests = [
+            (features[2], None, None), (features[0], 0.5, 0.2), (features[3], None, 0.5), (features[1], 0.1, None)
+        ]
+        results = load_features_many(requests)
+        for (feats, start, duration), arr in zip(requests, results):
+            np.testing.assert_equal(arr, feats.load(start=start, duration=duration))
+        close_cached_file_handles()
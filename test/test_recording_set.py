@@ -1,12 +1,20 @@
+import os
+import shutil
+import struct
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
 from math import isclose
+from pathlib import Path
 
 import audioread
 import numpy as np
 import pytest
 from pytest import mark, raises
 
-from lhotse.audio import AudioMixer, AudioSource, Recording, RecordingSet
+import lhotse.audio
+from lhotse.audio import (AudioCache, AudioMetadataCache, AudioMixer, AudioSource, Recording, RecordingSet,
+                          convert_audio_dtype, get_audio_cache, get_decoder_stats, opus_info, read_sph,
+                          reset_decoder_stats, set_audio_cache, set_audio_metadata_cache, sph_info, walk_files)
 from lhotse.testing.dummies import DummyManifest
 from lhotse.utils import INT16MAX
 from lhotse.utils import fastcopy, nullcontext as does_not_raise
@@ -118,6 +126,49 @@ def test_get_audio_chunks(
         np.testing.assert_almost_equal(actual_audio, expected_audio)
 
 
+@mark.parametrize('recording_id', ['recording-1', 'recording-3'])
+def test_get_audio_int16(recording_set, recording_id):
+    float_audio = recording_set.load_audio(recording_id)
+    int_audio = recording_set.load_audio(recording_id, dtype='int16')
+    assert int_audio.dtype == np.int16
+    assert int_audio.shape == float_audio.shape
+    np.testing.assert_array_equal(int_audio, np.round(float_audio * INT16MAX).astype(np.int16))
+
+
+def test_get_audio_int16_chunk(recording_set):
+    audio = recording_set.load_audio('recording-1', channels=0, offset_seconds=0.1, duration_seconds=0.2, dtype='int16')
+    np.testing.assert_array_equal(audio, np.arange(800, 2400, dtype=np.int16).reshape(1, -1))
+
+
+def test_convert_audio_dtype():
+    audio = np.array([[-1.5, -1.0, 0.0, 0.5, 1.0]], dtype=np.float32)
+    int_audio = convert_audio_dtype(audio, 'int16')
+    np.testing.assert_array_equal(int_audio, [[-32768, -32768, 0, 16384, 32767]])
+    np.testing.assert_allclose(convert_audio_dtype(int_audio, np.float32), [[-1.0, -1.0, 0.0, 0.5, 32767 / 32768]])
+    # No copies when the dtype already matches.
+    assert convert_audio_dtype(audio, 'float32') is audio
+    assert convert_audio_dtype(int_audio, 'int16') is int_audio
+    with raises(AssertionError):
+        convert_audio_dtype(audio, 'float64')
+
+
+@pytest.mark.parametrize(
+    ['samples', 'expected'],
+    [
+        (np.array([[-128, 0, 64, 127]], dtype=np.int8), [[-1.0, 0.0, 0.5, 127 / 128]]),
+        (np.array([[-2 ** 31, 0, 2 ** 30, 2 ** 31 - 1]], dtype=np.int32), [[-1.0, 0.0, 0.5, 1.0]]),
+        (np.array([[0, 128, 192, 255]], dtype=np.uint8), [[-1.0, 0.0, 0.5, 127 / 128]]),
+    ]
+)
+def test_convert_audio_dtype_rescales_other_integer_pcm(samples, expected):
+    float_audio = convert_audio_dtype(samples, 'float32')
+    assert float_audio.dtype == np.float32
+    np.testing.assert_allclose(float_audio, expected, rtol=1e-6)
+    int_audio = convert_audio_dtype(samples, 'int16')
+    assert int_audio.dtype == np.int16
+    np.testing.assert_array_equal(int_audio, convert_audio_dtype(float_audio, 'int16'))
+
+
 def test_add_recording_sets():
     expected = DummyManifest(RecordingSet, begin_id=0, end_id=10)
     recording_set_1 = DummyManifest(RecordingSet, begin_id=0, end_id=5)
@@ -314,6 +365,36 @@ class TestAudioMixer:
         np.testing.assert_almost_equal(mixed[0, 8000:], 0.31622776)
         assert mixed.dtype == np.float32
 
+    @pytest.mark.parametrize('num_samples', [None, 10000, 40000])
+    def test_audio_mixed_many_tracks(self, num_samples):
+        rng = np.random.RandomState(0)
+        noises = [(rng.rand(1, rng.randint(100, 2000)).astype(np.float32), rng.uniform(0, 2)) for _ in range(50)]
+        mixer = AudioMixer(base_audio=self.audio1, sampling_rate=8000, num_samples=num_samples)
+        for noise, offset in noises:
+            mixer.add_to_mix(noise, snr=5, offset=offset)
+
+        unmixed = mixer.unmixed_audio
+        assert unmixed.shape[0] == 51
+        assert unmixed.shape[1] == max(8000, max(round(o * 8000) + n.shape[1] for n, o in noises))
+        mixed = mixer.mixed_audio
+        assert mixed.shape == (1, unmixed.shape[1])
+        assert mixed.dtype == np.float32
+        np.testing.assert_allclose(mixed, unmixed.sum(axis=0, keepdims=True), rtol=1e-5, atol=1e-6)
+
+    def test_audio_mixed_without_keeping_tracks(self):
+        mixer = AudioMixer(base_audio=self.audio1, sampling_rate=8000, keep_tracks=False)
+        mixer.add_to_mix(self.audio2, snr=None, offset=0.5)
+        assert mixer.mixed_audio.shape == (1, 12000)
+        with raises(AssertionError):
+            mixer.unmixed_audio
+
+    def test_audio_mixer_accepts_multi_channel_base_audio(self):
+        base_audio = np.vstack([self.audio1, 2 * self.audio1])
+        mixer = AudioMixer(base_audio=base_audio, sampling_rate=8000)
+        # As before, the channels are separate tracks that are summed in the mix.
+        np.testing.assert_allclose(mixer.unmixed_audio, base_audio)
+        np.testing.assert_allclose(mixer.mixed_audio, 3 * self.audio1, rtol=1e-5)
+
 
 @pytest.mark.skipif(
     all('ffmpeg' not in str(backend).lower() for backend in audioread.available_backends()),
@@ -381,3 +462,229 @@ def test_opus_stereo_recording_from_file_force_sampling_rate_read_chunk():
     assert num_channels == recording.num_channels
     assert num_samples == 2000
     np.testing.assert_almost_equal(samples, all_samples[:, 4000:6000], decimal=5)
+
+
+@pytest.fixture
+def audio_cache():
+    previous = get_audio_cache()
+    yield set_audio_cache(max_bytes=1024 ** 2)
+    lhotse.audio._AUDIO_CACHE = previous
+
+
+def test_audio_cache_command_source_chunks_are_decoded_once(nonfile_source, audio_cache):
+    full = nonfile_source.load_audio()
+    chunk = nonfile_source.load_audio(offset=0.1, duration=0.2)
+    np.testing.assert_equal(chunk, full[:, 800:2400] if full.ndim == 2 else full[800:2400])
+    nonfile_source.load_audio(offset=0.3, duration=0.1)
+    # Reading the full recording doesn't store it in the cache; the first chunk does.
+    assert audio_cache.misses == 2
+    assert audio_cache.hits == 1
+
+
+def test_audio_cache_lru_eviction_and_spill(tmp_path):
+    cache = AudioCache(max_bytes=10, spill_dir=tmp_path, max_spill_bytes=12)
+    cache.put('a', b'aaaaaa')
+    cache.put('b', b'bbbbbb')  # evicts 'a' from memory to disk
+    assert cache.evictions == 1
+    assert cache.get('a') == b'aaaaaa'  # read back from disk, evicts 'b' to disk
+    assert cache.get('b') == b'bbbbbb'
+    assert cache.get('c') is None
+    assert cache.stats['hits'] == 2
+    assert cache.stats['misses'] == 1
+    assert cache.stats['spilled_bytes'] <= 12
+    cache.clear()
+    assert cache.get('a') is None
+    assert not list(tmp_path.iterdir())
+
+
+def test_audio_cache_is_disabled_by_default():
+    assert not get_audio_cache().enabled
+
+
+def test_audio_cache_disabled():
+    cache = AudioCache(max_bytes=0)
+    assert not cache.enabled
+    cache.put('a', b'aaaaaa')
+    assert cache.get('a') is None
+
+
+@pytest.mark.parametrize(
+    ['path', 'force_opus_sampling_rate', 'expected'],
+    [
+        ('test/fixtures/mono_c0.opus', None, (1, 24260, 48000)),
+        ('test/fixtures/mono_c0.opus', 8000, (1, 4044, 8000)),
+        ('test/fixtures/stereo.opus', 8000, (2, 8044, 8000)),
+    ]
+)
+def test_opus_info_is_read_from_headers(path, force_opus_sampling_rate, expected):
+    reset_decoder_stats()
+    info = opus_info(path, force_opus_sampling_rate=force_opus_sampling_rate)
+    assert (info.channels, info.frames, info.samplerate) == expected
+    stats = get_decoder_stats()
+    assert stats['opus_header'].calls == 1
+    # No decoding was necessary.
+    assert 'ffmpeg' not in stats
+
+
+def test_opus_info_ignores_capture_pattern_inside_audio_payload(tmp_path):
+    data = Path('test/fixtures/mono_c0.opus').read_bytes()
+    # Overwrite some of the last page's payload with bytes that look like an Ogg page header.
+    fake_header = b'OggS\x00\x04' + struct.pack('<q', 123456789)
+    data = data[:-20] + fake_header + data[-20 + len(fake_header):]
+    path = tmp_path / 'corrupted.opus'
+    path.write_bytes(data)
+    info = opus_info(path)
+    assert (info.channels, info.frames, info.samplerate) == (1, 24260, 48000)
+
+
+def test_sph_info_is_read_from_header():
+    reset_decoder_stats()
+    info = sph_info('test/fixtures/stereo.sph')
+    assert (info.channels, info.frames, info.samplerate, info.duration) == (2, 8000, 8000, 1.0)
+    assert 'sph2pipe' not in get_decoder_stats()
+
+
+def test_read_sph_natively_reads_only_the_requested_chunk():
+    reset_decoder_stats()
+    full, sampling_rate = read_sph('test/fixtures/stereo.sph')
+    chunk, _ = read_sph('test/fixtures/stereo.sph', offset=0.25, duration=0.5)
+    assert sampling_rate == 8000
+    assert chunk.shape == (2, 4000)
+    np.testing.assert_equal(chunk, full[:, 2000:6000])
+    wav = Recording.from_file('test/fixtures/stereo.wav').load_audio()
+    np.testing.assert_almost_equal(full, wav)
+    stats = get_decoder_stats()
+    assert stats['sph_native'].calls == 2
+    assert 'sph2pipe' not in stats
+
+
+def test_read_sph_ulaw(tmp_path):
+    # Byte 0xFF is silence and 0x80 is the maximum positive amplitude in u-law.
+    data = bytes([0xFF, 0x80, 0x00, 0xFF] * 4)
+    header = b'NIST_1A\n   1024\nsample_count -i 8\nsample_n_bytes -i 1\nchannel_count -i 2\n' \
+             b'sample_rate -i 8000\nsample_coding -s4 ulaw\nend_head\n'
+    path = tmp_path / 'ulaw.sph'
+    path.write_bytes(header.ljust(1024, b' ') + data)
+    audio, sampling_rate = read_sph(path)
+    assert audio.shape == (2, 8)
+    np.testing.assert_equal(audio[:, 0], [0.0, 32124 / 32768])
+    np.testing.assert_equal(audio[:, 1], [-32124 / 32768, 0.0])
+
+
+@pytest.mark.parametrize('channels', [[0], [5], [1, 6], [7, 2]])
+@pytest.mark.parametrize(['offset', 'duration'], [(0.0, None), (0.3, 0.5)])
+def test_recording_reads_only_selected_channels(tmp_path, monkeypatch, channels, offset, duration):
+    import soundfile
+    # A small block size to test that the blocks are de-interleaved correctly.
+    monkeypatch.setattr(lhotse.audio, 'CHANNEL_SELECTIVE_READ_BLOCK_FRAMES', 1000)
+    audio = np.random.uniform(-0.5, 0.5, size=(8000, 8)).astype(np.float32)
+    path = str(tmp_path / 'multichannel.wav')
+    soundfile.write(path, audio, 8000, subtype='FLOAT')
+    recording = Recording.from_file(path)
+    assert recording.channel_ids == list(range(8))
+    full = recording.load_audio(offset=offset, duration=duration)
+    selected = recording.load_audio(channels=channels, offset=offset, duration=duration)
+    # The channels are returned in the order of the recording.
+    np.testing.assert_equal(selected, full[sorted(channels)])
+
+
+@pytest.fixture
+def audio_metadata_cache(tmp_path):
+    cache = set_audio_metadata_cache(tmp_path / 'metadata.sqlite')
+    yield cache
+    set_audio_metadata_cache(None)
+
+
+def test_audio_metadata_cache_creates_one_connection_per_process(tmp_path):
+    cache = AudioMetadataCache(tmp_path / 'metadata.sqlite')
+    lock = cache._lock
+    with ThreadPoolExecutor(8) as executor:
+        connections = list(executor.map(lambda _: cache._connection(), range(64)))
+    assert all(conn is connections[0] for conn in connections)
+    # The lock is only replaced after a fork.
+    assert cache._lock is lock
+    cache.close()
+
+
+def test_recording_from_file_uses_metadata_cache(audio_metadata_cache, tmp_path):
+    path = tmp_path / 'stereo.wav'
+    shutil.copy('test/fixtures/stereo.wav', path)
+    expected = Recording.from_file(path)
+    assert (audio_metadata_cache.hits, audio_metadata_cache.misses) == (0, 1)
+    assert Recording.from_file(path) == expected
+    assert (audio_metadata_cache.hits, audio_metadata_cache.misses) == (1, 1)
+    # A modified file is read again.
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert Recording.from_file(path) == expected
+    assert (audio_metadata_cache.hits, audio_metadata_cache.misses) == (1, 2)
+    assert len(audio_metadata_cache) == 1
+
+
+@pytest.mark.parametrize('num_jobs', [1, 2])
+def test_recording_set_from_dir_uses_metadata_cache(audio_metadata_cache, num_jobs):
+    expected = RecordingSet.from_dir('test/fixtures', pattern='mono_c*.wav', num_jobs=num_jobs)
+    assert len(expected) == 2
+    assert len(audio_metadata_cache) == 2
+    assert RecordingSet.from_dir('test/fixtures', pattern='mono_c*.wav', num_jobs=num_jobs) == expected
+    assert audio_metadata_cache.hits == 2
+
+
+@pytest.mark.parametrize('num_jobs', [1, 2])
+def test_walk_files(num_jobs):
+    expected = sorted(Path('test/fixtures').rglob('*.wav'))
+    assert len(expected) > 0
+    assert sorted(walk_files('test/fixtures', '*.wav', num_jobs=num_jobs)) == expected
+
+
+def test_walk_files_lists_directories_lazily(tmp_path, monkeypatch):
+    for idx in range(20):
+        (tmp_path / f'dir-{idx:02d}').mkdir()
+        (tmp_path / f'dir-{idx:02d}' / 'audio.wav').touch()
+    listed = []
+    scandir = os.scandir
+
+    def recording_scandir(path):
+        listed.append(path)
+        return scandir(path)
+
+    monkeypatch.setattr(lhotse.audio.os, 'scandir', recording_scandir)
+    files = walk_files(tmp_path, '*.wav', num_jobs=2)
+    assert next(files) == tmp_path / 'dir-00' / 'audio.wav'
+    # The root directory, plus at most 2 * num_jobs directories listed ahead of the consumer.
+    assert len(listed) <= 1 + 4
+    assert list(files) == [tmp_path / f'dir-{idx:02d}' / 'audio.wav' for idx in range(1, 20)]
+
+
+@pytest.mark.parametrize('num_jobs', [1, 2])
+def test_walk_files_does_not_follow_symlinked_directories(tmp_path, num_jobs):
+    (tmp_path / 'sub').mkdir()
+    shutil.copy('test/fixtures/mono_c0.wav', tmp_path / 'sub' / 'mono_c0.wav')
+    # A symlink loop, and a second path to the same directory.
+    (tmp_path / 'sub' / 'loop').symlink_to(tmp_path, target_is_directory=True)
+    (tmp_path / 'alias').symlink_to(tmp_path / 'sub', target_is_directory=True)
+    found = list(walk_files(tmp_path, '*.wav', num_jobs=num_jobs))
+    assert found == [tmp_path / 'sub' / 'mono_c0.wav']
+    assert found == sorted(tmp_path.rglob('*.wav'))
+
+
+@pytest.mark.parametrize('num_jobs', [1, 2])
+def test_recording_set_from_dir_resumes_writing(tmp_path, num_jobs):
+    audio_dir = tmp_path / 'audio'
+    (audio_dir / 'sub').mkdir(parents=True)
+    for name in ['mono_c0.wav', 'mono_c1.wav']:
+        shutil.copy(f'test/fixtures/{name}', audio_dir / name)
+    shutil.copy('test/fixtures/stereo.wav', audio_dir / 'sub' / 'stereo.wav')
+    expected = RecordingSet.from_dir(audio_dir, pattern='*.wav', num_jobs=num_jobs)
+    assert len(expected) == 3
+
+    output_path = tmp_path / 'recordings.jsonl'
+    recordings = RecordingSet.from_dir(audio_dir, pattern='*.wav', num_jobs=num_jobs, output_path=output_path)
+    assert RecordingSet.from_recordings(recordings) == expected
+
+    # Simulate a crash after the first recording was written, in the middle of writing the second one.
+    lines = output_path.read_text().splitlines(keepends=True)
+    output_path.write_text(lines[0] + lines[1][:len(lines[1]) // 2])
+    recordings = RecordingSet.from_dir(audio_dir, pattern='*.wav', num_jobs=num_jobs, output_path=output_path)
+    assert len(output_path.read_text().splitlines()) == 3
+    assert RecordingSet.from_recordings(recordings) == expected
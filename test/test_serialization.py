@@ -1,4 +1,5 @@
-from tempfile import NamedTemporaryFile
+from pathlib import Path
+from tempfile import NamedTemporaryFile, TemporaryDirectory
 from lhotse.supervision import AlignmentItem
 
 import pytest
@@ -13,6 +14,7 @@ import pytest
 
 from lhotse import AudioSource, CutSet, FeatureSet, Features, MonoCut, Recording, RecordingSet, SupervisionSegment, \
     SupervisionSet, load_manifest, store_manifest
+from lhotse.serialization import JsonlIndex, drop_incomplete_last_line, load_jsonl, load_jsonl_parallel, save_to_jsonl
 from lhotse.supervision import AlignmentItem
 from lhotse.testing.dummies import DummyManifest
 from lhotse.utils import fastcopy, nullcontext as does_not_raise
@@ -345,3 +347,111 @@ def test_sequential_jsonl_writer_overwrite(overwrite):
                 assert all(not writer.contains(id_) for id_ in half.ids)
             else:
                 assert all(writer.contains(id_) for id_ in half.ids)
+
+
+@pytest.mark.parametrize('compressed', [False, True])
+@pytest.mark.parametrize('index_on_write', [False, True])
+def test_lazy_jsonl_random_access(compressed, index_on_write):
+    cuts = DummyManifest(CutSet, begin_id=0, end_id=50)
+    with TemporaryDirectory() as d:
+        path = Path(d) / ('cuts.jsonl' + ('.gz' if compressed else ''))
+        cuts.to_jsonl(path, index=index_on_write)
+        assert JsonlIndex.path_for(path).is_file() == index_on_write
+
+        lazy_cuts = CutSet.from_file(path, lazy=True)
+        assert lazy_cuts.is_lazy
+        assert len(lazy_cuts) == len(cuts)
+        assert list(lazy_cuts.ids) == list(cuts.ids)
+        assert 'dummy-cut-0007' in lazy_cuts
+        assert 'nonexistent-cut' not in lazy_cuts
+        assert lazy_cuts['dummy-cut-0042'] == cuts['dummy-cut-0042']
+        assert lazy_cuts['dummy-cut-0003'] == cuts['dummy-cut-0003']
+        with pytest.raises(KeyError):
+            lazy_cuts['nonexistent-cut']
+        # Random access reads do not interfere with iteration.
+        assert list(lazy_cuts) == list(cuts)
+        subset = lazy_cuts.subset(cut_ids=['dummy-cut-0010', 'dummy-cut-0001'])
+        assert list(subset.ids) == ['dummy-cut-0010', 'dummy-cut-0001']
+        # The index was persisted after being built for the first time.
+        assert JsonlIndex.path_for(path).is_file()
+        lazy_cuts.cuts.close()
+        assert lazy_cuts.cuts._reader is None
+        # The files are re-opened when needed.
+        assert lazy_cuts['dummy-cut-0042'] == cuts['dummy-cut-0042']
+        lazy_cuts.cuts.close()
+
+
+@pytest.mark.parametrize('num_jobs', [1, 2])
+def test_jsonl_index_requires_item_ids(feature_set, num_jobs, tmp_path):
+    with pytest.raises(ValueError):
+        feature_set.to_jsonl(tmp_path / 'feats.jsonl', index=True, num_jobs=num_jobs)
+    feature_set.to_jsonl(tmp_path / 'feats.jsonl', num_jobs=num_jobs)
+
+
+def test_lazy_jsonl_stale_index_is_rebuilt():
+    with TemporaryDirectory() as d:
+        path = Path(d) / 'cuts.jsonl'
+        DummyManifest(CutSet, begin_id=0, end_id=10).to_jsonl(path, index=True)
+        assert JsonlIndex.load(path) is not None
+        DummyManifest(CutSet, begin_id=10, end_id=30).to_jsonl(path)
+        assert JsonlIndex.load(path) is None
+        lazy_cuts = CutSet.from_jsonl_lazy(path)
+        assert len(lazy_cuts) == 20
+        assert lazy_cuts['dummy-cut-0025'].id == 'dummy-cut-0025'
+        assert 'dummy-cut-0005' not in lazy_cuts
+
+
+@pytest.mark.parametrize(
+    'manifest_type',
+    ['recording_set', 'supervision_set', 'feature_set', 'cut_set']
+)
+@pytest.mark.parametrize('compressed', [False, True])
+def test_parallel_jsonl_serialization(manifests, manifest_type, compressed):
+    manifest = manifests[manifest_type]
+    with NamedTemporaryFile(suffix='.jsonl' + ('.gz' if compressed else '')) as f:
+        manifest.to_file(f.name, num_jobs=2)
+        assert manifest == type(manifest).from_file(f.name, num_jobs=2)
+        assert manifest == load_manifest(f.name, num_jobs=2)
+        assert manifest == load_manifest(f.name)
+
+
+@pytest.mark.parametrize('compressed', [False, True])
+def test_parallel_jsonl_chunking_preserves_order(compressed, monkeypatch):
+    import lhotse.serialization
+    monkeypatch.setattr(lhotse.serialization, 'JSONL_WRITE_CHUNK_SIZE', 7)
+    cuts = DummyManifest(CutSet, begin_id=0, end_id=50)
+    with TemporaryDirectory() as d:
+        path = Path(d) / ('cuts.jsonl' + ('.gz' if compressed else ''))
+        cuts.to_jsonl(path, index=True, num_jobs=2)
+        items = list(load_jsonl_parallel(path, num_jobs=2, deserialize=True, chunk_size=1000))
+        assert [c.id for c in items] == list(cuts.ids)
+        # The offsets index stays valid when the chunks are written by multiple workers.
+        lazy_cuts = CutSet.from_jsonl_lazy(path)
+        assert lazy_cuts['dummy-cut-0033'] == cuts['dummy-cut-0033']
+
+
+def test_jsonl_non_finite_values_roundtrip(tmp_path):
+    # json.dumps writes NaN and Infinity, which orjson (when installed) doesn't accept.
+    path = tmp_path / 'items.jsonl'
+    items = [{'id': 'a', 'value': float('inf')}, {'id': 'b', 'value': 1.0}]
+    save_to_jsonl(items, path)
+    assert list(load_jsonl(path)) == items
+    assert list(load_jsonl_parallel(path, num_jobs=2)) == items
+
+
+@pytest.mark.parametrize(
+    ['content', 'expected'],
+    [
+        (b'', b''),
+        (b'{"a": 1}\n', b'{"a": 1}\n'),
+        (b'{"a": 1}\n{"b"', b'{"a": 1}\n'),
+        (b'{"b"', b''),
+        # The incomplete line spans more than one read block.
+        (b'{"a": 1}\n' + b'x' * 200000, b'{"a": 1}\n'),
+    ]
+)
+def test_drop_incomplete_last_line(tmp_path, content, expected):
+    path = tmp_path / 'manifest.jsonl'
+    path.write_bytes(content)
+    drop_incomplete_last_line(path)
+    assert path.read_bytes() == expected
@@ -0,0 +1,126 @@
+import multiprocessing
+import pickle
+from tempfile import TemporaryDirectory
+
+import pytest
+from torch import distributed as dist
+
+from lhotse import CutSet, RecordingSet, SupervisionSet, load_manifest
+from lhotse.dataset.sampling import SingleCutSampler
+from lhotse.sharding import ShardedJsonlIterator
+from lhotse.testing.dummies import DummyManifest
+
+
+@pytest.mark.parametrize('manifest_type', [RecordingSet, SupervisionSet, CutSet])
+def test_sharded_serialization_roundtrip(manifest_type):
+    manifest = DummyManifest(manifest_type, begin_id=0, end_id=25)
+    with TemporaryDirectory() as d:
+        manifest.to_shards(d, shard_size=10)
+        restored = manifest_type.from_shards(d)
+        assert restored.is_lazy
+        assert len(restored) == len(manifest)
+        assert list(restored) == list(manifest)
+        loaded = load_manifest(d)
+        assert isinstance(loaded, manifest_type)
+        assert list(loaded) == list(manifest)
+
+
+@pytest.fixture
+def sharded_cuts():
+    cuts = DummyManifest(CutSet, begin_id=0, end_id=100)
+    with TemporaryDirectory() as d:
+        cuts.to_shards(d, shard_size=10, compressed=False)
+        yield CutSet.from_shards(d)
+
+
+def test_sharded_cut_set_index(sharded_cuts):
+    storage = sharded_cuts.cuts
+    assert storage.num_shards == 10
+    # The dummy cuts have a duration of 1 second each
+    assert storage.total_duration == 100
+    assert sharded_cuts['dummy-cut-0042'].id == 'dummy-cut-0042'
+    assert 'dummy-cut-0042' in sharded_cuts
+    assert 'nonexistent-cut' not in sharded_cuts
+    # Random access doesn't write the offset indexes to the shard directory.
+    assert not list(storage.path.glob('*.lidx'))
+
+
+@pytest.mark.parametrize(['world_size', 'num_workers'], [(1, 1), (2, 1), (3, 2)])
+def test_sharded_cut_set_select_shards(sharded_cuts, world_size, num_workers):
+    parts = [
+        sharded_cuts.cuts.select_shards(rank=rank, world_size=world_size, worker_id=worker_id, num_workers=num_workers)
+        for rank in range(world_size)
+        for worker_id in range(num_workers)
+    ]
+    ids = [item.id for part in parts for item in part]
+    assert sorted(ids) == sorted(sharded_cuts.ids)
+    assert sum(len(part) for part in parts) == len(sharded_cuts)
+
+
+def test_sharded_cut_set_pickling(sharded_cuts):
+    part = sharded_cuts.cuts.select_shards(rank=1, world_size=2)
+    restored = pickle.loads(pickle.dumps(part))
+    assert isinstance(restored, ShardedJsonlIterator)
+    assert list(restored) == list(part)
+
+
+def _sample_in_process_group(rank, world_size, init_file, manifest_path, shuffle, queue):
+    dist.init_process_group('gloo', init_method=f'file://{init_file}', rank=rank, world_size=world_size)
+    try:
+        sampler = SingleCutSampler(CutSet.from_shards(manifest_path), max_duration=10.0, shuffle=shuffle)
+        batches = [[c.id for c in batch] for batch in sampler]
+        queue.put((rank, sampler.shards_assigned, batches))
+    finally:
+        dist.destroy_process_group()
+
+
+def sample_in_process_group(manifest_path, init_file, world_size, shuffle=False):
+    """Run a ``SingleCutSampler`` in each of ``world_size`` processes with an initialized gloo process group."""
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    processes = [
+        ctx.Process(
+            target=_sample_in_process_group,
+            args=(rank, world_size, init_file, manifest_path, shuffle, queue)
+        )
+        for rank in range(world_size)
+    ]
+    for p in processes:
+        p.start()
+    results = sorted(queue.get(timeout=120) for _ in processes)
+    for p in processes:
+        p.join()
+    return [(shards_assigned, batches) for _, shards_assigned, batches in results]
+
+
+@pytest.mark.skipif(not dist.is_available(), reason='Requires torch.distributed.')
+@pytest.mark.parametrize('shuffle', [False, True])
+def test_single_cut_sampler_assigns_shards_to_ranks(sharded_cuts, shuffle, tmp_path):
+    results = sample_in_process_group(sharded_cuts.cuts.path, tmp_path / 'dist_init', world_size=2, shuffle=shuffle)
+    sampled_ids = []
+    for shards_assigned, batches in results:
+        assert shards_assigned
+        rank_ids = [cut_id for batch in batches for cut_id in batch]
+        # Each rank reads a half of the data.
+        assert len(rank_ids) == 50
+        sampled_ids.extend(rank_ids)
+    assert sorted(sampled_ids) == sorted(sharded_cuts.ids)
+
+
+@pytest.mark.skipif(not dist.is_available(), reason='Requires torch.distributed.')
+def test_single_cut_sampler_uneven_shards_yield_equal_number_of_batches(tmp_path):
+    # Shards of 40, 40 and 20 cuts: rank 0 gets 60 cuts, and rank 1 gets 40 cuts.
+    DummyManifest(CutSet, begin_id=0, end_id=100).to_shards(tmp_path / 'cuts', shard_size=40, compressed=False)
+    results = sample_in_process_group(tmp_path / 'cuts', tmp_path / 'dist_init', world_size=2)
+    (assigned_0, batches_0), (assigned_1, batches_1) = results
+    assert assigned_0 and assigned_1
+    assert len(batches_0) == len(batches_1) > 0
+    assert set(cut_id for batch in batches_1 for cut_id in batch) == {f'dummy-cut-{idx:04d}' for idx in range(40, 80)}
+
+
+def test_single_cut_sampler_does_not_assign_shards_without_process_group(sharded_cuts):
+    with pytest.warns(UserWarning):
+        sampler = SingleCutSampler(sharded_cuts, max_duration=10.0, world_size=2, rank=0)
+    assert not sampler.shards_assigned
+    # The fallback returns every world_size-th batch of all the data.
+    assert len([c for batch in sampler for c in batch]) == 50
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""
+Benchmark of reading a single channel of multi-channel recordings with ``Recording.load_audio``,
+compared to decoding all the channels and discarding the unneeded ones.
+
+Example:
+
+    $ python tools/benchmark_channel_selective_read.py --num-channels 8 --duration 600
+
+Besides the multi-channel test fixtures (``test/fixtures/stereo.{wav,sph}``), a WAV file
+with ``--num-channels`` channels and ``--duration`` seconds of noise is created for the benchmark.
+"""
+import argparse
+import time
+import tracemalloc
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from lhotse import Recording
+
+FIXTURES = Path(__file__).parent.parent / 'test' / 'fixtures'
+
+
+def measure(fn, repeat: int):
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - start) / repeat
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024 ** 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--num-channels', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=600.0, help='Duration of the generated file (seconds).')
+    parser.add_argument('--sampling-rate', type=int, default=16000)
+    parser.add_argument('--chunk-duration', type=float, default=10.0,
+                        help='Duration of the chunks read from the generated file (seconds).')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    import soundfile
+    with TemporaryDirectory() as d:
+        path = Path(d) / f'{args.num_channels}ch.wav'
+        num_samples = int(args.duration * args.sampling_rate)
+        audio = np.random.uniform(-0.5, 0.5, size=(num_samples, args.num_channels)).astype(np.float32)
+        soundfile.write(str(path), audio, args.sampling_rate, subtype='PCM_16')
+        del audio
+
+        print(f'{"file":<24} {"read":<18} {"all channels":>22} {"one channel":>22}')
+        for file in [FIXTURES / 'stereo.wav', FIXTURES / 'stereo.sph', path]:
+            recording = Recording.from_file(file)
+            for desc, kwargs in [
+                ('full', {}),
+                (f'{args.chunk_duration}s chunk', {'offset': recording.duration / 2, 'duration': args.chunk_duration}),
+            ]:
+                if kwargs.get('duration', 0) > recording.duration / 2:
+                    continue
+                # Reading all channels and dropping the unneeded ones is what load_audio used to do.
+                all_time, all_mem = measure(
+                    lambda: recording.load_audio(**kwargs)[:1].copy(), repeat=args.repeat
+                )
+                one_time, one_mem = measure(
+                    lambda: recording.load_audio(channels=0, **kwargs), repeat=args.repeat
+                )
+                print(
+                    f'{file.name:<24} {desc:<18} {all_time * 1000:>10.1f}ms {all_mem:>8.1f}MB '
+                    f'{one_time * 1000:>10.1f}ms {one_mem:>8.1f}MB'
+                )
+
+
+if __name__ == '__main__':
+    main()
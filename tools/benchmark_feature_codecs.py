@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""
+Benchmark of the feature storage backends: storage size, encoding and decoding throughput,
+and the reconstruction error, compared to lilcom.
+
+The feature matrices are taken from the lilcom files in the test fixtures (``test/fixtures/*/storage``),
+or from a feature manifest provided with ``--manifest``.
+
+Example:
+
+    $ python tools/benchmark_feature_codecs.py --repeat 20 --slice-frames 100
+
+Besides reading full matrices, we also measure reading a random slice of ``--slice-frames`` frames
+from each matrix, which is the typical access pattern when cuts are shorter than the recordings.
+"""
+import argparse
+import random
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import lilcom
+import numpy as np
+
+from lhotse import load_manifest
+from lhotse.features.io import (
+    ChunkedCompressedHdf5Writer,
+    ChunkedLilcomHdf5Writer,
+    LilcomHdf5Writer,
+    NumpyHdf5Writer,
+    NumpyMmapArenaWriter,
+    QuantizedHdf5Writer,
+    close_cached_file_handles,
+    get_reader,
+)
+from lhotse.utils import is_module_available
+
+FIXTURES = Path(__file__).parent.parent / 'test' / 'fixtures'
+
+
+def storages():
+    yield 'numpy_hdf5', lambda d: NumpyHdf5Writer(f'{d}/feats.h5')
+    yield 'numpy_mmap_arena', lambda d: NumpyMmapArenaWriter(f'{d}/arena')
+    yield 'numpy_mmap_arena (float16)', lambda d: NumpyMmapArenaWriter(f'{d}/arena', dtype='float16')
+    yield 'lilcom_hdf5', lambda d: LilcomHdf5Writer(f'{d}/feats.h5')
+    yield 'chunked_lilcom_hdf5', lambda d: ChunkedLilcomHdf5Writer(f'{d}/feats.h5')
+    for dtype in ('float16', 'int8', 'uint8'):
+        yield f'quantized_hdf5 ({dtype})', lambda d, dtype=dtype: QuantizedHdf5Writer(f'{d}/feats.h5', dtype=dtype)
+    for codec, module in [('zstd', 'zstandard'), ('lz4', 'lz4')]:
+        if not is_module_available(module):
+            print(f'Skipping {codec}: {module} is not installed.')
+            continue
+        for dtype in ('float32', 'float16'):
+            yield f'chunked_compressed_hdf5 ({codec}, {dtype})', \
+                lambda d, codec=codec, dtype=dtype: ChunkedCompressedHdf5Writer(
+                    f'{d}/feats.h5', codec=codec, dtype=dtype
+                )
+
+
+def load_arrays(args):
+    if args.manifest is not None:
+        return [features.load() for features in load_manifest(args.manifest)]
+    return [lilcom.decompress(path.read_bytes()) for path in sorted(FIXTURES.glob('*/storage/*.llc'))]
+
+
+def disk_size(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.rglob('*') if p.is_file())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--manifest', type=Path, help='An existing feature manifest to take the matrices from.')
+    parser.add_argument('--repeat', type=int, default=20, help='How many times to store each matrix.')
+    parser.add_argument('--slice-frames', type=int, default=100)
+    args = parser.parse_args()
+
+    arrays = load_arrays(args)
+    assert arrays, 'No feature matrices found.'
+    num_frames = sum(arr.shape[0] for arr in arrays) * args.repeat
+    raw_mb = sum(arr.astype(np.float32).nbytes for arr in arrays) * args.repeat / 1024 ** 2
+    print(f'{len(arrays)} matrices x {args.repeat} repeats: {num_frames} frames, {raw_mb:.1f} MB as float32.')
+
+    rng = random.Random(0)
+    header = f'{"storage":<40} {"size":>9} {"ratio":>6} {"enc MB/s":>9} {"dec MB/s":>9} ' \
+             f'{"slice/s":>9} {"max err":>9}'
+    print(header)
+    print('-' * len(header))
+    for name, storage_fn in storages():
+        with TemporaryDirectory() as d:
+            start = time.perf_counter()
+            with storage_fn(d) as writer:
+                keys = [
+                    (writer.write(f'{idx}-{rep}', arr), arr)
+                    for rep in range(args.repeat)
+                    for idx, arr in enumerate(arrays)
+                ]
+                storage_path = writer.storage_path
+            encode_time = time.perf_counter() - start
+            size_mb = disk_size(Path(d)) / 1024 ** 2
+
+            reader = get_reader(writer.name)(storage_path)
+            max_err = 0.0
+            start = time.perf_counter()
+            for key, arr in keys:
+                max_err = max(max_err, float(np.abs(reader.read(key).astype(np.float32) - arr).max()))
+            decode_time = time.perf_counter() - start
+
+            slices = []
+            for key, arr in keys:
+                left = rng.randint(0, max(0, arr.shape[0] - args.slice_frames))
+                slices.append((key, left, left + args.slice_frames))
+            start = time.perf_counter()
+            for key, left, right in slices:
+                reader.read(key, left, right)
+            slice_time = time.perf_counter() - start
+            close_cached_file_handles()
+
+        print(
+            f'{name:<40} {size_mb:>7.1f}MB {raw_mb / size_mb:>6.2f} {raw_mb / encode_time:>9.1f} '
+            f'{raw_mb / decode_time:>9.1f} {len(slices) / slice_time:>9.0f} {max_err:>9.2e}'
+        )
+
+
+if __name__ == '__main__':
+    main()
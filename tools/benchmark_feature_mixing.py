@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+"""
+Benchmark of feature-domain mixing of MixedCuts with many tracks: ``FeatureMixer``
+compared to the previous implementation, which re-padded all the tracks whenever a longer one
+was added and folded the tracks pairwise with ``FeatureExtractor.mix``.
+
+Example:
+
+    $ python tools/benchmark_feature_mixing.py --num-tracks 2 5 20 --duration 30
+
+Each mix consists of a base track of ``--duration`` seconds and ``num_tracks - 1`` noise tracks
+of random durations and offsets, similar to the cuts created with ``CutSet.mix(..., duration=...)``.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from lhotse.features import Fbank, FeatureMixer
+from lhotse.utils import compute_num_frames
+
+
+def legacy_mix(extractor, base_feats, tracks, frame_shift, sampling_rate, padding_value=-1000.0):
+    """The previous implementation of ``FeatureMixer`` (for reference)."""
+    reference_energy = extractor.compute_energy(base_feats)
+    padded = [base_feats]
+    gains = []
+    num_features = base_feats.shape[1]
+    for feats, offset, snr in tracks:
+        num_frames_offset = compute_num_frames(offset, frame_shift, sampling_rate)
+        current_num_frames = padded[0].shape[0]
+        incoming_num_frames = feats.shape[0] + num_frames_offset
+        mix_num_frames = max(current_num_frames, incoming_num_frames)
+        if current_num_frames < mix_num_frames:
+            for idx in range(len(padded)):
+                padded[idx] = np.vstack([
+                    padded[idx],
+                    padding_value * np.ones((mix_num_frames - current_num_frames, num_features), dtype=np.float32)
+                ])
+        feats_to_add = feats
+        if offset > 0:
+            feats_to_add = np.vstack([
+                padding_value * np.ones((num_frames_offset, num_features), dtype=np.float32), feats_to_add
+            ])
+        if incoming_num_frames < mix_num_frames:
+            feats_to_add = np.vstack([
+                feats_to_add,
+                padding_value * np.ones((mix_num_frames - incoming_num_frames, num_features), dtype=np.float32)
+            ])
+        padded.append(feats_to_add)
+        gains.append(reference_energy * (10.0 ** (-snr / 10)) / extractor.compute_energy(feats))
+    result = padded[0]
+    for feats_to_add, gain in zip(padded[1:], gains):
+        result = extractor.mix(features_a=result, features_b=feats_to_add, energy_scaling_factor_b=gain)
+    return result
+
+
+def new_mix(extractor, base_feats, tracks, frame_shift, sampling_rate, num_frames):
+    mixer = FeatureMixer(extractor, base_feats, frame_shift=frame_shift, num_frames=num_frames)
+    for feats, offset, snr in tracks:
+        mixer.add_to_mix(feats, sampling_rate=sampling_rate, snr=snr, offset=offset)
+    return mixer.mixed_feats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--num-tracks', type=int, nargs='+', default=[2, 5, 20])
+    parser.add_argument('--duration', type=float, default=30.0, help='Duration of the base track (seconds).')
+    parser.add_argument('--num-features', type=int, default=80)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    extractor = Fbank()
+    frame_shift, sampling_rate = 0.01, 16000
+    rng = np.random.RandomState(0)
+    base_frames = int(args.duration / frame_shift)
+    base_feats = rng.uniform(-15, 5, size=(base_frames, args.num_features)).astype(np.float32)
+
+    print(f'{"tracks":>6} {"legacy":>10} {"FeatureMixer":>13} {"speedup":>8} {"max diff":>9}')
+    for num_tracks in args.num_tracks:
+        tracks = []
+        for _ in range(num_tracks - 1):
+            duration = rng.uniform(1.0, args.duration / 2)
+            offset = rng.uniform(0, args.duration - duration / 2)
+            feats = rng.uniform(-15, 5, size=(int(duration / frame_shift), args.num_features)).astype(np.float32)
+            tracks.append((feats, offset, rng.uniform(0, 20)))
+        num_frames = max([base_frames] + [
+            compute_num_frames(offset, frame_shift, sampling_rate) + feats.shape[0] for feats, offset, _ in tracks
+        ])
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            expected = legacy_mix(extractor, base_feats, tracks, frame_shift, sampling_rate)
+        legacy_time = (time.perf_counter() - start) / args.repeat
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            mixed = new_mix(extractor, base_feats, tracks, frame_shift, sampling_rate, num_frames)
+        new_time = (time.perf_counter() - start) / args.repeat
+
+        max_diff = float(np.abs(mixed - expected).max())
+        print(
+            f'{num_tracks:>6} {legacy_time * 1000:>8.1f}ms {new_time * 1000:>11.1f}ms '
+            f'{legacy_time / new_time:>7.1f}x {max_diff:>9.2e}'
+        )
+
+
+if __name__ == '__main__':
+    main()
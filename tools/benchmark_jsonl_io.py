@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+"""
+Benchmark of reading and writing JSONL manifests with a single process vs. multiple worker processes.
+
+Example:
+
+    $ python tools/benchmark_jsonl_io.py --num-cuts 1000000 --num-jobs 1 4 8
+
+When ``--manifest`` is not provided, a CutSet with ``--num-cuts`` dummy cuts is created first.
+"""
+import argparse
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from lhotse import CutSet, load_manifest
+from lhotse.testing.dummies import dummy_cut, dummy_supervision
+from lhotse.utils import is_module_available
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--manifest', type=Path, help='An existing JSONL manifest to benchmark.')
+    parser.add_argument('--num-cuts', type=int, default=1000000)
+    parser.add_argument('--num-jobs', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--uncompressed', action='store_true', help='Benchmark .jsonl rather than .jsonl.gz')
+    args = parser.parse_args()
+
+    print(f'orjson available: {is_module_available("orjson")}')
+    with TemporaryDirectory() as tmp:
+        suffix = '.jsonl' if args.uncompressed else '.jsonl.gz'
+        if args.manifest is not None:
+            manifest = load_manifest(args.manifest)
+        else:
+            manifest = CutSet.from_cuts(
+                dummy_cut(idx, supervisions=[dummy_supervision(idx)]) for idx in range(args.num_cuts)
+            )
+        print(f'Number of items: {len(manifest)}')
+
+        for num_jobs in args.num_jobs:
+            path = Path(tmp) / f'manifest-{num_jobs}{suffix}'
+            start = time.perf_counter()
+            manifest.to_file(path, num_jobs=num_jobs)
+            write_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            restored = load_manifest(path, num_jobs=num_jobs)
+            read_time = time.perf_counter() - start
+            assert len(restored) == len(manifest)
+
+            print(
+                f'num_jobs={num_jobs}: write {write_time:.2f}s, read {read_time:.2f}s '
+                f'({path.stat().st_size / 1024 ** 2:.1f} MB)'
+            )
+
+
+if __name__ == '__main__':
+    main()